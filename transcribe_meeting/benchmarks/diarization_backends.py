@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# diarization_backends.py
+"""Benchmark the PyTorch and ONNX Runtime diarization backends on CPU.
+
+The recording is diarized on the CPU with the PyTorch models, with the
+models exported to ONNX, and with the ONNX models quantized to int8. For
+each variant the diarization time (model export excluded) and the
+diarization error rate are reported. Without a reference RTTM the PyTorch
+output is the reference, so the DER column then shows how far each ONNX
+variant drifts from PyTorch rather than the absolute accuracy.
+
+Usage:
+    python benchmarks/diarization_backends.py --input meeting.wav --minutes 10 --threads 8
+    python benchmarks/diarization_backends.py --input meeting.wav --reference meeting.rttm
+
+Needs onnxruntime and onnx, and a Hugging Face token for the diarization
+pipeline (HUGGINGFACE_AUTH_TOKEN).
+"""
+import argparse
+import sys
+import tempfile
+import time
+from typing import Any, Dict, Optional
+
+import torch
+from pyannote.core import Segment
+from pyannote.database.util import load_rttm
+from pyannote.metrics.diarization import DiarizationErrorRate
+
+from transcribe_meeting import audio_utils, config, diarizer, onnx_backend
+
+VARIANTS = {
+    "torch": None,
+    "onnx": False,
+    "onnx-int8": True,
+}
+
+
+def load_variant(name: str, model_dir: str, threads: int) -> Any:
+    """Load a CPU pipeline running the models of one variant."""
+    pipeline = diarizer.load_diarization_pipeline(
+        config.DIARIZATION_PIPELINE_NAME, config.HUGGINGFACE_AUTH_TOKEN, "cpu", backend="torch"
+    )
+    if pipeline is None:
+        raise RuntimeError("Failed to load the diarization pipeline")
+    quantize = VARIANTS[name]
+    if quantize is not None and not onnx_backend.use_onnx_runtime(
+            pipeline, config.DIARIZATION_PIPELINE_NAME, model_dir, threads, quantize):
+        raise RuntimeError(f"Could not set up the {name} backend")
+    return pipeline
+
+
+def run(source: str, minutes: float, threads: int, reference_rttm: Optional[str] = None) -> None:
+    """Diarize the first minutes of a recording with every variant and print the table."""
+    waveform = audio_utils.decode_audio(source)
+    if waveform is None:
+        raise RuntimeError(f"Decoding {source} failed")
+    waveform = waveform[:int(minutes * 60 * audio_utils.SAMPLE_RATE)]
+    torch.set_num_threads(threads)
+
+    audio_seconds = waveform.shape[0] / audio_utils.SAMPLE_RATE
+    reference = None
+    if reference_rttm:
+        reference = next(iter(load_rttm(reference_rttm).values())).crop(Segment(0, audio_seconds))
+
+    results: Dict[str, Dict[str, Any]] = {}
+    with tempfile.TemporaryDirectory() as model_dir:
+        for name in VARIANTS:
+            pipeline = load_variant(name, model_dir, threads)
+            start = time.perf_counter()
+            annotation = diarizer.run_diarization(pipeline, waveform)
+            seconds = time.perf_counter() - start
+            if annotation is None:
+                raise RuntimeError(f"Diarization with {name} failed")
+            results[name] = {"seconds": seconds, "annotation": annotation}
+
+    if reference is None:
+        reference = results["torch"]["annotation"]
+    print(f"{minutes:.0f} min of audio, {threads} threads, DER against "
+          f"{'the reference RTTM' if reference_rttm else 'the torch output'}")
+    print(f"{'backend':>10} {'seconds':>8} {'speedup':>8} {'x realtime':>10} {'speakers':>8} {'DER':>7}")
+    for name, result in results.items():
+        metric = DiarizationErrorRate()
+        der = metric(reference, result["annotation"])
+        print(f"{name:>10} {result['seconds']:>8.1f} {results['torch']['seconds'] / result['seconds']:>7.2f}x "
+              f"{audio_seconds / result['seconds']:>10.1f} {len(result['annotation'].labels()):>8} {der:>7.2%}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--input", required=True, help="Recording to benchmark")
+    parser.add_argument("--minutes", type=float, default=10, help="Length of audio to use")
+    parser.add_argument("--threads", type=int, default=config.DIARIZATION_ONNX_THREADS,
+                        help="CPU threads for PyTorch and ONNX Runtime")
+    parser.add_argument("--reference", default=None, help="Reference RTTM for the DER")
+    args = parser.parse_args()
+    run(args.input, args.minutes, args.threads, args.reference)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# intermediate_audio.py
+"""Benchmark WAV vs FLAC as the intermediate audio format.
+
+For each recording length this extracts the intermediate audio in both
+formats and reports the file size, extraction time and the time to decode
+it back into a waveform. Each job decodes the intermediate file once per
+stage (diarization and transcription), so the decode overhead is counted
+twice against the disk and I/O saved.
+
+Usage:
+    python benchmarks/intermediate_audio.py --input meeting.mp4 --minutes 15 60 180
+
+Without --input a synthetic meeting (speech-like bursts, pauses and room
+noise) is generated. Real recordings compress differently, so prefer a
+representative recording when one is available.
+"""
+import argparse
+import os
+import sys
+import time
+import wave
+import tempfile
+import subprocess
+from pathlib import Path
+from typing import Any, Dict, List
+
+import numpy as np
+
+from transcribe_meeting import audio_utils
+
+FORMATS = ["wav", "flac"]
+DECODES_PER_JOB = 2  # diarization and transcription each read the audio
+
+
+def synthesize_meeting(path: Path, minutes: float, seed: int = 0) -> None:
+    """Write a synthetic meeting-like 16 kHz mono WAV."""
+    rng = np.random.default_rng(seed)
+    sr = audio_utils.SAMPLE_RATE
+    total = int(minutes * 60 * sr)
+    audio = rng.normal(0.0, 0.002, total).astype(np.float32)  # room noise
+    position = 0
+    while position < total:
+        # A few seconds of "speech": noise shaped by a syllable-rate envelope
+        length = int(rng.uniform(2, 12) * sr)
+        end = min(position + length, total)
+        t = np.arange(end - position) / sr
+        envelope = 0.5 * (1 + np.sin(2 * np.pi * rng.uniform(3, 6) * t)) ** 2
+        voiced = np.sin(2 * np.pi * rng.uniform(100, 220) * t) * 0.15
+        audio[position:end] += (voiced + rng.normal(0, 0.05, end - position)) * envelope
+        position = end + int(rng.uniform(0.3, 3) * sr)
+    pcm = (np.clip(audio, -1, 1) * 32767).astype("<i2")
+    with wave.open(str(path), "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sr)
+        wav_file.writeframes(pcm.tobytes())
+
+
+def cut_recording(source: str, path: Path, minutes: float) -> None:
+    """Copy the first minutes of a recording's audio into a WAV."""
+    subprocess.run([
+        "ffmpeg", "-nostdin", "-loglevel", "error", "-t", str(minutes * 60),
+        "-i", source, "-map", "0:a:0", "-ac", "1", "-ar", str(audio_utils.SAMPLE_RATE),
+        "-acodec", "pcm_s24le", "-y", str(path)
+    ], check=True)
+
+
+def measure(source: Path, workdir: Path, audio_format: str) -> Dict[str, Any]:
+    """Extract one intermediate file and time decoding it back."""
+    output = workdir / f"audio.{audio_format}"
+    start = time.perf_counter()
+    if not audio_utils.extract_audio(str(source), str(output)):
+        raise RuntimeError(f"Extraction to {audio_format} failed")
+    extract_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    waveform = audio_utils.decode_audio(str(output))
+    decode_seconds = time.perf_counter() - start
+    if waveform is None:
+        raise RuntimeError(f"Decoding {audio_format} failed")
+    return {
+        "format": audio_format,
+        "bytes": output.stat().st_size,
+        "extract_seconds": extract_seconds,
+        "decode_seconds": decode_seconds,
+    }
+
+
+def run(minutes_list: List[float], source: str = "") -> None:
+    """Run the benchmark and print one comparison row per recording length."""
+    print(f"{'minutes':>8} {'wav MB':>8} {'flac MB':>8} {'saved':>7} "
+          f"{'extract +s':>10} {'decode +s/job':>13} {'per MB saved':>13}")
+    for minutes in minutes_list:
+        with tempfile.TemporaryDirectory() as tmp:
+            workdir = Path(tmp)
+            # 24-bit input so the "already 16 kHz mono WAV" fast path does
+            # not hide the WAV extraction cost
+            recording = workdir / "recording.wav"
+            if source:
+                cut_recording(source, recording, minutes)
+            else:
+                synthesize_meeting(recording, minutes)
+                subprocess.run([
+                    "ffmpeg", "-nostdin", "-loglevel", "error", "-i", str(recording),
+                    "-acodec", "pcm_s24le", "-y", str(workdir / "recording24.wav")
+                ], check=True)
+                os.replace(workdir / "recording24.wav", recording)
+            results = {fmt: measure(recording, workdir, fmt) for fmt in FORMATS}
+
+        wav, flac = results["wav"], results["flac"]
+        saved_mb = (wav["bytes"] - flac["bytes"]) / 2 ** 20
+        extra_extract = flac["extract_seconds"] - wav["extract_seconds"]
+        extra_decode = DECODES_PER_JOB * (flac["decode_seconds"] - wav["decode_seconds"])
+        cost_per_mb = (extra_extract + extra_decode) / saved_mb if saved_mb > 0 else float("nan")
+        print(f"{minutes:>8.0f} {wav['bytes'] / 2 ** 20:>8.1f} {flac['bytes'] / 2 ** 20:>8.1f} "
+              f"{1 - flac['bytes'] / wav['bytes']:>7.1%} {extra_extract:>10.2f} "
+              f"{extra_decode:>13.2f} {cost_per_mb * 1000:>10.1f} ms")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--input", default="", help="Recording to cut the benchmark audio from")
+    parser.add_argument("--minutes", type=float, nargs="+", default=[15, 60, 180],
+                        help="Recording lengths to benchmark")
+    args = parser.parse_args()
+    run(args.minutes, args.input)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# turn_transcription.py
+"""Benchmark the "turns" pipeline mode against transcribing then aligning.
+
+The recording is diarized once, then transcribed both ways:
+
+- align-after: the whole recording is transcribed with word timestamps and
+  every word is assigned to a speaker turn (PIPELINE_MODE "full")
+- turns: the speaker turns are transcribed as single-speaker clips, with
+  and without word timestamps (PIPELINE_MODE "turns")
+
+For each variant the transcription (plus alignment) time, the number of
+words and the share of align-after words whose speaker the variant agrees
+with are reported. Speaker agreement is measured at each align-after
+word's midpoint, so segment-level output can be compared too.
+
+Usage:
+    python benchmarks/turn_transcription.py --input meeting.mp4 --minutes 10
+
+Needs a real recording with speech, the Whisper model and a Hugging Face
+token for the diarization pipeline (HUGGINGFACE_AUTH_TOKEN).
+"""
+import argparse
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from transcribe_meeting import alignment, audio_utils, config, core, diarizer, transcriber
+from transcribe_meeting import turn_transcription
+
+
+def _speaker_at(entries: List[Dict[str, Any]], moment: float) -> Optional[str]:
+    """Speaker of the entry covering a moment, if any."""
+    for entry in entries:
+        if entry["start"] <= moment <= entry["end"]:
+            return entry["speaker"]
+    return None
+
+
+def agreement(reference: List[Dict[str, Any]], entries: List[Dict[str, Any]]) -> float:
+    """Share of reference words whose midpoint lies in an entry of the same speaker."""
+    if not reference:
+        return float("nan")
+    same = sum(
+        1 for word in reference
+        if _speaker_at(entries, (word["start"] + word["end"]) / 2) == word["speaker"]
+    )
+    return same / len(reference)
+
+
+def timed(run: Callable[[], List[Dict[str, Any]]]) -> Tuple[List[Dict[str, Any]], float]:
+    """Run a variant and return its output with the elapsed seconds."""
+    start = time.perf_counter()
+    output = run()
+    return output, time.perf_counter() - start
+
+
+def run(source: str, minutes: float, clip_max_s: float) -> None:
+    """Run the benchmark on the first minutes of a recording and print the table."""
+    waveform = audio_utils.decode_audio(source)
+    if waveform is None:
+        raise RuntimeError(f"Decoding {source} failed")
+    waveform = waveform[:int(minutes * 60 * audio_utils.SAMPLE_RATE)]
+
+    start = time.perf_counter()
+    pipeline = diarizer.load_diarization_pipeline(
+        config.DIARIZATION_PIPELINE_NAME, config.HUGGINGFACE_AUTH_TOKEN
+    )
+    if pipeline is None:
+        raise RuntimeError("Failed to load the diarization pipeline")
+    turns = diarizer.extract_speaker_turns(diarizer.run_diarization(pipeline, waveform))
+    print(f"diarization: {len(turns)} turns in {time.perf_counter() - start:.1f} s")
+
+    with transcriber.ModelManager(
+        config.WHISPER_MODEL_SIZE, config.WHISPER_DEVICE, config.WHISPER_COMPUTE_TYPE
+    ) as model:
+        if model is None:
+            raise RuntimeError("Failed to load the Whisper model")
+
+        def align_after() -> List[Dict[str, Any]]:
+            segments = core.transcribe_audio(model, waveform)
+            return alignment.align_words_with_speakers(segments, turns)
+
+        def by_turns(word_timestamps: bool) -> Callable[[], List[Dict[str, Any]]]:
+            def variant() -> List[Dict[str, Any]]:
+                segments = turn_transcription.transcribe_turns(
+                    lambda clips: core.transcribe_audio(model, waveform, None, clips, word_timestamps),
+                    turns,
+                    clip_max_s
+                )
+                return turn_transcription.segments_to_words(segments)
+            return variant
+
+        reference, reference_seconds = timed(align_after)
+        variants = {
+            "turns (words)": timed(by_turns(True)),
+            "turns (segments)": timed(by_turns(False)),
+        }
+
+    print(f"{'variant':>18} {'seconds':>8} {'speedup':>8} {'entries':>8} {'words':>7} {'agreement':>10}")
+    print(f"{'align-after':>18} {reference_seconds:>8.1f} {1.0:>7.2f}x {len(reference):>8} "
+          f"{len(reference):>7} {1.0:>10.1%}")
+    for name, (entries, seconds) in variants.items():
+        words = sum(len(entry["text"].split()) for entry in entries)
+        print(f"{name:>18} {seconds:>8.1f} {reference_seconds / seconds:>7.2f}x {len(entries):>8} "
+              f"{words:>7} {agreement(reference, entries):>10.1%}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--input", required=True, help="Recording to benchmark")
+    parser.add_argument("--minutes", type=float, default=10, help="Length of audio to use")
+    parser.add_argument("--clip-max-s", type=float, default=config.TURN_CLIP_MAX_S,
+                        help="Longest single-speaker clip")
+    args = parser.parse_args()
+    run(args.input, args.minutes, args.clip_max_s)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
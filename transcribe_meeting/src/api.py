@@ -5,16 +5,24 @@ This module provides asynchronous REST API endpoints for transcription services.
 """
 
 import uuid
+import asyncio
+import hashlib
+import logging
 import tempfile
-import shutil
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import AsyncIterator, Dict, Any, Optional
 
-from fastapi import FastAPI, File, UploadFile, BackgroundTasks, HTTPException
+from fastapi import FastAPI, File, Form, UploadFile, HTTPException, Request
 from fastapi.responses import FileResponse
 from pydantic import BaseModel
 
-from .core import process_video, cleanup_job_files
+from .core import process_video, cleanup_job_files, cancel_job, recluster_transcript, RESULT_FILENAME
+from .artifact_cache import copy_with_hash
+from .job_queue import JobScheduler
+from . import audio_utils
+from . import diarizer
+from . import inference_service
+from . import config
 
 
 app = FastAPI(
@@ -30,51 +38,234 @@ TEMP_DIR.mkdir(exist_ok=True)
 # Storage for background job status
 jobs: Dict[str, Dict[str, Any]] = {}
 
+# Shortest-expected-job-first queue for the background jobs
+scheduler = JobScheduler()
+
+# Bytes of a streamed upload buffered to decide whether it can be piped
+STREAM_SNIFF_BYTES = 4 * 1024 * 1024
+
 
 class TranscriptionJob(BaseModel):
     """Model for transcription job information."""
     job_id: str
-    status: str  # "queued", "processing", "completed", "failed"
+    status: str  # "queued", "processing", "completed", "failed", "cancelled"
     message: Optional[str] = None
     output_file: Optional[str] = None
+    duration_seconds: Optional[float] = None
+    queue_position: Optional[int] = None
+    expected_start_time: Optional[float] = None  # UNIX timestamp
+    speech_removed_fraction: Optional[float] = None  # Share of the audio cut by speech trimming
+    extraction_progress: Optional[float] = None  # Percent of the audio extracted
+    extraction_speed: Optional[float] = None  # ffmpeg speed, audio seconds per wall second
+    speakers: Optional[Dict[str, Dict[str, Any]]] = None  # Registered name and confidence per speaker label
 
 
 @app.post("/transcribe", response_model=TranscriptionJob)
 async def transcribe_video(
-    background_tasks: BackgroundTasks,
-    file: UploadFile = File(...)
+    file: UploadFile = File(...),
+    num_speakers: Optional[int] = Form(None),
+    min_speakers: Optional[int] = Form(None),
+    max_speakers: Optional[int] = Form(None),
+    with_embeddings: bool = Form(False)
 ) -> TranscriptionJob:
-    """Upload a video file and start a transcription job.
+    """Upload a video file and queue a transcription job.
+    
+    The recording duration is probed with ffprobe so the job can be
+    scheduled shortest-expected-job-first.
     
     Args:
-        background_tasks: FastAPI background tasks handler
         file: The uploaded video file
+        num_speakers: Exact number of speakers, e.g. from the calendar invite
+        min_speakers: Lower bound on the number of speakers
+        max_speakers: Upper bound on the number of speakers
+        with_embeddings: Include speaker embeddings in the job result
         
     Returns:
         TranscriptionJob: Job status information
     """
+    speaker_hints = _speaker_hints(num_speakers, min_speakers, max_speakers)
+    
     # Generate a unique job ID
     job_id = str(uuid.uuid4())
     job_dir = TEMP_DIR / job_id
     job_dir.mkdir(exist_ok=True)
     
-    # Save uploaded file
+    # Save uploaded file, hashing it for the artifact cache
     video_path = job_dir / file.filename
-    with open(video_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+    upload_hash = copy_with_hash(file.file, video_path)
+    duration = await asyncio.to_thread(audio_utils.probe_duration, str(video_path))
     
     # Create job record
     jobs[job_id] = {
         "job_id": job_id,
         "status": "queued",
         "message": "Job queued for processing",
-        "output_file": None
+        "output_file": None,
+        "duration_seconds": duration
+    }
+    
+    return _queue_job(job_id, video_path, upload_hash, duration, speaker_hints, with_embeddings)
+
+
+@app.post("/transcribe/stream", response_model=TranscriptionJob)
+async def transcribe_stream(
+    request: Request,
+    filename: str = "upload",
+    num_speakers: Optional[int] = None,
+    min_speakers: Optional[int] = None,
+    max_speakers: Optional[int] = None,
+    with_embeddings: bool = False
+) -> TranscriptionJob:
+    """Queue a transcription job from a raw streamed request body.
+    
+    The body is piped straight into ffmpeg while it arrives, and only the
+    16 kHz intermediate audio is kept; the video never touches the disk.
+    MP4/MOV files with their index at the end cannot be decoded from a
+    pipe, so those are saved to the job directory and processed like a
+    regular upload.
+    
+    Args:
+        request: The request whose body is the media file
+        filename: Original file name of the upload
+        num_speakers: Exact number of speakers, if known
+        min_speakers: Lower bound on the number of speakers
+        max_speakers: Upper bound on the number of speakers
+        with_embeddings: Include speaker embeddings in the job result
+        
+    Returns:
+        TranscriptionJob: Job status information
+    """
+    speaker_hints = _speaker_hints(num_speakers, min_speakers, max_speakers)
+    job_id = str(uuid.uuid4())
+    job_dir = TEMP_DIR / job_id
+    job_dir.mkdir(exist_ok=True)
+    
+    chunks = request.stream()
+    head = b""
+    needs_seeking = None
+    async for chunk in chunks:
+        head += chunk
+        needs_seeking = audio_utils.mp4_needs_seeking(head)
+        if needs_seeking is not None or len(head) >= STREAM_SNIFF_BYTES:
+            break
+    
+    try:
+        if needs_seeking is False:
+            media_path = job_dir / f"upload_audio.{config.INTERMEDIATE_AUDIO_FORMAT}"
+            upload_hash = await _pipe_to_ffmpeg(head, chunks, media_path)
+        else:
+            logging.info(f"Upload {filename} needs seeking, saving it before extraction.")
+            media_path = job_dir / Path(filename).name
+            upload_hash = await _save_stream(head, chunks, media_path)
+    except Exception as e:
+        cleanup_job_files(job_id)
+        raise HTTPException(status_code=400, detail=f"Could not read upload: {e}")
+    
+    duration = await asyncio.to_thread(audio_utils.probe_duration, str(media_path))
+    jobs[job_id] = {
+        "job_id": job_id,
+        "status": "queued",
+        "message": "Job queued for processing",
+        "output_file": None,
+        "duration_seconds": duration
     }
+    return _queue_job(job_id, media_path, upload_hash, duration, speaker_hints, with_embeddings)
+
+
+def _speaker_hints(
+    num_speakers: Optional[int],
+    min_speakers: Optional[int],
+    max_speakers: Optional[int]
+) -> Dict[str, int]:
+    """Validate the speaker-count hints of a request, rejecting bad ones with HTTP 400."""
+    try:
+        return diarizer.speaker_hints(num_speakers, min_speakers, max_speakers)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+async def _body_chunks(head: bytes, chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """Yield the sniffed head of a request body followed by the rest of it."""
+    if head:
+        yield head
+    async for chunk in chunks:
+        if chunk:
+            yield chunk
+
+
+async def _pipe_to_ffmpeg(head: bytes, chunks: AsyncIterator[bytes], audio_path: Path) -> str:
+    """Feed a request body to ffmpeg's stdin, writing only the audio.
     
-    # Process in background
-    background_tasks.add_task(process_video, job_id, video_path, jobs)
+    Returns:
+        SHA-256 hex digest of the body, like copy_with_hash()
     
-    return TranscriptionJob(**jobs[job_id])
+    Raises:
+        RuntimeError: If ffmpeg cannot decode the stream
+    """
+    process = await asyncio.create_subprocess_exec(
+        *audio_utils.pipe_extraction_command(str(audio_path)),
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.DEVNULL,
+        stderr=asyncio.subprocess.PIPE
+    )
+    # Drain stderr concurrently so ffmpeg never blocks on it
+    stderr_task = asyncio.create_task(process.stderr.read())
+    digest = hashlib.sha256()
+    try:
+        try:
+            async for chunk in _body_chunks(head, chunks):
+                digest.update(chunk)
+                process.stdin.write(chunk)
+                await process.stdin.drain()
+            process.stdin.close()
+        except (BrokenPipeError, ConnectionResetError):
+            # ffmpeg exited early; its exit status explains why
+            pass
+        returncode = await process.wait()
+    except BaseException:
+        if process.returncode is None:
+            process.kill()
+            await process.wait()
+        raise
+    stderr = await stderr_task
+    if returncode != 0:
+        raise RuntimeError(f"ffmpeg failed to decode the stream: {stderr.decode(errors='replace').strip()}")
+    return digest.hexdigest()
+
+
+async def _save_stream(head: bytes, chunks: AsyncIterator[bytes], destination: Path) -> str:
+    """Write a request body to disk while hashing it, like copy_with_hash()."""
+    digest = hashlib.sha256()
+    with open(destination, "wb") as buffer:
+        async for chunk in _body_chunks(head, chunks):
+            digest.update(chunk)
+            buffer.write(chunk)
+    return digest.hexdigest()
+
+
+def _queue_job(
+    job_id: str,
+    media_path: Path,
+    upload_hash: str,
+    duration: Optional[float],
+    speaker_hints: Optional[Dict[str, int]] = None,
+    with_embeddings: bool = False
+) -> TranscriptionJob:
+    """Submit a job whose record has been created and return its status."""
+    async def run() -> bool:
+        return await process_video(job_id, media_path, jobs, upload_hash, speaker_hints, with_embeddings)
+
+    scheduler.submit(job_id, duration, run)
+    return _job_response(job_id)
+
+
+def _job_response(job_id: str) -> TranscriptionJob:
+    """Build the API model for a job, including its queue position if queued."""
+    job = dict(jobs[job_id])
+    queue_info = scheduler.queue_info(job_id)
+    if queue_info is not None:
+        job.update(queue_info)
+    return TranscriptionJob(**job)
 
 
 @app.get("/jobs/{job_id}", response_model=TranscriptionJob)
@@ -93,7 +284,7 @@ async def get_job_status(job_id: str) -> TranscriptionJob:
     if job_id not in jobs:
         raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
     
-    return TranscriptionJob(**jobs[job_id])
+    return _job_response(job_id)
 
 
 @app.get("/jobs/{job_id}/download")
@@ -133,10 +324,119 @@ async def download_transcript(job_id: str):
     )
 
 
+@app.get("/jobs/{job_id}/result")
+async def get_job_result(job_id: str):
+    """Get the speaker turns and aligned words of a completed job as JSON.
+    
+    The document also holds the speaker embeddings if the job was
+    submitted with ``with_embeddings``; a sharding coordinator uses them to
+    match speakers across shards.
+    
+    Args:
+        job_id: The job identifier
+        
+    Returns:
+        FileResponse: The result document
+        
+    Raises:
+        HTTPException: If the job is not found, not completed, or has no
+            result document
+    """
+    if job_id not in jobs:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    if jobs[job_id]["status"] != "completed":
+        raise HTTPException(status_code=400, detail=f"Job {job_id} is not completed")
+    
+    result_file = TEMP_DIR / job_id / RESULT_FILENAME
+    if not result_file.exists():
+        raise HTTPException(status_code=404, detail=f"Result for job {job_id} not found")
+    
+    return FileResponse(path=result_file, media_type="application/json")
+
+
+@app.post("/jobs/{job_id}/recluster", response_model=TranscriptionJob)
+async def recluster_job(
+    job_id: str,
+    num_speakers: Optional[int] = None,
+    min_speakers: Optional[int] = None,
+    max_speakers: Optional[int] = None,
+    threshold: Optional[float] = None
+) -> TranscriptionJob:
+    """Re-cluster the speakers of a completed job and render its transcript again.
+    
+    Only the clustering step of the diarization runs again, on the
+    segmentation and embeddings kept in the job directory, so this takes
+    seconds instead of a full diarization.
+    
+    Args:
+        job_id: The job identifier
+        num_speakers: Exact number of speakers
+        min_speakers: Lower bound on the number of speakers
+        max_speakers: Upper bound on the number of speakers
+        threshold: Clustering threshold replacing the pipeline's own
+        
+    Returns:
+        TranscriptionJob: Job status information
+        
+    Raises:
+        HTTPException: If the job is not found, not completed, or kept no
+            diarization state
+    """
+    if job_id not in jobs:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    if jobs[job_id]["status"] != "completed":
+        raise HTTPException(status_code=400, detail=f"Job {job_id} is not completed")
+    speaker_hints = _speaker_hints(num_speakers, min_speakers, max_speakers)
+    
+    job_dir = TEMP_DIR / job_id
+    output_path = job_dir / "transcript.txt"
+    try:
+        await asyncio.to_thread(recluster_transcript, job_dir, output_path, speaker_hints, threshold)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    
+    if job_id not in jobs:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} was deleted")
+    jobs[job_id].update(message="Speakers re-clustered", output_file=str(output_path), speakers=None)
+    return _job_response(job_id)
+
+
+@app.post("/jobs/{job_id}/cancel", response_model=TranscriptionJob)
+async def cancel_transcription_job(job_id: str) -> TranscriptionJob:
+    """Cancel a queued or running job, keeping its record.
+    
+    A queued job is removed from the queue. A running job has its ffmpeg
+    process killed and its inference stopped at the next chunk boundary;
+    its status becomes "cancelled" once it has released its resources.
+    
+    Args:
+        job_id: The job identifier
+        
+    Returns:
+        TranscriptionJob: Job status information
+        
+    Raises:
+        HTTPException: If the job is not found
+    """
+    if job_id not in jobs:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    
+    if scheduler.remove(job_id):
+        jobs[job_id]["status"] = "cancelled"
+        jobs[job_id]["message"] = "Job cancelled by user"
+    elif cancel_job(job_id):
+        jobs[job_id]["message"] = "Cancellation requested"
+    
+    return _job_response(job_id)
+
+
 @app.delete("/jobs/{job_id}")
 async def delete_job(job_id: str) -> Dict[str, str]:
     """Delete a job and its associated files.
     
+    A running job is cancelled first; its files are removed by the job
+    itself once it has stopped writing to them.
+    
     Args:
         job_id: The job identifier
         
@@ -149,15 +449,33 @@ async def delete_job(job_id: str) -> Dict[str, str]:
     if job_id not in jobs:
         raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
     
-    # Clean up files
-    cleanup_job_files(job_id)
+    # Drop the job from the queue if it has not started yet
+    scheduler.remove(job_id)
     
     # Remove job from dictionary
     del jobs[job_id]
     
+    # Stop a running job; it cleans up its own files when it exits
+    if not cancel_job(job_id, "Job deleted"):
+        cleanup_job_files(job_id)
+    
     return {"message": f"Job {job_id} deleted successfully"}
 
 
+@app.get("/metrics")
+async def get_metrics() -> Dict[str, Any]:
+    """Get throughput and utilization metrics for capacity planning.
+    
+    Returns:
+        Dict with audio extraction throughput and the shared inference
+        service statistics (None if the service has not been used)
+    """
+    return {
+        "extraction": audio_utils.get_extraction_stats(),
+        "inference": inference_service.get_inference_stats(),
+    }
+
+
 @app.get("/health")
 async def health_check() -> Dict[str, str]:
     """Check API health status.
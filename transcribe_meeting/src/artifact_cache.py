@@ -0,0 +1,251 @@
+# artifact_cache.py
+"""Content-addressed cache for intermediate job artifacts.
+
+Entries are keyed on the SHA-256 of the uploaded file plus a fingerprint of
+the settings that influence the artifact (model size, compute type, pipeline
+name, ...), so re-submitting the same recording or re-rendering it with a
+different output format reuses the extracted audio, the speaker turns and the
+transcription segments. The cache is bounded in size and evicts the least
+recently used entries first.
+"""
+import os
+import json
+import shutil
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Optional, Union
+
+from . import config
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def hash_file(path: Union[str, Path]) -> str:
+    """Compute the SHA-256 hex digest of a file.
+
+    Args:
+        path: Path to the file
+
+    Returns:
+        Hex digest of the file contents
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def copy_with_hash(source: BinaryIO, destination: Union[str, Path]) -> str:
+    """Copy a file object to disk while computing its SHA-256 digest.
+
+    Args:
+        source: Readable binary file object (e.g. an upload)
+        destination: Path to write the copy to
+
+    Returns:
+        Hex digest of the copied contents
+    """
+    digest = hashlib.sha256()
+    with open(destination, "wb") as buffer:
+        for chunk in iter(lambda: source.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+            buffer.write(chunk)
+    return digest.hexdigest()
+
+
+def fingerprint_settings(settings: Dict[str, Any]) -> str:
+    """Hash the settings that influence an artifact.
+
+    Args:
+        settings: JSON-serializable settings dictionary
+
+    Returns:
+        Hex digest identifying the settings
+    """
+    encoded = json.dumps(settings, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class ArtifactCache:
+    """Size-bounded, least-recently-used cache of job artifacts on disk."""
+
+    def __init__(self, root: Union[str, Path], max_bytes: int):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _entry_path(
+        self,
+        content_hash: str,
+        artifact: str,
+        settings: Dict[str, Any],
+        suffix: str
+    ) -> Path:
+        """Return the on-disk location of an entry."""
+        key = hashlib.sha256(
+            f"{content_hash}:{artifact}:{fingerprint_settings(settings)}".encode("utf-8")
+        ).hexdigest()
+        return self.root / key[:2] / f"{key}{suffix}"
+
+    def _hit(self, path: Path) -> Optional[Path]:
+        """Mark an entry as recently used and return it if it exists."""
+        try:
+            os.utime(path)
+            return path
+        except OSError:
+            return None
+
+    def _store(self, path: Path, write: Any) -> Optional[Path]:
+        """Atomically write an entry and enforce the size bound."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+        try:
+            write(tmp_path)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logging.warning(f"Could not store cache entry {path.name}: {e}")
+            tmp_path.unlink(missing_ok=True)
+            return None
+        self.evict()
+        return path
+
+    def get_file(
+        self,
+        content_hash: str,
+        artifact: str,
+        settings: Dict[str, Any],
+        suffix: str = ""
+    ) -> Optional[Path]:
+        """Look up a cached file artifact.
+
+        Args:
+            content_hash: SHA-256 of the uploaded recording
+            artifact: Artifact name, e.g. "audio"
+            settings: Settings that influence the artifact
+            suffix: File suffix of the artifact, e.g. ".wav"
+
+        Returns:
+            Path to the cached file, or None on a miss
+        """
+        return self._hit(self._entry_path(content_hash, artifact, settings, suffix))
+
+    def put_file(
+        self,
+        content_hash: str,
+        artifact: str,
+        settings: Dict[str, Any],
+        source_path: Union[str, Path],
+        suffix: str = ""
+    ) -> Optional[Path]:
+        """Copy a file artifact into the cache.
+
+        Returns:
+            Path to the cached copy, or None if it could not be stored
+        """
+        path = self._entry_path(content_hash, artifact, settings, suffix)
+        return self._store(path, lambda tmp: shutil.copyfile(source_path, tmp))
+
+    def get_json(
+        self,
+        content_hash: str,
+        artifact: str,
+        settings: Dict[str, Any]
+    ) -> Optional[Any]:
+        """Look up a cached JSON artifact.
+
+        Returns:
+            The decoded value, or None on a miss
+        """
+        path = self._hit(self._entry_path(content_hash, artifact, settings, ".json"))
+        if path is None:
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception as e:
+            logging.warning(f"Discarding unreadable cache entry {path.name}: {e}")
+            path.unlink(missing_ok=True)
+            return None
+
+    def put_json(
+        self,
+        content_hash: str,
+        artifact: str,
+        settings: Dict[str, Any],
+        value: Any
+    ) -> Optional[Path]:
+        """Store a JSON-serializable artifact in the cache.
+
+        Returns:
+            Path to the cached entry, or None if it could not be stored
+        """
+        def write(tmp: Path) -> None:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(value, f)
+
+        path = self._entry_path(content_hash, artifact, settings, ".json")
+        return self._store(path, write)
+
+    def size_bytes(self) -> int:
+        """Total size of all cache entries in bytes."""
+        return sum(path.stat().st_size for path in self.root.glob("*/*") if path.is_file())
+
+    def evict(self) -> int:
+        """Evict least recently used entries until the cache fits its bound.
+
+        Returns:
+            Number of bytes removed
+        """
+        with self._lock:
+            entries = []
+            for path in self.root.glob("*/*"):
+                if path.suffix == ".tmp":
+                    continue
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+            total = sum(size for _, size, _ in entries)
+            removed = 0
+            for _, size, path in sorted(entries, key=lambda entry: entry[0]):
+                if total - removed <= self.max_bytes:
+                    break
+                try:
+                    path.unlink()
+                    removed += size
+                except OSError as e:
+                    logging.warning(f"Could not evict cache entry {path}: {e}")
+
+        if removed:
+            logging.info(f"Evicted {removed / (1024 * 1024):.1f}MB from the artifact cache.")
+        return removed
+
+
+_default_cache: Optional[ArtifactCache] = None
+
+
+def get_artifact_cache() -> Optional[ArtifactCache]:
+    """Get the process-wide artifact cache.
+
+    Returns:
+        The configured cache, or None if caching is disabled
+    """
+    global _default_cache
+    if not config.ARTIFACT_CACHE_ENABLED:
+        return None
+    if _default_cache is None:
+        try:
+            _default_cache = ArtifactCache(
+                config.ARTIFACT_CACHE_DIR,
+                config.ARTIFACT_CACHE_MAX_MB * 1024 * 1024
+            )
+        except Exception as e:
+            logging.error(f"Could not initialize artifact cache: {e}")
+            return None
+    return _default_cache
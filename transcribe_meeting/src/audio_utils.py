@@ -2,41 +2,818 @@
 """Audio extraction and processing utilities."""
 import subprocess
 import os
+import json
+import time
+import shutil
+import wave
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
 
+import numpy as np
 
-def extract_audio(video_path: str, audio_output_path: str) -> bool:
+from .cancellation import CancellationToken
+
+SAMPLE_RATE = 16000
+PCM_CHUNK_SECONDS = 10
+
+# Weight of the newest observation in the extraction speed moving average
+SPEED_SMOOTHING = 0.3
+# Audio seconds extracted per wall-clock second, refined as files are extracted
+_extraction_speed: Optional[float] = None
+# Running extraction totals, reported for capacity planning
+_extraction_totals = {"files": 0, "audio_seconds": 0.0, "wall_seconds": 0.0}
+_extraction_stats_lock = threading.Lock()
+
+# Called with (fraction done or None, speed multiplier or None) while extracting
+ProgressCallback = Callable[[Optional[float], Optional[float]], None]
+
+# Codec of the intermediate audio, by container (file suffix); both are lossless
+INTERMEDIATE_CODECS = {"wav": "pcm_s16le", "flac": "flac"}
+
+# Audio handed to the pipeline stages: a file path or a decoded waveform
+AudioInput = Union[str, os.PathLike, np.ndarray]
+
+
+def describe_audio(audio: AudioInput) -> str:
+    """Short description of an audio input for log messages."""
+    if isinstance(audio, np.ndarray):
+        return f"in-memory waveform ({audio.shape[-1] / SAMPLE_RATE:.1f}s)"
+    return os.path.basename(str(audio))
+
+
+def parse_progress_speed(value: Optional[str]) -> Optional[float]:
+    """Parse an ffmpeg progress ``speed`` value such as ``"12.3x"``."""
+    if not value:
+        return None
+    try:
+        return float(value.strip().rstrip("x"))
+    except ValueError:
+        # "N/A" until ffmpeg has processed enough to estimate it
+        return None
+
+
+def parse_progress_time(block: Dict[str, str]) -> Optional[float]:
+    """Get the processed media time in seconds from an ffmpeg progress block."""
+    # out_time_ms is in microseconds as well, despite its name
+    for key in ("out_time_us", "out_time_ms"):
+        value = block.get(key)
+        if value and value != "N/A":
+            try:
+                return max(0.0, int(value) / 1_000_000)
+            except ValueError:
+                continue
+    return None
+
+
+def _read_progress(stream: Any, on_progress: Callable[[Dict[str, str]], None]) -> None:
+    """Read ``-progress`` key=value lines and report each completed block."""
+    block: Dict[str, str] = {}
+    for line in stream:
+        key, sep, value = line.strip().partition("=")
+        if not sep:
+            continue
+        block[key] = value
+        # Every block ends with progress=continue, or progress=end
+        if key == "progress":
+            on_progress(block)
+            block = {}
+
+
+def run_ffmpeg(
+    command: List[str],
+    cancel_token: Optional[CancellationToken] = None,
+    on_progress: Optional[Callable[[Dict[str, str]], None]] = None
+) -> subprocess.CompletedProcess:
+    """Run an ffmpeg/ffprobe command that can be killed through a token.
+    
+    Args:
+        command: Command line to run
+        cancel_token: Optional token; cancelling it kills the process
+        on_progress: Optional callback for ffmpeg commands; ``-progress
+            pipe:1`` is added and each parsed progress block (out_time_us,
+            speed, ...) is passed to it while ffmpeg runs
+        
+    Returns:
+        The completed process
+        
+    Raises:
+        FileNotFoundError: If the executable is not installed
+        subprocess.CalledProcessError: If the command fails or is killed
+    """
+    if on_progress is not None:
+        command = [command[0], "-progress", "pipe:1", "-nostats"] + command[1:]
+    process = subprocess.Popen(
+        command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
+    )
+    if cancel_token is not None:
+        cancel_token.register_process(process)
+    try:
+        if on_progress is None:
+            stdout, stderr = process.communicate()
+        else:
+            # Drain stderr in the background while progress is read from stdout
+            stderr_chunks: List[str] = []
+            stderr_reader = threading.Thread(
+                target=lambda: stderr_chunks.append(process.stderr.read()), daemon=True
+            )
+            stderr_reader.start()
+            _read_progress(process.stdout, on_progress)
+            process.wait()
+            stderr_reader.join()
+            stdout, stderr = "", "".join(stderr_chunks)
+    except BaseException:
+        # E.g. a failing progress callback: do not leave ffmpeg and its pipes behind
+        process.kill()
+        process.wait()
+        raise
+    finally:
+        if cancel_token is not None:
+            cancel_token.unregister_process(process)
+    if process.returncode != 0:
+        raise subprocess.CalledProcessError(process.returncode, command, stdout, stderr)
+    return subprocess.CompletedProcess(command, process.returncode, stdout, stderr)
+
+
+def probe_audio_stream(media_path: str) -> Optional[Dict[str, Any]]:
+    """Probe the container and first audio stream of a media file with ffprobe.
+    
+    Args:
+        media_path: Path to the media file
+        
+    Returns:
+        Dict with "format_name", "duration", "codec_name", "sample_rate"
+        and "channels" ("codec_name" is None if there is no audio stream),
+        or None if the file could not be probed
+    """
+    ffprobe_command = [
+        "ffprobe",
+        "-v", "error",
+        "-select_streams", "a:0",
+        "-show_entries", "format=format_name,duration:stream=codec_name,sample_rate,channels",
+        "-of", "json",
+        str(media_path)
+    ]
+    try:
+        result = subprocess.run(ffprobe_command, check=True, capture_output=True, text=True)
+        probe = json.loads(result.stdout)
+    except FileNotFoundError:
+        logging.error("Error: ffprobe command not found. Make sure ffmpeg is installed and in your system's PATH.")
+        return None
+    except (subprocess.CalledProcessError, ValueError) as e:
+        logging.warning(f"Could not probe {os.path.basename(str(media_path))}: {e}")
+        return None
+
+    container = probe.get("format", {})
+    streams = probe.get("streams") or [{}]
+    stream = streams[0]
+    duration = container.get("duration")
+    return {
+        "format_name": container.get("format_name", ""),
+        "duration": float(duration) if duration else None,
+        "codec_name": stream.get("codec_name"),
+        "sample_rate": int(stream["sample_rate"]) if stream.get("sample_rate") else None,
+        "channels": stream.get("channels"),
+    }
+
+
+def intermediate_format(audio_path: str) -> str:
+    """Container of an intermediate audio file, derived from its suffix ("wav" or "flac")."""
+    suffix = os.path.splitext(str(audio_path))[1].lstrip(".").lower()
+    return suffix if suffix in INTERMEDIATE_CODECS else "wav"
+
+
+def is_pipeline_ready(stream_info: Dict[str, Any], audio_format: str = "wav") -> bool:
+    """Whether a probed file already is the 16 kHz mono intermediate audio the stages use."""
+    return (
+        stream_info.get("format_name") == audio_format
+        and stream_info.get("codec_name") == INTERMEDIATE_CODECS[audio_format]
+        and stream_info.get("sample_rate") == SAMPLE_RATE
+        and stream_info.get("channels") == 1
+    )
+
+
+def _record_extraction_speed(audio_seconds: Optional[float], elapsed: float) -> None:
+    """Refine the extraction speed estimate from a finished extraction."""
+    global _extraction_speed
+    if not audio_seconds or elapsed <= 0:
+        return
+    observed = audio_seconds / elapsed
+    with _extraction_stats_lock:
+        if _extraction_speed is None:
+            _extraction_speed = observed
+        else:
+            _extraction_speed = (1 - SPEED_SMOOTHING) * _extraction_speed + SPEED_SMOOTHING * observed
+        _extraction_totals["files"] += 1
+        _extraction_totals["audio_seconds"] += audio_seconds
+        _extraction_totals["wall_seconds"] += elapsed
+
+
+def get_extraction_stats() -> Dict[str, Any]:
+    """Extraction throughput figures for capacity planning.
+    
+    Returns:
+        Dict with the number of files extracted, audio and wall seconds,
+        the overall speed multiplier and the recent (smoothed) one
+    """
+    with _extraction_stats_lock:
+        stats: Dict[str, Any] = dict(_extraction_totals)
+        stats["recent_speed"] = _extraction_speed
+    stats["mean_speed"] = (
+        stats["audio_seconds"] / stats["wall_seconds"] if stats["wall_seconds"] else None
+    )
+    return stats
+
+
+def _progress_reporter(
+    duration: Optional[float],
+    on_progress: ProgressCallback
+) -> Callable[[Dict[str, str]], None]:
+    """Turn raw ffmpeg progress blocks into (fraction, speed) reports."""
+    def report(block: Dict[str, str]) -> None:
+        out_time = parse_progress_time(block)
+        if block.get("progress") == "end":
+            fraction = 1.0
+        elif out_time is not None and duration:
+            fraction = min(out_time / duration, 1.0)
+        else:
+            fraction = None
+        on_progress(fraction, parse_progress_speed(block.get("speed")))
+    return report
+
+
+def _link_or_copy(source_path: str, destination_path: str) -> None:
+    """Make a file available under a new path without re-encoding it."""
+    if os.path.exists(destination_path):
+        os.remove(destination_path)
+    try:
+        os.link(source_path, destination_path)
+    except OSError:
+        shutil.copyfile(source_path, destination_path)
+
+
+def extract_audio(
+    video_path: str,
+    audio_output_path: str,
+    cancel_token: Optional[CancellationToken] = None,
+    on_progress: Optional[ProgressCallback] = None
+) -> bool:
     """Extract audio from video using ffmpeg.
     
+    The output is PCM WAV or, for a ``.flac`` output path, lossless FLAC.
+    The input is probed first. A file that already is 16 kHz mono audio
+    in the output format is linked (or copied) without running ffmpeg;
+    otherwise only the first audio stream is decoded and video packets are
+    dropped without being decoded.
+    
     Args:
         video_path: Path to input video file
         audio_output_path: Path to output audio file
+        cancel_token: Optional token; cancelling it kills ffmpeg
+        on_progress: Optional callback receiving the fraction done and
+            ffmpeg's speed multiplier as extraction proceeds
         
     Returns:
         bool: True if extraction succeeded, False otherwise
     """
-    logging.info(f"Extracting audio from {os.path.basename(video_path)}...")
+    return _extract_probed(
+        video_path, audio_output_path, probe_audio_stream(video_path), cancel_token, on_progress
+    )
+
+
+def _extract_probed(
+    video_path: str,
+    audio_output_path: str,
+    stream_info: Optional[Dict[str, Any]],
+    cancel_token: Optional[CancellationToken] = None,
+    on_progress: Optional[ProgressCallback] = None
+) -> bool:
+    """extract_audio() for an input already probed with probe_audio_stream()."""
+    name = os.path.basename(str(video_path))
+    audio_format = intermediate_format(audio_output_path)
+    duration = stream_info["duration"] if stream_info else None
+    expected_speed = _extraction_speed  # Estimate before this file refines it
+    start = time.time()
+    if stream_info is not None and stream_info["codec_name"] is None:
+        logging.error(f"Error: {name} has no audio stream.")
+        return False
+    if stream_info is not None and is_pipeline_ready(stream_info, audio_format):
+        try:
+            _link_or_copy(str(video_path), str(audio_output_path))
+        except OSError as e:
+            logging.error(f"Error reusing {name} as extracted audio: {e}")
+            return False
+        logging.info(f"{name} is already 16 kHz mono {audio_format.upper()}, skipping extraction.")
+    elif not _run_extraction(video_path, audio_output_path, audio_format, duration, cancel_token, on_progress):
+        return False
+    _log_time_saved(name, duration, time.time() - start, expected_speed)
+    return True
+
+
+def _log_time_saved(
+    name: str,
+    duration: Optional[float],
+    elapsed: float,
+    expected_speed: Optional[float]
+) -> None:
+    """Log the extraction time saved on a file against the running speed estimate."""
+    if not duration or not expected_speed:
+        logging.info(f"Audio of {name} ready in {elapsed:.2f} seconds (no extraction estimate yet).")
+        return
+    saved = duration / expected_speed - elapsed
+    logging.info(f"Audio of {name} ready in {elapsed:.2f} seconds, saved ~{saved:.1f}s of extraction.")
+
+
+def _run_extraction(
+    video_path: str,
+    audio_output_path: str,
+    audio_format: str,
+    duration: Optional[float],
+    cancel_token: Optional[CancellationToken] = None,
+    on_progress: Optional[ProgressCallback] = None
+) -> bool:
+    """Decode the first audio stream of a file into the intermediate audio with ffmpeg."""
+    logging.info(f"Extracting audio from {os.path.basename(str(video_path))}...")
     ffmpeg_command = [
         "ffmpeg",
-        "-i", video_path,
-        "-vn",  # No video
-        "-acodec", "pcm_s16le",  # Audio Codec WAV
-        "-ar", "16000",  # Sample rate
+        "-nostdin",
+        "-i", str(video_path),
+        "-map", "0:a:0",  # First audio stream only, video is never decoded
+        "-acodec", INTERMEDIATE_CODECS[audio_format],  # Lossless PCM WAV or FLAC
+        "-ac", "1",  # Mono
+        "-ar", str(SAMPLE_RATE),  # Sample rate
         "-y",  # Overwrite output file if it exists
-        audio_output_path
+        str(audio_output_path)
     ]
     
     try:
-        subprocess.run(ffmpeg_command, check=True, capture_output=True, text=True)
-        logging.info("FFmpeg audio extraction successful.")
+        start = time.time()
+        run_ffmpeg(
+            ffmpeg_command, cancel_token,
+            _progress_reporter(duration, on_progress) if on_progress is not None else None
+        )
+        elapsed = time.time() - start
+        _record_extraction_speed(duration, elapsed)
+        logging.info(f"FFmpeg audio extraction successful in {elapsed:.2f} seconds.")
         return True
     except FileNotFoundError:
         logging.error("Error: ffmpeg command not found. Make sure ffmpeg is installed and in your system's PATH.")
         return False
     except subprocess.CalledProcessError as e:
+        if cancel_token is not None and cancel_token.cancelled:
+            logging.warning(f"FFmpeg audio extraction stopped: {cancel_token.reason}")
+            return False
         logging.error(f"Error during FFmpeg execution: {e}")
         logging.error(f"FFmpeg stderr:\n{e.stderr}")
         return False
     except Exception as e:
         logging.error(f"An unexpected error occurred during audio extraction: {e}")
-        return False
\ No newline at end of file
+        return False
+
+
+def _range_bounds(total_samples: int, num_ranges: int) -> List[Tuple[int, int]]:
+    """Split a timeline into contiguous sample ranges of near-equal length."""
+    edges = [round(i * total_samples / num_ranges) for i in range(num_ranges + 1)]
+    return [(edges[i], edges[i + 1]) for i in range(num_ranges)]
+
+
+def _extract_range(
+    media_path: str,
+    pcm_path: str,
+    start_sample: int,
+    num_samples: Optional[int],
+    cancel_token: Optional[CancellationToken],
+    on_progress: Optional[Callable[[Dict[str, str]], None]] = None
+) -> None:
+    """Extract one seeked range as raw PCM, trimmed or padded to its exact length.
+    
+    ``num_samples`` is None for the last range, which runs to the end of
+    the stream.
+    """
+    ffmpeg_command = [
+        "ffmpeg",
+        "-nostdin",
+        "-loglevel", "error",
+        "-ss", f"{start_sample / SAMPLE_RATE:.6f}",  # Input seek: only the range is demuxed
+        "-i", str(media_path),
+    ]
+    if num_samples is not None:
+        ffmpeg_command += ["-t", f"{num_samples / SAMPLE_RATE:.6f}"]
+    ffmpeg_command += [
+        "-map", "0:a:0",
+        "-ac", "1",
+        "-ar", str(SAMPLE_RATE),
+        "-f", "s16le",
+        "-y",
+        str(pcm_path)
+    ]
+    run_ffmpeg(ffmpeg_command, cancel_token, on_progress)
+    if num_samples is not None:
+        # Seeking and resampling can be off by a few samples at the edges;
+        # fix the length so the ranges line up sample-exactly when joined.
+        expected_bytes = num_samples * 2
+        with open(pcm_path, "r+b") as f:
+            f.seek(0, os.SEEK_END)
+            actual_bytes = f.tell()
+            if actual_bytes > expected_bytes:
+                f.truncate(expected_bytes)
+            elif actual_bytes < expected_bytes:
+                f.write(b"\x00" * (expected_bytes - actual_bytes))
+
+
+def _join_pcm_ranges(
+    pcm_paths: List[str],
+    audio_output_path: str,
+    cancel_token: Optional[CancellationToken] = None
+) -> None:
+    """Concatenate raw PCM ranges into the intermediate audio file."""
+    audio_format = intermediate_format(audio_output_path)
+    if audio_format == "wav":
+        with wave.open(audio_output_path, "wb") as wav_file:
+            wav_file.setnchannels(1)
+            wav_file.setsampwidth(2)
+            wav_file.setframerate(SAMPLE_RATE)
+            for pcm_path in pcm_paths:
+                with open(pcm_path, "rb") as f:
+                    while True:
+                        data = f.read(PCM_CHUNK_SECONDS * SAMPLE_RATE * 2)
+                        if not data:
+                            break
+                        wav_file.writeframesraw(data)
+        return
+
+    # Other formats are encoded by ffmpeg reading the ranges back to back
+    run_ffmpeg([
+        "ffmpeg",
+        "-nostdin",
+        "-loglevel", "error",
+        "-f", "s16le",
+        "-ar", str(SAMPLE_RATE),
+        "-ac", "1",
+        "-i", "concat:" + "|".join(pcm_paths),
+        "-acodec", INTERMEDIATE_CODECS[audio_format],
+        "-y",
+        audio_output_path
+    ], cancel_token)
+
+
+def extract_audio_parallel(
+    video_path: str,
+    audio_output_path: str,
+    num_ranges: int,
+    cancel_token: Optional[CancellationToken] = None,
+    min_duration: float = 0.0,
+    on_progress: Optional[ProgressCallback] = None
+) -> bool:
+    """Extract audio with several seeked ffmpeg processes running in parallel.
+    
+    The timeline is split into ``num_ranges`` contiguous ranges, each
+    extracted by its own ffmpeg process with ``-ss``/``-t``. Every range
+    is trimmed or padded to its exact sample count, so the concatenated
+    audio has the same timeline as a single-process extraction.
+    
+    Short recordings, recordings of unknown duration and inputs that are
+    already pipeline-ready fall back to extract_audio().
+    
+    Args:
+        video_path: Path to input video file
+        audio_output_path: Path to the output WAV or FLAC file
+        num_ranges: Number of ranges (and ffmpeg processes)
+        cancel_token: Optional token; cancelling it kills every ffmpeg
+        min_duration: Recordings shorter than this many seconds are
+            extracted with a single process
+        on_progress: Optional callback receiving the overall fraction done
+            and the combined speed multiplier of all ranges
+        
+    Returns:
+        bool: True if extraction succeeded, False otherwise
+    """
+    name = os.path.basename(str(video_path))
+    stream_info = probe_audio_stream(video_path)
+    if (
+        num_ranges <= 1
+        or stream_info is None
+        or stream_info["codec_name"] is None
+        or not stream_info["duration"]
+        or stream_info["duration"] < min_duration
+        or is_pipeline_ready(stream_info, intermediate_format(audio_output_path))
+    ):
+        return _extract_probed(video_path, audio_output_path, stream_info, cancel_token, on_progress)
+
+    duration = stream_info["duration"]
+    bounds = _range_bounds(int(duration * SAMPLE_RATE), num_ranges)
+    pcm_paths = [f"{audio_output_path}.part{i}.pcm" for i in range(num_ranges)]
+    logging.info(f"Extracting audio from {name} in {num_ranges} parallel ranges...")
+
+    # Latest processed time and speed of each range
+    range_times = [0.0] * num_ranges
+    range_speeds = [0.0] * num_ranges
+
+    def range_reporter(index: int) -> Optional[Callable[[Dict[str, str]], None]]:
+        if on_progress is None:
+            return None
+
+        def report(block: Dict[str, str]) -> None:
+            out_time = parse_progress_time(block)
+            if out_time is not None:
+                range_times[index] = out_time
+            range_speeds[index] = (
+                0.0 if block.get("progress") == "end" else parse_progress_speed(block.get("speed")) or 0.0
+            )
+            on_progress(min(sum(range_times) / duration, 1.0), sum(range_speeds) or None)
+        return report
+
+    start = time.time()
+    try:
+        with ThreadPoolExecutor(max_workers=num_ranges) as executor:
+            futures = [
+                executor.submit(
+                    _extract_range, video_path, pcm_paths[i], range_start,
+                    None if i == num_ranges - 1 else range_end - range_start, cancel_token,
+                    range_reporter(i)
+                )
+                for i, (range_start, range_end) in enumerate(bounds)
+            ]
+            for future in futures:
+                future.result()
+
+        _join_pcm_ranges(pcm_paths, str(audio_output_path), cancel_token)
+
+        elapsed = time.time() - start
+        _record_extraction_speed(duration, elapsed)
+        logging.info(f"Parallel FFmpeg audio extraction successful in {elapsed:.2f} seconds.")
+        return True
+    except FileNotFoundError:
+        logging.error("Error: ffmpeg command not found. Make sure ffmpeg is installed and in your system's PATH.")
+        return False
+    except subprocess.CalledProcessError as e:
+        if cancel_token is not None and cancel_token.cancelled:
+            logging.warning(f"FFmpeg audio extraction stopped: {cancel_token.reason}")
+            return False
+        logging.error(f"Error during FFmpeg execution: {e}")
+        logging.error(f"FFmpeg stderr:\n{e.stderr}")
+        return False
+    except Exception as e:
+        logging.error(f"An unexpected error occurred during audio extraction: {e}")
+        return False
+    finally:
+        for pcm_path in pcm_paths:
+            if os.path.exists(pcm_path):
+                os.remove(pcm_path)
+
+
+# Top-level box types an ISO base media (MP4/MOV) file can start with
+_ISO_BMFF_BOXES = {b"ftyp", b"moov", b"mdat", b"free", b"skip", b"wide", b"pnot", b"uuid"}
+
+
+def mp4_needs_seeking(head: bytes) -> Optional[bool]:
+    """Tell from the first bytes of a file whether ffmpeg must seek in it.
+    
+    MP4/MOV files whose media data (``mdat``) comes before the index
+    (``moov``) cannot be decoded from a pipe: ffmpeg needs the index
+    first. Other containers (Matroska, WebM, MPEG-TS, WAV, MP3, ...) and
+    MP4s with the index up front stream fine.
+    
+    Args:
+        head: The first bytes of the file
+        
+    Returns:
+        True if the file needs seeking, False if it can be piped, or None
+        if more bytes are needed to decide
+    """
+    if len(head) < 8:
+        return None
+    if head[4:8] not in _ISO_BMFF_BOXES:
+        return False
+
+    offset = 0
+    while len(head) >= offset + 8:
+        size = int.from_bytes(head[offset:offset + 4], "big")
+        box_type = head[offset + 4:offset + 8]
+        if box_type == b"moov":
+            return False
+        if box_type == b"mdat":
+            return True
+        if size == 1:
+            # 64-bit size follows the box type
+            if len(head) < offset + 16:
+                return None
+            size = int.from_bytes(head[offset + 8:offset + 16], "big")
+        if size < 8:
+            # Box runs to the end of the file (0) or is malformed
+            return True
+        offset += size
+    return None
+
+
+def pipe_extraction_command(audio_output_path: str) -> List[str]:
+    """ffmpeg command extracting the intermediate audio from media on stdin.
+    
+    Args:
+        audio_output_path: Path to the output WAV or FLAC file
+        
+    Returns:
+        Command line reading the input from ``pipe:0``
+    """
+    return [
+        "ffmpeg",
+        "-loglevel", "error",
+        "-i", "pipe:0",
+        "-map", "0:a:0",  # First audio stream only
+        "-acodec", INTERMEDIATE_CODECS[intermediate_format(audio_output_path)],
+        "-ac", "1",  # Mono
+        "-ar", str(SAMPLE_RATE),  # Sample rate
+        "-y",
+        str(audio_output_path)
+    ]
+
+
+def iter_pcm_chunks(
+    media_path: str,
+    cancel_token: Optional[CancellationToken] = None,
+    chunk_seconds: float = PCM_CHUNK_SECONDS,
+    stream_index: int = 0,
+    channel: Optional[int] = None,
+    start_seconds: float = 0.0
+) -> Iterator[np.ndarray]:
+    """Decode the audio of a media file through an ffmpeg pipe.
+    
+    ffmpeg writes 16 kHz mono signed 16-bit PCM to stdout, which is read
+    incrementally and converted to float32 in [-1, 1]; nothing is written
+    to disk.
+    
+    Args:
+        media_path: Path to the input media file
+        cancel_token: Optional token; cancelling it kills ffmpeg
+        chunk_seconds: Approximate length of each yielded chunk
+        stream_index: Index of the audio stream to decode
+        channel: Decode only this channel instead of a downmix of all
+        start_seconds: Skip the audio before this time (input seek)
+        
+    Yields:
+        float32 waveform chunks
+        
+    Raises:
+        FileNotFoundError: If ffmpeg is not installed
+        subprocess.CalledProcessError: If decoding fails or is cancelled
+    """
+    ffmpeg_command = [
+        "ffmpeg",
+        "-nostdin",
+        "-loglevel", "error",
+    ]
+    if start_seconds > 0:
+        ffmpeg_command += ["-ss", f"{start_seconds:.6f}"]  # Input seek: earlier audio is not decoded
+    ffmpeg_command += [
+        "-i", str(media_path),
+        "-map", f"0:a:{stream_index}",  # One audio stream only
+    ]
+    if channel is not None:
+        ffmpeg_command += ["-af", f"pan=mono|c0=c{channel}"]  # One channel
+    else:
+        ffmpeg_command += ["-ac", "1"]  # Mono downmix
+    ffmpeg_command += [
+        "-ar", str(SAMPLE_RATE),  # Sample rate
+        "-f", "s16le",  # Raw PCM
+        "-"
+    ]
+    process = subprocess.Popen(
+        ffmpeg_command, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+    )
+    if cancel_token is not None:
+        cancel_token.register_process(process)
+
+    # Drain stderr in the background so a chatty ffmpeg cannot block on it
+    stderr_chunks: List[bytes] = []
+    stderr_reader = threading.Thread(
+        target=lambda: stderr_chunks.append(process.stderr.read()), daemon=True
+    )
+    stderr_reader.start()
+
+    chunk_bytes = int(chunk_seconds * SAMPLE_RATE) * 2
+    try:
+        while True:
+            data = process.stdout.read(chunk_bytes)
+            if not data:
+                break
+            # An odd trailing byte can only occur if ffmpeg was killed mid-sample
+            usable = len(data) - (len(data) % 2)
+            yield np.frombuffer(data[:usable], dtype=np.int16).astype(np.float32) / 32768.0
+        process.wait()
+        stderr_reader.join()
+        if process.returncode != 0:
+            raise subprocess.CalledProcessError(
+                process.returncode, ffmpeg_command, None, b"".join(stderr_chunks).decode(errors="replace")
+            )
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+        if cancel_token is not None:
+            cancel_token.unregister_process(process)
+
+
+def decode_audio(
+    media_path: str,
+    cancel_token: Optional[CancellationToken] = None,
+    stream_index: int = 0,
+    channel: Optional[int] = None,
+    start_seconds: float = 0.0
+) -> Optional[np.ndarray]:
+    """Decode the audio of a media file straight into memory.
+    
+    This replaces extract_audio() when no intermediate WAV is wanted: the
+    waveform can be passed directly to diarization and transcription.
+    
+    Args:
+        media_path: Path to the input media file
+        cancel_token: Optional token; cancelling it kills ffmpeg
+        stream_index: Index of the audio stream to decode
+        channel: Decode only this channel instead of a downmix of all
+        start_seconds: Decode only the audio from this time on
+        
+    Returns:
+        16 kHz mono float32 waveform, or None if decoding failed
+    """
+    logging.info(f"Decoding audio from {os.path.basename(str(media_path))} into memory...")
+    try:
+        chunks = list(iter_pcm_chunks(
+            media_path, cancel_token, stream_index=stream_index, channel=channel,
+            start_seconds=start_seconds
+        ))
+        waveform = np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.float32)
+        logging.info(f"FFmpeg decoded {waveform.shape[0] / SAMPLE_RATE:.1f}s of audio into memory.")
+        return waveform
+    except FileNotFoundError:
+        logging.error("Error: ffmpeg command not found. Make sure ffmpeg is installed and in your system's PATH.")
+        return None
+    except subprocess.CalledProcessError as e:
+        if cancel_token is not None and cancel_token.cancelled:
+            logging.warning(f"FFmpeg audio decoding stopped: {cancel_token.reason}")
+            return None
+        logging.error(f"Error during FFmpeg execution: {e}")
+        logging.error(f"FFmpeg stderr:\n{e.stderr}")
+        return None
+    except Exception as e:
+        logging.error(f"An unexpected error occurred during audio decoding: {e}")
+        return None
+
+
+def get_audio_duration(audio_path: str) -> Optional[float]:
+    """Get the duration of an intermediate audio file in seconds.
+    
+    WAV headers are read directly; other formats (FLAC) are probed.
+    
+    Args:
+        audio_path: Path to the WAV or FLAC file
+        
+    Returns:
+        Duration in seconds, or None if the file could not be read
+    """
+    if intermediate_format(audio_path) != "wav":
+        return probe_duration(audio_path)
+    try:
+        with wave.open(str(audio_path), "rb") as wav_file:
+            return wav_file.getnframes() / float(wav_file.getframerate())
+    except Exception as e:
+        logging.warning(f"Could not read duration of {audio_path}: {e}")
+        return None
+
+
+def audio_samples(audio: AudioInput) -> Optional[int]:
+    """Length of an audio input in samples at SAMPLE_RATE, None if unknown."""
+    if isinstance(audio, np.ndarray):
+        return audio.shape[-1]
+    duration = get_audio_duration(str(audio))
+    return int(duration * SAMPLE_RATE) if duration is not None else None
+
+
+def probe_duration(media_path: str) -> Optional[float]:
+    """Probe the duration of a media file with ffprobe.
+    
+    This only reads the container headers, so it is cheap even for
+    multi-hour recordings.
+    
+    Args:
+        media_path: Path to the media file
+        
+    Returns:
+        Duration in seconds, or None if it could not be determined
+    """
+    ffprobe_command = [
+        "ffprobe",
+        "-v", "error",
+        "-show_entries", "format=duration",
+        "-of", "default=noprint_wrappers=1:nokey=1",
+        str(media_path)
+    ]
+    try:
+        result = subprocess.run(ffprobe_command, check=True, capture_output=True, text=True)
+        return float(result.stdout.strip())
+    except FileNotFoundError:
+        logging.error("Error: ffprobe command not found. Make sure ffmpeg is installed and in your system's PATH.")
+        return None
+    except (subprocess.CalledProcessError, ValueError) as e:
+        logging.warning(f"Could not probe duration of {os.path.basename(str(media_path))}: {e}")
+        return None
@@ -0,0 +1,244 @@
+# batch.py
+"""Batch processing of many recordings with a single model load.
+
+Audio extraction for the next file runs in a background ffmpeg process while
+the current file is being diarized and transcribed, so the two stages overlap.
+"""
+import glob
+import time
+import logging
+from pathlib import Path
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Union
+
+from . import audio_utils
+from . import transcriber
+from . import diarizer
+from . import file_manager
+from . import resource_manager
+from . import config
+from .core import transcribe_audio_file
+from .cancellation import CancellationToken, StageWatchdog
+
+VIDEO_EXTENSIONS = {
+    ".mp4", ".mkv", ".mov", ".avi", ".webm", ".flv", ".m4v",
+    ".wav", ".mp3", ".m4a", ".flac", ".ogg",
+}
+
+
+def is_batch_target(target: str) -> bool:
+    """Check whether a CLI target refers to a directory or a glob pattern.
+
+    Args:
+        target: Path or glob pattern given on the command line
+
+    Returns:
+        True if the target should be processed in batch mode
+    """
+    return Path(target).is_dir() or any(char in target for char in "*?[")
+
+
+def collect_video_files(target: str) -> List[Path]:
+    """Collect the media files to process from a directory or glob pattern.
+
+    Args:
+        target: Directory to scan (non-recursively) or a glob pattern
+
+    Returns:
+        Sorted list of media file paths
+    """
+    target_path = Path(target)
+    if target_path.is_dir():
+        candidates = [
+            path for path in target_path.iterdir()
+            if path.suffix.lower() in VIDEO_EXTENSIONS
+        ]
+    else:
+        candidates = [Path(path) for path in glob.glob(target, recursive=True)]
+    return sorted(path for path in candidates if path.is_file())
+
+
+def _extract_with_timeout(video_path: Path, audio_path: Path) -> bool:
+    """Extract audio for one file, killing ffmpeg if it exceeds the stage timeout."""
+    cancel_token = CancellationToken()
+    with StageWatchdog(cancel_token, "extraction", config.STAGE_TIMEOUT_EXTRACTION_S):
+        return audio_utils.extract_audio_parallel(
+            str(video_path), str(audio_path), config.EXTRACTION_PARALLEL_RANGES, cancel_token,
+            min_duration=config.EXTRACTION_PARALLEL_MIN_S
+        )
+
+
+def _submit_extraction(extractor: ThreadPoolExecutor, paths: Dict[str, Path]) -> Future:
+    """Queue the audio extraction of one file on the background worker."""
+    return extractor.submit(_extract_with_timeout, paths["video_path"], paths["audio_file"])
+
+
+def run_batch(
+    video_paths: List[Path],
+    transcript_base_dir_name: Union[str, Path] = config.TRANSCRIPT_BASE_DIR_NAME,
+    speaker_hints: Optional[Dict[str, int]] = None
+) -> Dict[str, Any]:
+    """Transcribe a list of recordings, loading the models only once.
+
+    A failure on one file is logged and recorded; the remaining files are
+    still processed.
+
+    Args:
+        video_paths: Media files to process, in order
+        transcript_base_dir_name: Base directory for the transcripts
+        speaker_hints: Speaker-count hints from diarizer.speaker_hints(),
+            applied to every file
+
+    Returns:
+        Summary dictionary with per-file results and throughput figures
+    """
+    batch_start = time.time()
+    results: List[Dict[str, Any]] = []
+    all_paths = [
+        file_manager.calculate_paths(
+            video_path,
+            config.REPO_ROOT,
+            str(transcript_base_dir_name),
+            config.PROCESSED_VIDEO_DIR,
+            config.INTERMEDIATE_AUDIO_FORMAT
+        )
+        for video_path in video_paths
+    ]
+    if not all_paths:
+        logging.warning("No files to process.")
+        return summarize_batch(results, time.time() - batch_start)
+
+    device = resource_manager.select_device(
+        min_memory_mb=config.GPU_MEMORY_THRESHOLD_MB
+    )
+    with transcriber.ModelManager(
+        config.WHISPER_MODEL_SIZE,
+        device,
+        config.WHISPER_COMPUTE_TYPE
+    ) as whisper_model, ThreadPoolExecutor(max_workers=1) as extractor:
+        if whisper_model is None:
+            raise RuntimeError("Failed to load Whisper model")
+
+        diarization_pipeline = diarizer.load_diarization_pipeline(
+            config.DIARIZATION_PIPELINE_NAME,
+            config.HUGGINGFACE_AUTH_TOKEN,
+            device
+        )
+        if diarization_pipeline is None:
+            raise RuntimeError("Failed to load diarization pipeline")
+
+        # The single extraction worker runs at most one file ahead: the
+        # extraction of file N+1 is queued before file N is transcribed.
+        pending = _submit_extraction(extractor, all_paths[0])
+        for index, paths in enumerate(all_paths):
+            current = pending
+            if index + 1 < len(all_paths):
+                pending = _submit_extraction(extractor, all_paths[index + 1])
+            results.append(
+                process_batch_item(paths, current, whisper_model, diarization_pipeline, speaker_hints)
+            )
+
+    summary = summarize_batch(results, time.time() - batch_start)
+    resource_manager.cleanup_gpu_memory()
+    return summary
+
+
+def process_batch_item(
+    paths: Dict[str, Path],
+    extraction: Future,
+    whisper_model: Any,
+    diarization_pipeline: Any,
+    speaker_hints: Optional[Dict[str, int]] = None
+) -> Dict[str, Any]:
+    """Process one file of a batch once its audio extraction is under way.
+
+    Args:
+        paths: Paths for the file, as returned by calculate_paths()
+        extraction: Future of the audio extraction for this file
+        whisper_model: Loaded Whisper model
+        diarization_pipeline: Loaded diarization pipeline
+        speaker_hints: Speaker-count hints from diarizer.speaker_hints()
+
+    Returns:
+        Result dictionary for the file
+    """
+    video_path = paths["video_path"]
+    result: Dict[str, Any] = {
+        "video_path": str(video_path),
+        "status": "failed",
+        "error": None,
+        "audio_seconds": 0.0,
+        "elapsed_seconds": 0.0,
+    }
+    item_start = time.time()
+    try:
+        if not extraction.result():
+            raise RuntimeError("Failed to extract audio from video")
+        logging.info(f"Transcribing {video_path.name}...")
+        result["audio_seconds"] = audio_utils.get_audio_duration(str(paths["audio_file"])) or 0.0
+        file_manager.create_directories(paths)
+        transcribe_audio_file(
+            paths["audio_file"],
+            paths["output_txt_file"],
+            whisper_model,
+            diarization_pipeline,
+            speaker_hints,
+            paths.get("diarization_state_dir")
+        )
+        result["status"] = "completed"
+        result["output_file"] = str(paths["output_txt_file"])
+    except Exception as e:
+        logging.exception(f"Error processing {video_path}: {e}")
+        result["error"] = str(e)
+    finally:
+        file_manager.delete_temp_audio(paths["audio_file"])
+        result["elapsed_seconds"] = time.time() - item_start
+    return result
+
+
+def summarize_batch(results: List[Dict[str, Any]], wall_seconds: float) -> Dict[str, Any]:
+    """Build the throughput summary for a batch run.
+
+    Args:
+        results: Per-file result dictionaries
+        wall_seconds: Total wall-clock time of the batch
+
+    Returns:
+        Summary dictionary
+    """
+    completed = [r for r in results if r["status"] == "completed"]
+    audio_seconds = sum(r["audio_seconds"] for r in completed)
+    return {
+        "files_total": len(results),
+        "files_completed": len(completed),
+        "files_failed": len(results) - len(completed),
+        "audio_seconds": audio_seconds,
+        "wall_seconds": wall_seconds,
+        "realtime_factor": audio_seconds / wall_seconds if wall_seconds > 0 else 0.0,
+        "results": results,
+    }
+
+
+def format_batch_summary(summary: Dict[str, Any]) -> str:
+    """Render a batch summary as human readable text.
+
+    Args:
+        summary: Summary dictionary from summarize_batch()
+
+    Returns:
+        Multi-line summary text
+    """
+    lines = [
+        f"Batch complete: {summary['files_completed']}/{summary['files_total']} files "
+        f"succeeded, {summary['files_failed']} failed.",
+        f"Audio processed: {summary['audio_seconds'] / 3600:.2f} h in "
+        f"{summary['wall_seconds'] / 3600:.2f} h wall time "
+        f"({summary['realtime_factor']:.2f}x realtime).",
+    ]
+    if summary["files_total"]:
+        per_file = summary["wall_seconds"] / summary["files_total"]
+        lines.append(f"Average wall time per file: {per_file:.1f} s.")
+    for result in summary["results"]:
+        if result["status"] != "completed":
+            lines.append(f"  FAILED {result['video_path']}: {result['error']}")
+    return "\n".join(lines)
@@ -0,0 +1,105 @@
+# cancellation.py
+"""Cooperative job cancellation and per-stage timeouts.
+
+A CancellationToken is shared by all stages of a job. Cancelling it kills any
+registered subprocess (e.g. ffmpeg) immediately, and the inference stages
+check it at their next chunk or step boundary. A StageWatchdog cancels the
+token when a stage exceeds its configured timeout.
+"""
+import logging
+import subprocess
+import threading
+from typing import Optional, Set
+
+
+class JobCancelled(RuntimeError):
+    """Raised inside a job when its cancellation token has been cancelled."""
+
+
+class CancellationToken:
+    """Thread-safe cancellation flag that also owns running subprocesses."""
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._processes: Set[subprocess.Popen] = set()
+        self.reason: Optional[str] = None
+
+    @property
+    def cancelled(self) -> bool:
+        """Whether the token has been cancelled."""
+        return self._event.is_set()
+
+    def cancel(self, reason: str = "Job cancelled") -> None:
+        """Cancel the job and kill its registered subprocesses.
+
+        Args:
+            reason: Human readable reason, reported as the job message
+        """
+        with self._lock:
+            if self._event.is_set():
+                return
+            self.reason = reason
+            self._event.set()
+            processes = list(self._processes)
+        logging.warning(f"Cancelling job: {reason}")
+        for process in processes:
+            _kill(process)
+
+    def raise_if_cancelled(self) -> None:
+        """Raise JobCancelled if the token has been cancelled."""
+        if self._event.is_set():
+            raise JobCancelled(self.reason or "Job cancelled")
+
+    def register_process(self, process: subprocess.Popen) -> None:
+        """Track a subprocess so cancellation kills it.
+
+        A process registered after cancellation is killed right away.
+        """
+        with self._lock:
+            self._processes.add(process)
+            cancelled = self._event.is_set()
+        if cancelled:
+            _kill(process)
+
+    def unregister_process(self, process: subprocess.Popen) -> None:
+        """Stop tracking a finished subprocess."""
+        with self._lock:
+            self._processes.discard(process)
+
+
+def _kill(process: subprocess.Popen) -> None:
+    """Kill a subprocess if it is still running."""
+    try:
+        if process.poll() is None:
+            process.kill()
+    except Exception as e:
+        logging.warning(f"Could not kill subprocess {process.pid}: {e}")
+
+
+class StageWatchdog:
+    """Context manager that cancels a token when a stage runs too long."""
+
+    def __init__(self, token: Optional[CancellationToken], stage: str, timeout_seconds: float):
+        self.token = token
+        self.stage = stage
+        self.timeout_seconds = timeout_seconds
+        self._timer: Optional[threading.Timer] = None
+
+    def _expire(self) -> None:
+        """Timer callback: cancel the job with a timeout reason."""
+        self.token.cancel(f"Stage '{self.stage}' timed out after {self.timeout_seconds:.0f} seconds")
+
+    def __enter__(self) -> "StageWatchdog":
+        """Start the timer if a timeout is configured"""
+        if self.token is not None and self.timeout_seconds > 0:
+            self._timer = threading.Timer(self.timeout_seconds, self._expire)
+            self._timer.daemon = True
+            self._timer.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Stop the timer when the stage finishes"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
@@ -6,6 +6,7 @@ configuration files, and default values, with validation.
 """
 
 import os
+import tempfile
 from pathlib import Path
 from typing import Dict, Any, Literal
 import torch
@@ -27,11 +28,62 @@ DEFAULT_CONFIG = {
     "WHISPER_COMPUTE_TYPE": "int8",  # float16, float32, int8
     "WHISPER_BATCH_SIZE": 16,       # Batch size for inference
     "WHISPER_BEAM_SIZE": 5,         # Beam size for inference
+    "WHISPER_LANGUAGE": "",         # Language code, empty to auto-detect
+    
+    # Audio extraction configuration
+    "AUDIO_EXTRACTION_MODE": "file",  # file: 16 kHz WAV in the job dir, memory: decode via pipe,
+                                      # shared: memory-mapped float32 .npy in the job dir
+    "INTERMEDIATE_AUDIO_FORMAT": "wav",  # wav: raw PCM, flac: lossless, about half the disk and I/O
+    "EXTRACTION_PARALLEL_RANGES": 1,  # Seeked ffmpeg processes per extraction (1 disables)
+    "EXTRACTION_PARALLEL_MIN_S": 1800,  # Shorter recordings are extracted by a single process
+    "PARALLEL_STAGES": False,  # With shared audio, diarize in a worker process while transcribing
+    "SHARED_VAD_ENABLED": False,  # One Silero VAD pass drives Whisper's clips and pyannote's input
+    "PIPELINE_MODE": "full",  # full: whole-recording segments, windowed: bounded memory for very long audio,
+                              # turns: diarize first, then transcribe single-speaker clips
+    "TURN_CLIP_MAX_S": 30.0,  # Longest single-speaker clip in turns mode
+    "TURN_WORD_TIMESTAMPS": False,  # Word timestamps in turns mode (segment timestamps otherwise)
+    "WINDOW_SECONDS": 600.0,  # Length of each window in windowed mode
+    "WINDOW_OVERLAP_S": 10.0,  # Audio shared by consecutive windows; words are de-duplicated there
+    "INCREMENTAL_OVERLAP_S": 10.0,  # Already processed audio decoded again as context for a growing file
+    "INCREMENTAL_HOLDBACK_S": 3.0,  # End of a growing file left for the next run (may end mid-word)
+    "SHARD_SECONDS": 1800.0,  # Length of each shard a sharding coordinator sends to a worker
+    "SHARD_OVERLAP_S": 30.0,  # Audio shared by consecutive shards; speakers are matched and cut there
+    "SHARD_POLL_S": 5.0,  # How often the coordinator polls a worker for the status of a shard
+    
+    # Silence trimming before inference
+    "SPEECH_TRIM_ENABLED": False,  # Cut long non-speech spans before diarization/transcription
+    "SPEECH_TRIM_THRESHOLD_DB": -45.0,  # Frames quieter than this (dBFS) count as silence
+    "SPEECH_TRIM_MIN_SILENCE_S": 2.0,  # Only silences at least this long are cut
+    "SPEECH_TRIM_PADDING_S": 0.25,  # Audio kept around each speech span
+    
+    # Multitrack recordings (one participant per audio track or channel). Every track is
+    # held in memory as a 16 kHz float32 waveform, about 230 MB per track and hour
+    # (up to ~5.5 GB for 8 tracks of a 3-hour recording)
+    "MULTITRACK_ENABLED": False,  # Derive speaker turns from per-track activity instead of pyannote
+    "MULTITRACK_MAX_TRACKS": 8,  # More tracks/channels than this are treated as a surround mix
+    "MULTITRACK_THRESHOLD_DB": -45.0,  # Frames quieter than this (dBFS) are silent
+    "MULTITRACK_DOMINANCE_DB": 15.0,  # A track speaks only within this many dB of the loudest one
+    "MULTITRACK_MAX_SHARED_ACTIVITY": 0.5,  # Above this overlap the tracks are the same mix
     
     # Diarization configuration
     "DIARIZATION_PIPELINE_NAME": "pyannote/speaker-diarization@2.1",
+    "DIARIZATION_PIPELINE_IDLE_S": 600,  # Resident pipelines idle this long are unloaded (0: load per job)
+    "DIARIZATION_WINDOW_SECONDS": 0,  # Diarize in windows of this length and stitch speakers (0: whole file)
+    "DIARIZATION_WINDOW_OVERLAP_S": 30.0,  # Audio shared by consecutive diarization windows
+    "SPEAKER_STITCH_THRESHOLD": 0.5,  # Lowest cosine similarity at which two windows' speakers are merged
+    "DIARIZATION_KEEP_STATE": False,  # Keep segmentation and embeddings so speakers can be re-clustered
+    "DIARIZATION_BACKEND": "torch",  # torch, or onnx: ONNX Runtime for the models of CPU pipelines
+    "DIARIZATION_ONNX_DIR": str(Path(tempfile.gettempdir()) / "transcribe_meeting_onnx"),  # Exported models
+    "DIARIZATION_ONNX_QUANTIZE": False,  # Dynamic int8 quantization of the exported models
+    "DIARIZATION_ONNX_THREADS": os.cpu_count() or 4,  # Intra-op threads per ONNX Runtime session
     "HUGGINGFACE_AUTH_TOKEN": os.environ.get("HUGGINGFACE_AUTH_TOKEN", ""),
     
+    # Speaker identification across meetings
+    "SPEAKER_REGISTRY_ENABLED": False,  # Name speakers by matching their voice against known voices
+    "SPEAKER_REGISTRY_DIR": str(Path(__file__).parent.parent.parent / "speaker_registry"),
+    "SPEAKER_REGISTRY_THRESHOLD": 0.6,  # Lowest cosine similarity accepted as a known voice
+    "SPEAKER_REGISTRY_ENROLL": True,  # Register unknown voices and refine known ones after each job
+    
     # Resource management
     "GPU_MEMORY_THRESHOLD_MB": 2000,  # Minimum required GPU memory in MB
     "CPU_THREADS": os.cpu_count() or 4,  # Default to available cores or 4
@@ -39,12 +91,39 @@ DEFAULT_CONFIG = {
     # Alignment configuration
     "ALIGNMENT_MAX_WORKERS": max(1, (os.cpu_count() or 4) - 1),  # Keep one CPU core free
     "ALIGNMENT_TARGET_WORDS_PER_CHUNK": 500,  # Target words per chunk for parallel alignment
+    
+    # Artifact cache configuration
+    "ARTIFACT_CACHE_ENABLED": True,  # Reuse audio/turns/segments across jobs
+    "ARTIFACT_CACHE_DIR": str(Path(tempfile.gettempdir()) / "transcribe_meeting_cache"),
+    "ARTIFACT_CACHE_MAX_MB": 10240,  # Size bound before least recently used entries are evicted
+    
+    # Job scheduling configuration
+    "JOB_MAX_CONCURRENT": 1,  # Jobs processed at the same time
+    "JOB_SECONDS_PER_AUDIO_SECOND": 0.5,  # Initial processing time estimate, refined as jobs finish
+    "JOB_AGING_FACTOR": 1.0,  # Expected seconds of work forgiven per second spent waiting
+    "JOB_UNKNOWN_DURATION_S": 3600,  # Assumed duration when ffprobe cannot determine it
+    
+    # Shared inference service configuration
+    "INFERENCE_SERVICE_ENABLED": False,  # Batch Whisper chunks across concurrent jobs
+    "INFERENCE_BATCH_WAIT_MS": 200,  # Max wait for a batch to fill before running it partly filled
+    
+    # Per-stage timeouts in seconds, enforced by a watchdog (0 disables)
+    "STAGE_TIMEOUT_EXTRACTION_S": 3600,
+    "STAGE_TIMEOUT_DIARIZATION_S": 0,
+    "STAGE_TIMEOUT_TRANSCRIPTION_S": 0,
 }
 
 # Configuration loaded from environment will be stored here
 _loaded_config: Dict[str, Any] = {}
 
 
+def _to_bool(value: Any) -> bool:
+    """Convert a configuration value (possibly from an env var) to a bool."""
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ("1", "true", "yes", "on")
+
+
 def _validate_config(config: Dict[str, Any]) -> Dict[str, Any]:
     """Validate the configuration values.
     
@@ -72,6 +151,40 @@ def _validate_config(config: Dict[str, Any]) -> Dict[str, Any]:
     if config["WHISPER_COMPUTE_TYPE"] not in valid_compute_types:
         raise ValueError(f"WHISPER_COMPUTE_TYPE must be one of {valid_compute_types}")
     
+    # Validate AUDIO_EXTRACTION_MODE
+    valid_extraction_modes = ["file", "memory", "shared"]
+    if config["AUDIO_EXTRACTION_MODE"] not in valid_extraction_modes:
+        raise ValueError(f"AUDIO_EXTRACTION_MODE must be one of {valid_extraction_modes}")
+    
+    # Validate INTERMEDIATE_AUDIO_FORMAT
+    valid_audio_formats = ["wav", "flac"]
+    if config["INTERMEDIATE_AUDIO_FORMAT"] not in valid_audio_formats:
+        raise ValueError(f"INTERMEDIATE_AUDIO_FORMAT must be one of {valid_audio_formats}")
+    
+    # Validate PIPELINE_MODE and the windows
+    valid_pipeline_modes = ["full", "windowed", "turns"]
+    if config["PIPELINE_MODE"] not in valid_pipeline_modes:
+        raise ValueError(f"PIPELINE_MODE must be one of {valid_pipeline_modes}")
+    config["TURN_CLIP_MAX_S"] = float(config["TURN_CLIP_MAX_S"])
+    config["TURN_WORD_TIMESTAMPS"] = _to_bool(config["TURN_WORD_TIMESTAMPS"])
+    if not 0 < config["TURN_CLIP_MAX_S"] <= 30:
+        raise ValueError("TURN_CLIP_MAX_S must be between 0 and 30 seconds")
+    config["WINDOW_SECONDS"] = float(config["WINDOW_SECONDS"])
+    config["WINDOW_OVERLAP_S"] = float(config["WINDOW_OVERLAP_S"])
+    if not 0 <= config["WINDOW_OVERLAP_S"] < config["WINDOW_SECONDS"]:
+        raise ValueError("WINDOW_OVERLAP_S must be at least 0 and shorter than WINDOW_SECONDS")
+    config["INCREMENTAL_OVERLAP_S"] = float(config["INCREMENTAL_OVERLAP_S"])
+    config["INCREMENTAL_HOLDBACK_S"] = float(config["INCREMENTAL_HOLDBACK_S"])
+    if config["INCREMENTAL_OVERLAP_S"] < 0 or config["INCREMENTAL_HOLDBACK_S"] < 0:
+        raise ValueError("INCREMENTAL_OVERLAP_S and INCREMENTAL_HOLDBACK_S must be at least 0")
+    config["SHARD_SECONDS"] = float(config["SHARD_SECONDS"])
+    config["SHARD_OVERLAP_S"] = float(config["SHARD_OVERLAP_S"])
+    if not 0 <= config["SHARD_OVERLAP_S"] < config["SHARD_SECONDS"]:
+        raise ValueError("SHARD_OVERLAP_S must be at least 0 and shorter than SHARD_SECONDS")
+    config["SHARD_POLL_S"] = float(config["SHARD_POLL_S"])
+    if config["SHARD_POLL_S"] <= 0:
+        raise ValueError("SHARD_POLL_S must be positive")
+    
     # Create paths as Path objects
     config["REPO_ROOT"] = Path(config["REPO_ROOT"])
     
@@ -82,6 +195,49 @@ def _validate_config(config: Dict[str, Any]) -> Dict[str, Any]:
     config["WHISPER_BEAM_SIZE"] = int(config["WHISPER_BEAM_SIZE"])
     config["ALIGNMENT_MAX_WORKERS"] = int(config["ALIGNMENT_MAX_WORKERS"])
     config["ALIGNMENT_TARGET_WORDS_PER_CHUNK"] = int(config["ALIGNMENT_TARGET_WORDS_PER_CHUNK"])
+    config["ARTIFACT_CACHE_ENABLED"] = _to_bool(config["ARTIFACT_CACHE_ENABLED"])
+    config["ARTIFACT_CACHE_DIR"] = Path(config["ARTIFACT_CACHE_DIR"])
+    config["ARTIFACT_CACHE_MAX_MB"] = int(config["ARTIFACT_CACHE_MAX_MB"])
+    config["JOB_MAX_CONCURRENT"] = max(1, int(config["JOB_MAX_CONCURRENT"]))
+    config["JOB_SECONDS_PER_AUDIO_SECOND"] = float(config["JOB_SECONDS_PER_AUDIO_SECOND"])
+    config["JOB_AGING_FACTOR"] = float(config["JOB_AGING_FACTOR"])
+    config["JOB_UNKNOWN_DURATION_S"] = float(config["JOB_UNKNOWN_DURATION_S"])
+    config["INFERENCE_SERVICE_ENABLED"] = _to_bool(config["INFERENCE_SERVICE_ENABLED"])
+    config["INFERENCE_BATCH_WAIT_MS"] = int(config["INFERENCE_BATCH_WAIT_MS"])
+    config["STAGE_TIMEOUT_EXTRACTION_S"] = float(config["STAGE_TIMEOUT_EXTRACTION_S"])
+    config["STAGE_TIMEOUT_DIARIZATION_S"] = float(config["STAGE_TIMEOUT_DIARIZATION_S"])
+    config["STAGE_TIMEOUT_TRANSCRIPTION_S"] = float(config["STAGE_TIMEOUT_TRANSCRIPTION_S"])
+    config["PARALLEL_STAGES"] = _to_bool(config["PARALLEL_STAGES"])
+    config["EXTRACTION_PARALLEL_RANGES"] = max(1, int(config["EXTRACTION_PARALLEL_RANGES"]))
+    config["EXTRACTION_PARALLEL_MIN_S"] = float(config["EXTRACTION_PARALLEL_MIN_S"])
+    config["SHARED_VAD_ENABLED"] = _to_bool(config["SHARED_VAD_ENABLED"])
+    config["SPEECH_TRIM_ENABLED"] = _to_bool(config["SPEECH_TRIM_ENABLED"])
+    config["SPEECH_TRIM_THRESHOLD_DB"] = float(config["SPEECH_TRIM_THRESHOLD_DB"])
+    config["SPEECH_TRIM_MIN_SILENCE_S"] = float(config["SPEECH_TRIM_MIN_SILENCE_S"])
+    config["SPEECH_TRIM_PADDING_S"] = float(config["SPEECH_TRIM_PADDING_S"])
+    config["DIARIZATION_PIPELINE_IDLE_S"] = float(config["DIARIZATION_PIPELINE_IDLE_S"])
+    config["DIARIZATION_WINDOW_SECONDS"] = float(config["DIARIZATION_WINDOW_SECONDS"])
+    config["DIARIZATION_WINDOW_OVERLAP_S"] = float(config["DIARIZATION_WINDOW_OVERLAP_S"])
+    config["SPEAKER_STITCH_THRESHOLD"] = float(config["SPEAKER_STITCH_THRESHOLD"])
+    config["DIARIZATION_KEEP_STATE"] = _to_bool(config["DIARIZATION_KEEP_STATE"])
+    valid_diarization_backends = ["torch", "onnx"]
+    if config["DIARIZATION_BACKEND"] not in valid_diarization_backends:
+        raise ValueError(f"DIARIZATION_BACKEND must be one of {valid_diarization_backends}")
+    config["DIARIZATION_ONNX_DIR"] = Path(config["DIARIZATION_ONNX_DIR"])
+    config["DIARIZATION_ONNX_QUANTIZE"] = _to_bool(config["DIARIZATION_ONNX_QUANTIZE"])
+    config["DIARIZATION_ONNX_THREADS"] = max(1, int(config["DIARIZATION_ONNX_THREADS"]))
+    if config["DIARIZATION_WINDOW_SECONDS"] > 0 and not (
+            0 <= config["DIARIZATION_WINDOW_OVERLAP_S"] < config["DIARIZATION_WINDOW_SECONDS"]):
+        raise ValueError("DIARIZATION_WINDOW_OVERLAP_S must be at least 0 and shorter than DIARIZATION_WINDOW_SECONDS")
+    config["SPEAKER_REGISTRY_ENABLED"] = _to_bool(config["SPEAKER_REGISTRY_ENABLED"])
+    config["SPEAKER_REGISTRY_DIR"] = Path(config["SPEAKER_REGISTRY_DIR"])
+    config["SPEAKER_REGISTRY_THRESHOLD"] = float(config["SPEAKER_REGISTRY_THRESHOLD"])
+    config["SPEAKER_REGISTRY_ENROLL"] = _to_bool(config["SPEAKER_REGISTRY_ENROLL"])
+    config["MULTITRACK_ENABLED"] = _to_bool(config["MULTITRACK_ENABLED"])
+    config["MULTITRACK_MAX_TRACKS"] = int(config["MULTITRACK_MAX_TRACKS"])
+    config["MULTITRACK_THRESHOLD_DB"] = float(config["MULTITRACK_THRESHOLD_DB"])
+    config["MULTITRACK_DOMINANCE_DB"] = float(config["MULTITRACK_DOMINANCE_DB"])
+    config["MULTITRACK_MAX_SHARED_ACTIVITY"] = float(config["MULTITRACK_MAX_SHARED_ACTIVITY"])
     
     return config
 
@@ -140,9 +296,60 @@ WHISPER_DEVICE = _loaded_config["WHISPER_DEVICE"]
 WHISPER_COMPUTE_TYPE = _loaded_config["WHISPER_COMPUTE_TYPE"]
 WHISPER_BATCH_SIZE = _loaded_config["WHISPER_BATCH_SIZE"]
 WHISPER_BEAM_SIZE = _loaded_config["WHISPER_BEAM_SIZE"]
+WHISPER_LANGUAGE = _loaded_config["WHISPER_LANGUAGE"]
+AUDIO_EXTRACTION_MODE = _loaded_config["AUDIO_EXTRACTION_MODE"]
 DIARIZATION_PIPELINE_NAME = _loaded_config["DIARIZATION_PIPELINE_NAME"]
 HUGGINGFACE_AUTH_TOKEN = _loaded_config["HUGGINGFACE_AUTH_TOKEN"]
 GPU_MEMORY_THRESHOLD_MB = _loaded_config["GPU_MEMORY_THRESHOLD_MB"]
 CPU_THREADS = _loaded_config["CPU_THREADS"]
 ALIGNMENT_MAX_WORKERS = _loaded_config["ALIGNMENT_MAX_WORKERS"]
-ALIGNMENT_TARGET_WORDS_PER_CHUNK = _loaded_config["ALIGNMENT_TARGET_WORDS_PER_CHUNK"]
\ No newline at end of file
+ALIGNMENT_TARGET_WORDS_PER_CHUNK = _loaded_config["ALIGNMENT_TARGET_WORDS_PER_CHUNK"]
+ARTIFACT_CACHE_ENABLED = _loaded_config["ARTIFACT_CACHE_ENABLED"]
+ARTIFACT_CACHE_DIR = _loaded_config["ARTIFACT_CACHE_DIR"]
+ARTIFACT_CACHE_MAX_MB = _loaded_config["ARTIFACT_CACHE_MAX_MB"]
+JOB_MAX_CONCURRENT = _loaded_config["JOB_MAX_CONCURRENT"]
+JOB_SECONDS_PER_AUDIO_SECOND = _loaded_config["JOB_SECONDS_PER_AUDIO_SECOND"]
+JOB_AGING_FACTOR = _loaded_config["JOB_AGING_FACTOR"]
+JOB_UNKNOWN_DURATION_S = _loaded_config["JOB_UNKNOWN_DURATION_S"]
+INFERENCE_SERVICE_ENABLED = _loaded_config["INFERENCE_SERVICE_ENABLED"]
+INFERENCE_BATCH_WAIT_MS = _loaded_config["INFERENCE_BATCH_WAIT_MS"]
+STAGE_TIMEOUT_EXTRACTION_S = _loaded_config["STAGE_TIMEOUT_EXTRACTION_S"]
+STAGE_TIMEOUT_DIARIZATION_S = _loaded_config["STAGE_TIMEOUT_DIARIZATION_S"]
+STAGE_TIMEOUT_TRANSCRIPTION_S = _loaded_config["STAGE_TIMEOUT_TRANSCRIPTION_S"]
+PARALLEL_STAGES = _loaded_config["PARALLEL_STAGES"]
+EXTRACTION_PARALLEL_RANGES = _loaded_config["EXTRACTION_PARALLEL_RANGES"]
+EXTRACTION_PARALLEL_MIN_S = _loaded_config["EXTRACTION_PARALLEL_MIN_S"]
+SPEECH_TRIM_ENABLED = _loaded_config["SPEECH_TRIM_ENABLED"]
+SPEECH_TRIM_THRESHOLD_DB = _loaded_config["SPEECH_TRIM_THRESHOLD_DB"]
+SPEECH_TRIM_MIN_SILENCE_S = _loaded_config["SPEECH_TRIM_MIN_SILENCE_S"]
+SPEECH_TRIM_PADDING_S = _loaded_config["SPEECH_TRIM_PADDING_S"]
+INTERMEDIATE_AUDIO_FORMAT = _loaded_config["INTERMEDIATE_AUDIO_FORMAT"]
+MULTITRACK_ENABLED = _loaded_config["MULTITRACK_ENABLED"]
+MULTITRACK_MAX_TRACKS = _loaded_config["MULTITRACK_MAX_TRACKS"]
+MULTITRACK_THRESHOLD_DB = _loaded_config["MULTITRACK_THRESHOLD_DB"]
+MULTITRACK_DOMINANCE_DB = _loaded_config["MULTITRACK_DOMINANCE_DB"]
+MULTITRACK_MAX_SHARED_ACTIVITY = _loaded_config["MULTITRACK_MAX_SHARED_ACTIVITY"]
+PIPELINE_MODE = _loaded_config["PIPELINE_MODE"]
+WINDOW_SECONDS = _loaded_config["WINDOW_SECONDS"]
+WINDOW_OVERLAP_S = _loaded_config["WINDOW_OVERLAP_S"]
+DIARIZATION_PIPELINE_IDLE_S = _loaded_config["DIARIZATION_PIPELINE_IDLE_S"]
+DIARIZATION_WINDOW_SECONDS = _loaded_config["DIARIZATION_WINDOW_SECONDS"]
+DIARIZATION_WINDOW_OVERLAP_S = _loaded_config["DIARIZATION_WINDOW_OVERLAP_S"]
+SPEAKER_STITCH_THRESHOLD = _loaded_config["SPEAKER_STITCH_THRESHOLD"]
+SHARED_VAD_ENABLED = _loaded_config["SHARED_VAD_ENABLED"]
+TURN_CLIP_MAX_S = _loaded_config["TURN_CLIP_MAX_S"]
+TURN_WORD_TIMESTAMPS = _loaded_config["TURN_WORD_TIMESTAMPS"]
+SPEAKER_REGISTRY_ENABLED = _loaded_config["SPEAKER_REGISTRY_ENABLED"]
+SPEAKER_REGISTRY_DIR = _loaded_config["SPEAKER_REGISTRY_DIR"]
+SPEAKER_REGISTRY_THRESHOLD = _loaded_config["SPEAKER_REGISTRY_THRESHOLD"]
+SPEAKER_REGISTRY_ENROLL = _loaded_config["SPEAKER_REGISTRY_ENROLL"]
+DIARIZATION_KEEP_STATE = _loaded_config["DIARIZATION_KEEP_STATE"]
+DIARIZATION_BACKEND = _loaded_config["DIARIZATION_BACKEND"]
+DIARIZATION_ONNX_DIR = _loaded_config["DIARIZATION_ONNX_DIR"]
+DIARIZATION_ONNX_QUANTIZE = _loaded_config["DIARIZATION_ONNX_QUANTIZE"]
+DIARIZATION_ONNX_THREADS = _loaded_config["DIARIZATION_ONNX_THREADS"]
+INCREMENTAL_OVERLAP_S = _loaded_config["INCREMENTAL_OVERLAP_S"]
+INCREMENTAL_HOLDBACK_S = _loaded_config["INCREMENTAL_HOLDBACK_S"]
+SHARD_SECONDS = _loaded_config["SHARD_SECONDS"]
+SHARD_OVERLAP_S = _loaded_config["SHARD_OVERLAP_S"]
+SHARD_POLL_S = _loaded_config["SHARD_POLL_S"]
\ No newline at end of file
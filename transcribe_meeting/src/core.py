@@ -1,10 +1,19 @@
 # Core logic for transcribing meetings
 
+import asyncio
+import contextlib
+import json
 import logging
+import os
+import multiprocessing
 import shutil
+import threading
 import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
 
 from . import audio_utils
 from . import transcriber
@@ -13,10 +22,34 @@ from . import alignment
 from . import output_utils
 from . import resource_manager
 from . import config
+from . import artifact_cache
+from . import inference_service
+from . import shared_audio
+from . import speech_trim
+from . import multitrack
+from . import windowed
+from . import vad
+from . import turn_transcription
+from . import speaker_embeddings
+from . import speaker_registry
+from . import reclustering
+from . import incremental
+from .audio_utils import AudioInput
+from .cancellation import CancellationToken, StageWatchdog
 
 TEMP_DIR = Path(tempfile.gettempdir()) / "transcribe_meeting"
 TEMP_DIR.mkdir(exist_ok=True)
 
+# Cancellation tokens of the jobs currently being processed
+_active_jobs: Dict[str, CancellationToken] = {}
+_active_jobs_lock = threading.Lock()
+
+# How often a stage running in a worker process checks for cancellation
+WORKER_POLL_SECONDS = 0.5
+
+# Machine-readable result of a job, next to its transcript
+RESULT_FILENAME = "result.json"
+
 def cleanup_job_files(job_id: str) -> None:
     """
     Clean up temporary files for a completed job.
@@ -32,79 +65,1240 @@ def cleanup_job_files(job_id: str) -> None:
         except Exception as e:
             logging.error(f"Error cleaning up job directory {job_dir}: {e}")
 
-async def process_video(job_id: str, video_path: Path, jobs: Dict[str, Dict[str, Any]]) -> None:
+def _register_job(job_id: str) -> CancellationToken:
+    """Create and track the cancellation token of a starting job."""
+    token = CancellationToken()
+    with _active_jobs_lock:
+        _active_jobs[job_id] = token
+    return token
+
+def _unregister_job(job_id: str) -> None:
+    """Stop tracking a finished job."""
+    with _active_jobs_lock:
+        _active_jobs.pop(job_id, None)
+
+def cancel_job(job_id: str, reason: str = "Job cancelled by user") -> bool:
+    """
+    Cancel a running job.
+    
+    ffmpeg is killed immediately; diarization and transcription stop at
+    their next step or chunk boundary, after which the job releases its
+    models and memory.
+    
+    Args:
+        job_id: The job ID to cancel
+        reason: Message recorded on the job
+        
+    Returns:
+        True if the job was running and has been signalled
+    """
+    with _active_jobs_lock:
+        token = _active_jobs.get(job_id)
+    if token is None:
+        return False
+    token.cancel(reason)
+    return True
+
+def _update_job(jobs: Dict[str, Dict[str, Any]], job_id: str, **fields: Any) -> None:
+    """Update a job record, ignoring jobs deleted while they were running."""
+    job = jobs.get(job_id)
+    if job is not None:
+        job.update(fields)
+
+def speech_trim_settings() -> Dict[str, Any]:
+    """Speech trimming settings, part of the inference cache fingerprints when enabled."""
+    if not config.SPEECH_TRIM_ENABLED:
+        return {}
+    return {
+        "speech_trim": {
+            "threshold_db": config.SPEECH_TRIM_THRESHOLD_DB,
+            "min_silence_s": config.SPEECH_TRIM_MIN_SILENCE_S,
+            "padding_s": config.SPEECH_TRIM_PADDING_S,
+        }
+    }
+
+def _report_extraction_progress(
+    jobs: Dict[str, Dict[str, Any]],
+    job_id: str,
+    fraction: Optional[float],
+    speed: Optional[float]
+) -> None:
+    """Record extraction progress (percent) and ffmpeg's speed multiplier on a job."""
+    fields: Dict[str, Any] = {}
+    if fraction is not None:
+        fields["extraction_progress"] = round(fraction * 100, 1)
+    if speed is not None:
+        fields["extraction_speed"] = speed
+    if fields:
+        _update_job(jobs, job_id, **fields)
+
+def vad_settings() -> Dict[str, Any]:
+    """Shared VAD setting, part of the inference cache fingerprints when enabled."""
+    if not config.SHARED_VAD_ENABLED:
+        return {}
+    return {"shared_vad": True}
+
+def multitrack_settings() -> Dict[str, Any]:
+    """Multitrack settings, part of the inference cache fingerprints when enabled."""
+    if not config.MULTITRACK_ENABLED:
+        return {}
+    return {
+        "multitrack": {
+            "max_tracks": config.MULTITRACK_MAX_TRACKS,
+            "threshold_db": config.MULTITRACK_THRESHOLD_DB,
+            "dominance_db": config.MULTITRACK_DOMINANCE_DB,
+            "max_shared_activity": config.MULTITRACK_MAX_SHARED_ACTIVITY,
+        }
+    }
+
+def diarization_window() -> Optional[Tuple[float, float]]:
+    """
+    Window length and overlap for diarization, or None to diarize the whole file.
+    
+    The "windowed" pipeline mode always diarizes in windows, those of the
+    transcription unless DIARIZATION_WINDOW_SECONDS is set, so its peak
+    memory stays bounded.
+    """
+    if config.DIARIZATION_WINDOW_SECONDS > 0:
+        return config.DIARIZATION_WINDOW_SECONDS, config.DIARIZATION_WINDOW_OVERLAP_S
+    if config.PIPELINE_MODE == "windowed":
+        return config.WINDOW_SECONDS, config.WINDOW_OVERLAP_S
+    return None
+
+def diarization_settings(speaker_hints: Optional[Dict[str, int]] = None) -> Dict[str, Any]:
+    """Settings that influence the speaker turns, used as a cache fingerprint."""
+    settings = {
+        "pipeline": config.DIARIZATION_PIPELINE_NAME,
+        **speech_trim_settings(),
+        **multitrack_settings(),
+        **vad_settings(),
+    }
+    window = diarization_window()
+    if window is not None:
+        settings["window"] = {
+            "seconds": window[0],
+            "overlap_s": window[1],
+            "stitch_threshold": config.SPEAKER_STITCH_THRESHOLD,
+        }
+    if config.DIARIZATION_BACKEND == "onnx":
+        settings["backend"] = "onnx-int8" if config.DIARIZATION_ONNX_QUANTIZE else "onnx"
+    if speaker_hints:
+        settings["speaker_hints"] = dict(speaker_hints)
+    return settings
+
+def transcription_settings(speaker_hints: Optional[Dict[str, int]] = None) -> Dict[str, Any]:
+    """Settings that influence the transcription segments, used as a cache fingerprint."""
+    settings = {
+        "model": config.WHISPER_MODEL_SIZE,
+        "compute_type": config.WHISPER_COMPUTE_TYPE,
+        "beam_size": config.WHISPER_BEAM_SIZE,
+        **speech_trim_settings(),
+        **multitrack_settings(),
+        **vad_settings(),
+    }
+    if config.PIPELINE_MODE == "turns":
+        # Segments are cut along the speaker turns
+        settings["turns"] = {
+            "clip_max_s": config.TURN_CLIP_MAX_S,
+            "word_timestamps": config.TURN_WORD_TIMESTAMPS,
+            "diarization": diarization_settings(speaker_hints),
+        }
+    return settings
+
+def audio_settings() -> Dict[str, Any]:
+    """Settings that influence the extracted audio, used as a cache fingerprint."""
+    return {
+        "codec": audio_utils.INTERMEDIATE_CODECS[config.INTERMEDIATE_AUDIO_FORMAT],
+        "sample_rate": 16000,
+        "channels": 1,
+    }
+
+def diarize_audio(
+    diarization_pipeline: Any,
+    audio_path: AudioInput,
+    cancel_token: Optional[CancellationToken] = None,
+    speaker_hints: Optional[Dict[str, int]] = None,
+    artifacts: Optional[Dict[str, Any]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Run diarization and return the sorted speaker turns.
+    
+    The recording is diarized in windows when diarization_window() says so;
+    no artefacts are collected then.
+    
+    Args:
+        speaker_hints: Speaker-count hints from diarizer.speaker_hints()
+        artifacts: Optional dict receiving the pipeline's step artefacts,
+            for reclustering.save_state()
+    
+    Raises:
+        JobCancelled: If the job was cancelled during diarization
+        RuntimeError: If diarization fails
+    """
+    window = diarization_window()
+    if window is not None:
+        return windowed.diarize_windowed(
+            diarization_pipeline,
+            audio_path,
+            window[0],
+            window[1],
+            config.SPEAKER_STITCH_THRESHOLD,
+            cancel_token,
+            speaker_hints
+        )
+    diarization_result = diarizer.run_diarization(
+        diarization_pipeline, audio_path, cancel_token, **(speaker_hints or {}), artifacts=artifacts
+    )
+    if diarization_result is None:
+        if cancel_token is not None:
+            cancel_token.raise_if_cancelled()
+        raise RuntimeError("Diarization failed")
+    return diarizer.extract_speaker_turns(diarization_result)
+
+def diarize_speech(
+    diarization_pipeline: Any,
+    waveform: np.ndarray,
+    speech: List[Dict[str, int]],
+    cancel_token: Optional[CancellationToken] = None,
+    speaker_hints: Optional[Dict[str, int]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Diarize only the speech regions of a shared VAD pass.
+    
+    The speech is cut out of the waveform, diarized in one piece and the
+    turns are mapped back to the full audio.
+    
+    Raises:
+        JobCancelled: If the job was cancelled during diarization
+        RuntimeError: If diarization fails
+    """
+    speech_only, speech_map = speech_trim.cut_spans(waveform, vad.speech_spans(speech))
+    if speech_only.shape[0] == 0:
+        return []
+    speaker_turns = diarize_audio(diarization_pipeline, speech_only, cancel_token, speaker_hints)
+    return speech_trim.remap_speaker_turns(speaker_turns, speech_map)
+
+def transcribe_audio(
+    whisper_model: Any,
+    audio_path: AudioInput,
+    cancel_token: Optional[CancellationToken] = None,
+    clip_timestamps: Optional[List[Dict[str, Any]]] = None,
+    word_timestamps: bool = True
+) -> List[Dict[str, Any]]:
+    """
+    Run transcription and return the materialized segments.
+    
+    The segments are produced lazily, so a cancelled job stops at the next
+    segment boundary instead of decoding the rest of the audio.
+    
+    Raises:
+        JobCancelled: If the job was cancelled during transcription
+        RuntimeError: If transcription fails
+    """
+    raw_segments, _ = transcriber.run_transcription(
+        whisper_model, audio_path, clip_timestamps, word_timestamps
+    )
+    if raw_segments is None:
+        raise RuntimeError("Transcription failed")
+    segments = []
+    for segment in raw_segments:
+        if cancel_token is not None:
+            cancel_token.raise_if_cancelled()
+        segments.extend(transcriber.segments_to_dicts([segment]))
+    return segments
+
+def transcribe_clips(
+    whisper_model: Any,
+    audio: AudioInput,
+    clips: List[Dict[str, int]],
+    cancel_token: Optional[CancellationToken] = None,
+    word_timestamps: bool = True
+) -> List[List[Dict[str, Any]]]:
+    """
+    Transcribe sample ranges of the audio and return the segments of each one.
+    
+    See transcriber.segments_by_clip() for how segments map to their clip.
+    
+    Returns:
+        The segments of each clip, in the order of ``clips``
+    
+    Raises:
+        JobCancelled: If the job was cancelled during transcription
+        RuntimeError: If transcription fails
+    """
+    raw_segments, _ = transcriber.run_transcription(whisper_model, audio, clips, word_timestamps)
+    if raw_segments is None:
+        raise RuntimeError("Transcription failed")
+    clip_segments: List[List[Dict[str, Any]]] = [[] for _ in clips]
+    for index, segment in transcriber.segments_by_clip(raw_segments, clips, whisper_model.frames_per_second):
+        if cancel_token is not None:
+            cancel_token.raise_if_cancelled()
+        clip_segments[index].append(segment)
+    return clip_segments
+
+def align_and_save(
+    segments: List[Dict[str, Any]],
+    speaker_turns: List[Dict[str, Any]],
+    output_path: Path
+) -> List[Dict[str, Any]]:
+    """
+    Align words with speakers and save the transcript.
+    
+    Segments and turns from a multitrack recording carry the "track" they
+    came from; words are then only aligned with turns of their own track,
+    so crosstalk cannot move a word to another speaker. Segments from the
+    "turns" pipeline mode already carry their "speaker" and are not aligned.
+    
+    Returns:
+        List of aligned words with speaker information
+    """
+    if segments and "speaker" in segments[0]:
+        aligned_words = turn_transcription.segments_to_words(segments)
+    elif segments and speaker_turns and "track" in segments[0] and "track" in speaker_turns[0]:
+        aligned_words = []
+        for track in sorted({segment["track"] for segment in segments}):
+            aligned_words.extend(alignment.align_words_with_speakers(
+                [segment for segment in segments if segment["track"] == track],
+                [turn for turn in speaker_turns if turn["track"] == track]
+            ))
+        aligned_words.sort(key=lambda word: word["start"])
+    else:
+        aligned_words = alignment.align_words_with_speakers(segments, speaker_turns)
+    output_utils.save_transcript_with_speakers(aligned_words, output_path)
+    return aligned_words
+
+def save_job_result(
+    job_dir: Path,
+    speaker_turns: List[Dict[str, Any]],
+    aligned_words: List[Dict[str, Any]],
+    speaker_centroids: Optional[Dict[str, List[float]]] = None
+) -> bool:
+    """
+    Write the speaker turns, aligned words and optionally the speaker
+    embeddings of a job to its result document.
+    
+    Returns:
+        True if saved, False on error
+    """
+    path = job_dir / RESULT_FILENAME
+    tmp_path = path.with_suffix(".tmp")
+    result = {
+        "speaker_turns": speaker_turns,
+        "words": aligned_words,
+        "speaker_embeddings": speaker_centroids,
+    }
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(result, f)
+        os.replace(tmp_path, path)
+        return True
+    except (OSError, TypeError) as e:
+        logging.error(f"Could not save job result {path}: {e}")
+        return False
+
+def transcribe_audio_file(
+    audio_path: Path,
+    output_path: Path,
+    whisper_model: Any,
+    diarization_pipeline: Any,
+    speaker_hints: Optional[Dict[str, int]] = None,
+    state_dir: Optional[Path] = None
+) -> List[Dict[str, Any]]:
+    """
+    Diarize, transcribe and align an already extracted audio file.
+    
+    The models are passed in so that callers processing several files
+    (e.g. the CLI batch mode) only pay the model loading cost once.
+    
+    Args:
+        audio_path: Path to the extracted audio file
+        output_path: Path to write the speaker-attributed transcript to
+        whisper_model: Loaded Whisper model
+        diarization_pipeline: Loaded diarization pipeline
+        speaker_hints: Speaker-count hints from diarizer.speaker_hints()
+        state_dir: Directory to keep the diarization state in, so the
+            transcript can be re-clustered later with recluster_transcript()
+        
+    The stages follow run_job(): speech trimming, the shared VAD pass and
+    the "turns" pipeline mode apply here as well.
+    
+    Returns:
+        List of aligned words with speaker information; empty in "windowed"
+        pipeline mode, which writes the words without keeping them
+        
+    Raises:
+        RuntimeError: If diarization or transcription fails
+    """
+    cancel_token = CancellationToken()
+    if config.PIPELINE_MODE == "windowed":
+        speaker_turns = diarize_audio(diarization_pipeline, audio_path, cancel_token, speaker_hints)
+        windowed.transcribe_windowed(
+            str(audio_path),
+            lambda waveform: transcribe_audio(whisper_model, waveform),
+            speaker_turns,
+            str(output_path),
+            config.WINDOW_SECONDS,
+            config.WINDOW_OVERLAP_S
+        )
+        return []
+    
+    audio: AudioInput = audio_path
+    speaker_turns = None
+    segments = None
+    offset_map = None
+    if config.SPEECH_TRIM_ENABLED and config.PIPELINE_MODE != "turns":
+        audio, offset_map = _trim_speech(audio, cancel_token)
+        if offset_map.trimmed_duration == 0:
+            logging.info(f"No speech found in {audio_path.name}, skipping inference.")
+            speaker_turns, segments = [], []
+    
+    speech = None
+    if config.SHARED_VAD_ENABLED and segments is None:
+        audio, speech = _shared_vad(audio, None, cancel_token)
+    
+    artifacts = None
+    if speaker_turns is None:
+        if state_dir is not None and _keeps_diarization_state(offset_map, speech):
+            artifacts = {}
+        if speech is not None:
+            speaker_turns = diarize_speech(diarization_pipeline, audio, speech, cancel_token, speaker_hints)
+        else:
+            speaker_turns = diarize_audio(diarization_pipeline, audio, cancel_token, speaker_hints, artifacts)
+    
+    if segments is None and config.PIPELINE_MODE == "turns":
+        segments = _transcribe_turns_with_model(whisper_model, audio, speaker_turns, cancel_token)
+    if segments is None:
+        clips = vad.whisper_clips(speech) if speech is not None else None
+        segments = [] if clips == [] else transcribe_audio(whisper_model, audio, cancel_token, clips)
+    
+    if offset_map is not None:
+        speaker_turns = speech_trim.remap_speaker_turns(speaker_turns, offset_map)
+        segments = speech_trim.remap_segments(segments, offset_map)
+    if artifacts and reclustering.save_state(state_dir, artifacts):
+        reclustering.save_segments(state_dir, segments)
+    return align_and_save(segments, speaker_turns, output_path)
+
+def process_growing_file(
+    media_path: Path,
+    transcript_path: Path,
+    final: bool = False,
+    speaker_hints: Optional[Dict[str, int]] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    Transcribe the audio added to a growing recording since the last call.
+    
+    See incremental.process_tail(); the processed position and the speaker
+    centroids are kept next to the transcript, which is appended to.
+    
+    Args:
+        media_path: The recording, possibly still being written
+        transcript_path: Transcript to append to
+        final: The recording is complete; process it to the end
+        speaker_hints: Speaker-count hints from diarizer.speaker_hints()
+        
+    Returns:
+        Summary of the processed range, or None if it could not be processed
+        
+    Raises:
+        RuntimeError: If a model cannot be loaded
+    """
+    device = resource_manager.select_device()
+    with diarizer.resident_diarization_pipeline(
+        config.DIARIZATION_PIPELINE_NAME,
+        config.HUGGINGFACE_AUTH_TOKEN,
+        device
+    ) as diarization_pipeline, transcriber.ModelManager(
+        config.WHISPER_MODEL_SIZE,
+        device,
+        config.WHISPER_COMPUTE_TYPE
+    ) as whisper_model:
+        if diarization_pipeline is None:
+            raise RuntimeError("Failed to load diarization pipeline")
+        if whisper_model is None:
+            raise RuntimeError("Failed to load Whisper model")
+        return incremental.process_tail(
+            media_path,
+            transcript_path,
+            diarization_pipeline,
+            lambda waveform: transcribe_audio(whisper_model, waveform),
+            config.INCREMENTAL_OVERLAP_S,
+            config.INCREMENTAL_HOLDBACK_S,
+            config.SPEAKER_STITCH_THRESHOLD,
+            final,
+            speaker_hints
+        )
+
+def _keeps_diarization_state(
+    offset_map: Optional[speech_trim.OffsetMap] = None,
+    speech: Optional[List[Dict[str, int]]] = None
+) -> bool:
+    """
+    Whether the diarization state of a job is kept for re-clustering.
+    
+    Only whole-recording diarization of the untrimmed audio is supported:
+    its state refers to the same timeline as the transcription segments.
+    """
+    return (config.DIARIZATION_KEEP_STATE and config.PIPELINE_MODE == "full"
+            and diarization_window() is None and offset_map is None and speech is None)
+
+def recluster_transcript(
+    state_dir: Path,
+    output_path: Path,
+    speaker_hints: Optional[Dict[str, int]] = None,
+    threshold: Optional[float] = None,
+    device: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """
+    Re-cluster the speakers of a finished transcript and render it again.
+    
+    Only the clustering step of the diarization runs again, on the state
+    kept in ``state_dir``; the words are re-aligned to the new turns. A job
+    result document in ``state_dir`` is rewritten with the new turns and
+    words; its speaker embeddings belonged to the old speakers and are
+    dropped.
+    
+    Args:
+        state_dir: Directory holding the diarization state and segments
+            (the job directory for API jobs)
+        output_path: Path to write the speaker-attributed transcript to
+        speaker_hints: New speaker-count hints from diarizer.speaker_hints()
+        threshold: New clustering threshold
+        device: Device of the pipeline; selected automatically if None
+        
+    Returns:
+        List of aligned words with speaker information
+        
+    Raises:
+        RuntimeError: If there is no kept state or the pipeline cannot be loaded
+    """
+    state = reclustering.load_state(state_dir)
+    segments = reclustering.load_segments(state_dir)
+    if state is None or segments is None:
+        raise RuntimeError(f"No diarization state to re-cluster in {state_dir}")
+    
+    with diarizer.resident_diarization_pipeline(
+        config.DIARIZATION_PIPELINE_NAME,
+        config.HUGGINGFACE_AUTH_TOKEN,
+        device or resource_manager.select_device()
+    ) as diarization_pipeline:
+        if diarization_pipeline is None:
+            raise RuntimeError("Failed to load diarization pipeline")
+        speaker_turns = reclustering.recluster(diarization_pipeline, state, speaker_hints, threshold)
+    aligned_words = align_and_save(segments, speaker_turns, output_path)
+    if (state_dir / RESULT_FILENAME).exists():
+        save_job_result(state_dir, speaker_turns, aligned_words)
+    return aligned_words
+
+def _obtain_audio(
+    video_path: Path,
+    audio_path: Path,
+    cache: Optional[artifact_cache.ArtifactCache],
+    upload_hash: Optional[str],
+    cancel_token: Optional[CancellationToken] = None,
+    on_progress: Optional[audio_utils.ProgressCallback] = None,
+    extraction_mode: Optional[str] = None
+) -> AudioInput:
+    """
+    Extract the audio of a video, reusing a cached extraction if available.
+    
+    In "memory" extraction mode the audio is decoded through an ffmpeg
+    pipe and returned as a waveform, and no intermediate file is written.
+    In "shared" mode it is decoded once into a memory-mapped .npy file in
+    the job directory that every stage and worker process attaches to.
+    ``extraction_mode`` overrides config.AUDIO_EXTRACTION_MODE.
+    
+    Returns:
+        The audio file path or the decoded waveform
+    
+    Raises:
+        JobCancelled: If the job was cancelled during extraction
+        RuntimeError: If audio extraction fails
+    """
+    extraction_mode = extraction_mode or config.AUDIO_EXTRACTION_MODE
+    source_path = video_path
+    if cache is not None and upload_hash:
+        cached_audio = cache.get_file(upload_hash, "audio", audio_settings(), audio_path.suffix)
+        if cached_audio is not None:
+            logging.info("Reusing cached audio extraction.")
+            if extraction_mode != "shared":
+                shutil.copyfile(cached_audio, audio_path)
+                return audio_path
+            # Decoding the cached audio is much cheaper than the video
+            source_path = cached_audio
+
+    if extraction_mode == "shared":
+        shared_path = shared_audio.write_shared_waveform(source_path, audio_path.parent, cancel_token)
+        if shared_path is None:
+            if cancel_token is not None:
+                cancel_token.raise_if_cancelled()
+            raise RuntimeError("Failed to decode audio from video")
+        return shared_audio.attach_waveform(shared_path)
+
+    if extraction_mode == "memory":
+        waveform = audio_utils.decode_audio(video_path, cancel_token)
+        if waveform is None:
+            if cancel_token is not None:
+                cancel_token.raise_if_cancelled()
+            raise RuntimeError("Failed to decode audio from video")
+        return waveform
+
+    if not audio_utils.extract_audio_parallel(
+        video_path, audio_path, config.EXTRACTION_PARALLEL_RANGES, cancel_token,
+        min_duration=config.EXTRACTION_PARALLEL_MIN_S, on_progress=on_progress
+    ):
+        if cancel_token is not None:
+            cancel_token.raise_if_cancelled()
+        raise RuntimeError("Failed to extract audio from video")
+
+    if cache is not None and upload_hash:
+        cache.put_file(upload_hash, "audio", audio_settings(), audio_path, audio_path.suffix)
+    return audio_path
+
+async def process_video(
+    job_id: str,
+    video_path: Path,
+    jobs: Dict[str, Dict[str, Any]],
+    upload_hash: Optional[str] = None,
+    speaker_hints: Optional[Dict[str, int]] = None,
+    with_embeddings: bool = False
+) -> bool:
     """
     Process the video file asynchronously in the background.
     
+    The blocking work runs in a worker thread so the event loop (and the
+    API) stays responsive while a job is being processed.
+    
+    Args:
+        job_id: The job identifier 
+        video_path: Path to the video file
+        jobs: Dictionary to store job status and metadata
+        upload_hash: Optional SHA-256 of the uploaded file
+        speaker_hints: Speaker-count hints from diarizer.speaker_hints()
+        with_embeddings: Include speaker embeddings in the job result
+        
+    Returns:
+        See run_job()
+    """
+    return await asyncio.to_thread(run_job, job_id, video_path, jobs, upload_hash, speaker_hints, with_embeddings)
+
+def run_job(
+    job_id: str,
+    video_path: Path,
+    jobs: Dict[str, Dict[str, Any]],
+    upload_hash: Optional[str] = None,
+    speaker_hints: Optional[Dict[str, int]] = None,
+    with_embeddings: bool = False
+) -> bool:
+    """
+    Process the video file synchronously.
+    
+    When an upload hash is given, artifacts from earlier jobs on the same
+    content and settings are reused from the artifact cache, and newly
+    computed ones are stored there. Besides the transcript, the job
+    directory receives a result document (see save_job_result()).
+    
     Args:
         job_id: The job identifier 
         video_path: Path to the video file
         jobs: Dictionary to store job status and metadata
+        upload_hash: Optional SHA-256 of the uploaded file
+        speaker_hints: Speaker-count hints from diarizer.speaker_hints()
+        with_embeddings: Compute a centroid embedding per speaker and include
+            it in the result document, e.g. for a sharding coordinator
+        
+    Returns:
+        True if the job completed after running inference, i.e. its
+        processing time is representative for the scheduler; False for
+        failed, cancelled, deleted and fully cached jobs
     """
-    jobs[job_id]["status"] = "processing"
-    jobs[job_id]["message"] = "Processing started"
+    if job_id not in jobs:
+        logging.info(f"Job {job_id} was deleted before it started, skipping.")
+        return False
+    cancel_token = _register_job(job_id)
+    _update_job(jobs, job_id, status="processing", message="Processing started")
     
     job_dir = TEMP_DIR / job_id
     job_dir.mkdir(exist_ok=True)
     
-    audio_path = job_dir / "audio.wav"
+    audio_path = job_dir / f"audio.{config.INTERMEDIATE_AUDIO_FORMAT}"
     output_path = job_dir / "transcript.txt"
+    cache = artifact_cache.get_artifact_cache() if upload_hash else None
+    completed = False
+    ran_inference = True
     
     try:
-        # Extract audio
-        if not audio_utils.extract_audio(video_path, audio_path):
-            raise RuntimeError("Failed to extract audio from video")
+        if config.PIPELINE_MODE == "windowed":
+            _run_windowed(
+                job_id, jobs, video_path, audio_path, output_path, cache, upload_hash, cancel_token,
+                speaker_hints
+            )
+        else:
+            speaker_turns = None
+            segments = None
+            speaker_centroids = None
+            diarization_artifacts = None
+            registry = speaker_registry.get_speaker_registry()
+            needs_centroids = registry is not None or with_embeddings
+            if cache is not None:
+                speaker_turns = cache.get_json(upload_hash, "speaker_turns", diarization_settings(speaker_hints))
+                segments = cache.get_json(upload_hash, "segments", transcription_settings(speaker_hints))
+                if needs_centroids and speaker_turns is not None:
+                    speaker_centroids = cache.get_json(
+                        upload_hash, "speaker_embeddings", diarization_settings(speaker_hints)
+                    )
+                if speaker_turns is not None and segments is not None:
+                    logging.info(f"Job {job_id}: all artifacts found in cache, skipping inference.")
+                    ran_inference = False
         
-        # Load models
-        device = resource_manager.select_device()
+            turns_cached = speaker_turns is not None
+            segments_cached = segments is not None
+            if (speaker_turns is None or segments is None) and config.MULTITRACK_ENABLED:
+                # One participant per track: turns come from per-track activity
+                with StageWatchdog(cancel_token, "extraction", config.STAGE_TIMEOUT_EXTRACTION_S):
+                    tracks = _load_separated_tracks(video_path, cancel_token)
+                if tracks is not None:
+                    device = resource_manager.select_device()
+                    if speaker_turns is None:
+                        speaker_turns = tracks["speaker_turns"]
+                        if needs_centroids and speaker_turns:
+                            with StageWatchdog(cancel_token, "diarization", config.STAGE_TIMEOUT_DIARIZATION_S):
+                                speaker_centroids = _embed_track_speakers(tracks, device)
+                    if segments is None:
+                        with StageWatchdog(cancel_token, "transcription", config.STAGE_TIMEOUT_TRANSCRIPTION_S):
+                            segments = _transcribe_tracks(tracks, device, cancel_token)
+                    del tracks
         
-        # Use Whisper model
-        with transcriber.ModelManager(
-            config.WHISPER_MODEL_SIZE, 
-            device,
-            config.WHISPER_COMPUTE_TYPE
-        ) as whisper_model:
-            if whisper_model is None:
-                raise RuntimeError("Failed to load Whisper model")
-                
-            # Load diarization pipeline
-            diarization_pipeline = diarizer.load_diarization_pipeline(
-                config.DIARIZATION_PIPELINE_NAME, 
-                config.HUGGINGFACE_AUTH_TOKEN
-            )
-            if diarization_pipeline is None:
-                raise RuntimeError("Failed to load diarization pipeline")
-                
-            # Run diarization
-            diarization_result = diarizer.run_diarization(diarization_pipeline, audio_path)
-            if diarization_result is None:
-                raise RuntimeError("Diarization failed")
-                
-            speaker_turns = diarizer.extract_speaker_turns(diarization_result)
+            if speaker_turns is None or segments is None:
+                # Extract audio
+                with StageWatchdog(cancel_token, "extraction", config.STAGE_TIMEOUT_EXTRACTION_S):
+                    audio = _obtain_audio(
+                        video_path, audio_path, cache, upload_hash, cancel_token,
+                        on_progress=lambda fraction, speed: _report_extraction_progress(jobs, job_id, fraction, speed)
+                    )
             
-            # Run transcription
-            raw_segments, _ = transcriber.run_transcription(whisper_model, audio_path)
-            if raw_segments is None:
-                raise RuntimeError("Transcription failed")
-                
-            segments_list = list(raw_segments)
+                offset_map = None
+                if config.SPEECH_TRIM_ENABLED and config.PIPELINE_MODE != "turns":
+                    audio, offset_map = _trim_speech(audio, cancel_token)
+                    _update_job(jobs, job_id, speech_removed_fraction=offset_map.removed_fraction)
+                    if offset_map.trimmed_duration == 0:
+                        logging.info(f"Job {job_id}: no speech found, skipping inference.")
+                        ran_inference = False
+                        speaker_turns = speaker_turns if turns_cached else []
+                        segments = segments if segments_cached else []
+            
+                # One VAD pass for both stages
+                speech = None
+                if config.SHARED_VAD_ENABLED and (speaker_turns is None or segments is None):
+                    audio, speech = _shared_vad(audio, job_dir, cancel_token)
             
-            # Align speakers with words
-            aligned_words = alignment.align_words_with_speakers(segments_list, speaker_turns)
+                # Load models
+                device = resource_manager.select_device()
             
-            # Save transcript
-            output_utils.save_transcript_with_speakers(aligned_words, output_path)
+                shared_path = job_dir / shared_audio.SHARED_AUDIO_FILENAME
+                if (speaker_turns is None and segments is None and offset_map is None and speech is None
+                        and config.PARALLEL_STAGES and config.PIPELINE_MODE != "turns"
+                        and shared_path.exists()):
+                    speaker_turns, segments = _run_parallel_stages(
+                        shared_path, audio, device, cancel_token, speaker_hints
+                    )
+            
+                if speaker_turns is None:
+                    if _keeps_diarization_state(offset_map, speech):
+                        diarization_artifacts = {}
+                    with StageWatchdog(cancel_token, "diarization", config.STAGE_TIMEOUT_DIARIZATION_S):
+                        speaker_turns = _run_diarization_stage(
+                            audio, device, cancel_token, speech, speaker_hints, diarization_artifacts
+                        )
+            
+                if segments is None and config.PIPELINE_MODE == "turns":
+                    with StageWatchdog(cancel_token, "transcription", config.STAGE_TIMEOUT_TRANSCRIPTION_S):
+                        segments = _run_turn_transcription(audio, speaker_turns, device, cancel_token)
+                
+                if segments is None:
+                    clips = vad.whisper_clips(speech) if speech is not None else None
+                    with StageWatchdog(cancel_token, "transcription", config.STAGE_TIMEOUT_TRANSCRIPTION_S):
+                        segments = _run_transcription_stage(audio, device, cancel_token, clips)
             
-            # Update job status
-            jobs[job_id]["status"] = "completed"
-            jobs[job_id]["message"] = "Processing completed successfully"
-            jobs[job_id]["output_file"] = str(output_path)
+                if needs_centroids and not turns_cached and speaker_turns:
+                    with StageWatchdog(cancel_token, "diarization", config.STAGE_TIMEOUT_DIARIZATION_S):
+                        speaker_centroids = _embed_job_speakers(audio, speaker_turns, device)
+            
+                # Translate newly computed results from trimmed to original time
+                if offset_map is not None:
+                    if not turns_cached:
+                        speaker_turns = speech_trim.remap_speaker_turns(speaker_turns, offset_map)
+                    if not segments_cached:
+                        segments = speech_trim.remap_segments(segments, offset_map)
+        
+            if cache is not None and not turns_cached:
+                cache.put_json(upload_hash, "speaker_turns", diarization_settings(speaker_hints), speaker_turns)
+                if speaker_centroids:
+                    cache.put_json(
+                        upload_hash, "speaker_embeddings", diarization_settings(speaker_hints), speaker_centroids
+                    )
+            if cache is not None and not segments_cached:
+                cache.put_json(upload_hash, "segments", transcription_settings(speaker_hints), segments)
+        
+            # Keep what re-clustering needs in the job directory
+            if diarization_artifacts and reclustering.save_state(job_dir, diarization_artifacts):
+                reclustering.save_segments(job_dir, segments)
+        
+            if registry is not None and speaker_centroids:
+                speaker_turns, segments, speaker_centroids = _identify_speakers(
+                    jobs, job_id, registry, speaker_turns, segments, speaker_centroids
+                )
+        
+            # Align speakers with words and save transcript
+            cancel_token.raise_if_cancelled()
+            aligned_words = align_and_save(segments, speaker_turns, output_path)
+            save_job_result(
+                job_dir, speaker_turns, aligned_words or [],
+                speaker_centroids if with_embeddings else None
+            )
+        
+        # Update job status
+        _update_job(
+            jobs, job_id,
+            status="completed",
+            message="Processing completed successfully",
+            output_file=str(output_path)
+        )
+        completed = True
             
     except Exception as e:
-        logging.exception(f"Error processing job {job_id}: {e}")
-        jobs[job_id]["status"] = "failed"
-        jobs[job_id]["message"] = f"Processing failed: {str(e)}"
+        if cancel_token.cancelled:
+            logging.warning(f"Job {job_id} stopped: {cancel_token.reason}")
+            _update_job(jobs, job_id, status="cancelled", message=cancel_token.reason)
+        else:
+            logging.exception(f"Error processing job {job_id}: {e}")
+            _update_job(jobs, job_id, status="failed", message=f"Processing failed: {str(e)}")
         
     finally:
         # Clean up resources
-        resource_manager.cleanup_gpu_memory()
\ No newline at end of file
+        _unregister_job(job_id)
+        resource_manager.release_memory()
+        if job_id not in jobs:
+            # The job was deleted while it was running
+            cleanup_job_files(job_id)
+    return completed and ran_inference
+
+def _run_diarization_stage(
+    audio_path: AudioInput,
+    device: str,
+    cancel_token: CancellationToken,
+    speech: Optional[List[Dict[str, int]]] = None,
+    speaker_hints: Optional[Dict[str, int]] = None,
+    artifacts: Optional[Dict[str, Any]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Diarize the job audio with the resident pipeline for the job's device.
+    
+    The pipeline stays loaded between jobs until it has been idle for
+    config.DIARIZATION_PIPELINE_IDLE_S seconds. Given the speech regions of
+    a shared VAD pass (``audio_path`` is then a waveform), only the speech
+    is diarized and the turns are mapped back to the full audio.
+    ``speaker_hints`` come from diarizer.speaker_hints(). ``artifacts``
+    receives the pipeline's step artefacts for re-clustering; it is only
+    filled when the whole audio is diarized in one piece.
+    """
+    with diarizer.resident_diarization_pipeline(
+        config.DIARIZATION_PIPELINE_NAME, 
+        config.HUGGINGFACE_AUTH_TOKEN,
+        device
+    ) as diarization_pipeline:
+        if diarization_pipeline is None:
+            raise RuntimeError("Failed to load diarization pipeline")
+        if speech is not None:
+            return diarize_speech(diarization_pipeline, audio_path, speech, cancel_token, speaker_hints)
+        return diarize_audio(diarization_pipeline, audio_path, cancel_token, speaker_hints, artifacts)
+
+def _embed_job_speakers(
+    audio: AudioInput,
+    speaker_turns: List[Dict[str, Any]],
+    device: str
+) -> Dict[str, List[float]]:
+    """
+    Compute a centroid embedding per speaker of the job, for the speaker registry.
+    
+    Returns:
+        JSON-serializable embedding per speaker label, empty if the
+        embeddings cannot be computed
+    """
+    waveform = audio if isinstance(audio, np.ndarray) else audio_utils.decode_audio(str(audio))
+    if waveform is None:
+        return {}
+    with diarizer.resident_diarization_pipeline(
+        config.DIARIZATION_PIPELINE_NAME,
+        config.HUGGINGFACE_AUTH_TOKEN,
+        device
+    ) as diarization_pipeline:
+        if diarization_pipeline is None:
+            return {}
+        embeddings = speaker_embeddings.embed_speakers(diarization_pipeline, waveform, speaker_turns)
+    return {label: embedding.tolist() for label, embedding in embeddings.items()}
+
+def _embed_track_speakers(
+    tracks: Dict[str, Any],
+    device: str
+) -> Dict[str, List[float]]:
+    """
+    Compute the centroid embedding of each speaker of a multitrack recording.
+    
+    Every speaker is embedded from its own track, where no one else talks.
+    
+    Returns:
+        See _embed_job_speakers()
+    """
+    centroids: Dict[str, List[float]] = {}
+    for track, waveform in enumerate(tracks["waveforms"]):
+        track_turns = [turn for turn in tracks["speaker_turns"] if turn["track"] == track]
+        if track_turns:
+            centroids.update(_embed_job_speakers(waveform, track_turns, device))
+    if not centroids:
+        logging.warning("Could not embed the speakers of the multitrack recording; "
+                        "no speaker identification or embeddings for this job.")
+    return centroids
+
+def _identify_speakers(
+    jobs: Dict[str, Dict[str, Any]],
+    job_id: str,
+    registry: speaker_registry.SpeakerRegistry,
+    speaker_turns: List[Dict[str, Any]],
+    segments: List[Dict[str, Any]],
+    speaker_centroids: Dict[str, List[float]]
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], Dict[str, List[float]]]:
+    """
+    Replace the job's speaker labels by the names of registered voices.
+    
+    The identities (name and confidence per label) are stored in the job
+    record as "speakers".
+    
+    Returns:
+        The renamed speaker turns, segments and speaker centroids
+    """
+    embeddings = {
+        label: np.asarray(vector, dtype=np.float32) for label, vector in speaker_centroids.items()
+    }
+    identities = speaker_registry.identify_speakers(
+        registry,
+        embeddings,
+        speaker_embeddings.speaker_durations(speaker_turns),
+        config.SPEAKER_REGISTRY_THRESHOLD,
+        config.SPEAKER_REGISTRY_ENROLL
+    )
+    _update_job(jobs, job_id, speakers=identities)
+    return (
+        speaker_registry.rename_speakers(speaker_turns, identities),
+        speaker_registry.rename_speakers(segments, identities),
+        {identities[label]["name"] if label in identities else label: vector
+         for label, vector in speaker_centroids.items()},
+    )
+
+def _run_transcription_stage(
+    audio_path: AudioInput,
+    device: str,
+    cancel_token: CancellationToken,
+    clips: Optional[List[Dict[str, Any]]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Transcribe the job audio with a job-local model or the shared service.
+    
+    ``clips`` from a shared VAD pass replace Whisper's own VAD.
+    """
+    if clips is not None and not clips:
+        return []
+    if config.INFERENCE_SERVICE_ENABLED:
+        # Batch this job's chunks together with other running jobs
+        return inference_service.get_inference_service().transcribe(audio_path, cancel_token, clips)
+
+    # Use Whisper model
+    with transcriber.ModelManager(
+        config.WHISPER_MODEL_SIZE, 
+        device,
+        config.WHISPER_COMPUTE_TYPE
+    ) as whisper_model:
+        if whisper_model is None:
+            raise RuntimeError("Failed to load Whisper model")
+        return transcribe_audio(whisper_model, audio_path, cancel_token, clips)
+
+def _run_turn_transcription(
+    audio: AudioInput,
+    speaker_turns: List[Dict[str, Any]],
+    device: str,
+    cancel_token: CancellationToken
+) -> List[Dict[str, Any]]:
+    """
+    Transcribe the speaker turns as single-speaker clips ("turns" pipeline mode).
+    
+    Returns:
+        Segments tagged with their "speaker"
+    """
+    total_samples = audio_utils.audio_samples(audio)
+    if config.INFERENCE_SERVICE_ENABLED:
+        service = inference_service.get_inference_service()
+        return turn_transcription.transcribe_turns(
+            lambda clips: service.transcribe_clips(audio, cancel_token, clips, config.TURN_WORD_TIMESTAMPS),
+            speaker_turns,
+            config.TURN_CLIP_MAX_S,
+            total_samples
+        )
+    
+    with transcriber.ModelManager(
+        config.WHISPER_MODEL_SIZE,
+        device,
+        config.WHISPER_COMPUTE_TYPE
+    ) as whisper_model:
+        if whisper_model is None:
+            raise RuntimeError("Failed to load Whisper model")
+        return _transcribe_turns_with_model(whisper_model, audio, speaker_turns, cancel_token)
+
+def _transcribe_turns_with_model(
+    whisper_model: Any,
+    audio: AudioInput,
+    speaker_turns: List[Dict[str, Any]],
+    cancel_token: Optional[CancellationToken] = None
+) -> List[Dict[str, Any]]:
+    """
+    Transcribe the speaker turns as single-speaker clips with a loaded model.
+    
+    Returns:
+        Segments tagged with their "speaker"
+    """
+    return turn_transcription.transcribe_turns(
+        lambda clips: transcribe_clips(
+            whisper_model, audio, clips, cancel_token, config.TURN_WORD_TIMESTAMPS
+        ),
+        speaker_turns,
+        config.TURN_CLIP_MAX_S,
+        audio_utils.audio_samples(audio)
+    )
+
+def _shared_vad(
+    audio: AudioInput,
+    job_dir: Optional[Path],
+    cancel_token: CancellationToken
+) -> Tuple[np.ndarray, List[Dict[str, int]]]:
+    """
+    Run (or reuse) the job's VAD pass.
+    
+    The speech regions are kept in ``job_dir``; without one they are not
+    stored.
+    
+    Returns:
+        Tuple of (the audio as a waveform, speech regions in samples)
+    
+    Raises:
+        JobCancelled: If the job was cancelled while decoding
+        RuntimeError: If the audio file cannot be decoded
+    """
+    if not isinstance(audio, np.ndarray):
+        waveform = audio_utils.decode_audio(str(audio), cancel_token)
+        if waveform is None:
+            cancel_token.raise_if_cancelled()
+            raise RuntimeError("Failed to decode audio for voice activity detection")
+        audio = waveform
+    if job_dir is None:
+        return audio, vad.detect_speech(audio)
+    return audio, vad.load_or_detect(audio, job_dir)
+
+def _run_parallel_stages(
+    shared_path: Path,
+    audio: AudioInput,
+    device: str,
+    cancel_token: CancellationToken,
+    speaker_hints: Optional[Dict[str, int]] = None
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Diarize in a worker process while transcribing in this one.
+    
+    The worker attaches to the shared memory-mapped waveform, so both
+    stages read the same page-cache copy of the audio. Cancelling the job
+    terminates the worker.
+    
+    Returns:
+        Tuple of (speaker turns, transcription segments)
+    
+    Raises:
+        JobCancelled: If the job was cancelled during either stage
+        RuntimeError: If diarization or transcription fails
+    """
+    pool = multiprocessing.get_context("spawn").Pool(processes=1)
+    try:
+        with StageWatchdog(cancel_token, "diarization", config.STAGE_TIMEOUT_DIARIZATION_S):
+            pending_turns = pool.apply_async(
+                diarizer.diarize_shared_waveform,
+                (str(shared_path), config.DIARIZATION_PIPELINE_NAME, config.HUGGINGFACE_AUTH_TOKEN, device,
+                 speaker_hints)
+            )
+            with StageWatchdog(cancel_token, "transcription", config.STAGE_TIMEOUT_TRANSCRIPTION_S):
+                segments = _run_transcription_stage(audio, device, cancel_token)
+            while True:
+                cancel_token.raise_if_cancelled()
+                try:
+                    speaker_turns = pending_turns.get(timeout=WORKER_POLL_SECONDS)
+                    break
+                except multiprocessing.TimeoutError:
+                    continue
+    finally:
+        pool.terminate()
+        pool.join()
+    if speaker_turns is None:
+        raise RuntimeError("Diarization failed")
+    return speaker_turns, segments
+
+def _trim_speech(
+    audio: AudioInput,
+    cancel_token: CancellationToken
+) -> Tuple[AudioInput, speech_trim.OffsetMap]:
+    """
+    Cut long non-speech spans out of the job audio.
+    
+    Returns:
+        Tuple of (trimmed waveform, offset map back to original time)
+    
+    Raises:
+        JobCancelled: If the job was cancelled while decoding
+        RuntimeError: If the audio file cannot be decoded
+    """
+    if isinstance(audio, np.ndarray):
+        waveform = audio
+    else:
+        waveform = audio_utils.decode_audio(audio, cancel_token)
+        if waveform is None:
+            cancel_token.raise_if_cancelled()
+            raise RuntimeError("Failed to decode audio for speech trimming")
+    return speech_trim.trim_silence(
+        waveform,
+        threshold_db=config.SPEECH_TRIM_THRESHOLD_DB,
+        min_silence_seconds=config.SPEECH_TRIM_MIN_SILENCE_S,
+        padding_seconds=config.SPEECH_TRIM_PADDING_S
+    )
+
+def _load_separated_tracks(
+    video_path: Path,
+    cancel_token: CancellationToken
+) -> Optional[Dict[str, Any]]:
+    """
+    Decode the tracks of a multitrack recording and derive speaker turns.
+    
+    Returns:
+        See multitrack.load_separated_tracks(); None for ordinary recordings
+    """
+    return multitrack.load_separated_tracks(
+        str(video_path),
+        cancel_token,
+        max_tracks=config.MULTITRACK_MAX_TRACKS,
+        threshold_db=config.MULTITRACK_THRESHOLD_DB,
+        dominance_db=config.MULTITRACK_DOMINANCE_DB,
+        max_shared_activity=config.MULTITRACK_MAX_SHARED_ACTIVITY
+    )
+
+def _transcribe_tracks(
+    tracks: Dict[str, Any],
+    device: str,
+    cancel_token: CancellationToken
+) -> List[Dict[str, Any]]:
+    """
+    Transcribe the tracks of a multitrack recording in parallel.
+    
+    Tracks without any speaker turn are skipped. The tracks share the
+    job's Whisper model, or are batched together by the shared inference
+    service when it is enabled.
+    
+    Returns:
+        Segments of all tracks, sorted by start and tagged with their "track"
+    """
+    active_tracks = sorted({turn["track"] for turn in tracks["speaker_turns"]})
+    if not active_tracks:
+        return []
+    
+    if config.INFERENCE_SERVICE_ENABLED:
+        model_context = contextlib.nullcontext(None)
+    else:
+        model_context = transcriber.ModelManager(
+            config.WHISPER_MODEL_SIZE,
+            device,
+            config.WHISPER_COMPUTE_TYPE
+        )
+    with model_context as whisper_model:
+        if whisper_model is None and not config.INFERENCE_SERVICE_ENABLED:
+            raise RuntimeError("Failed to load Whisper model")
+        
+        def transcribe_track(track: int) -> List[Dict[str, Any]]:
+            waveform = tracks["waveforms"][track]
+            if whisper_model is None:
+                track_segments = inference_service.get_inference_service().transcribe(waveform, cancel_token)
+            else:
+                track_segments = transcribe_audio(whisper_model, waveform, cancel_token)
+            return [dict(segment, track=track) for segment in track_segments]
+        
+        with ThreadPoolExecutor(max_workers=len(active_tracks)) as executor:
+            per_track = list(executor.map(transcribe_track, active_tracks))
+    segments = [segment for track_segments in per_track for segment in track_segments]
+    return sorted(segments, key=lambda segment: segment["start"])
+
+def _run_windowed(
+    job_id: str,
+    jobs: Dict[str, Dict[str, Any]],
+    video_path: Path,
+    audio_path: Path,
+    output_path: Path,
+    cache: Optional[artifact_cache.ArtifactCache],
+    upload_hash: Optional[str],
+    cancel_token: CancellationToken,
+    speaker_hints: Optional[Dict[str, int]] = None
+) -> None:
+    """
+    Diarize, then transcribe and write the transcript window by window.
+    
+    The audio is always extracted to a file, which diarization reads and
+    the windows are decoded from, so memory stays bounded by the window
+    size. Speech trimming and the multitrack fast path are not applied, and
+    only the speaker turns are cached; segments are never held in full.
+    """
+    speaker_turns = None
+    if cache is not None:
+        speaker_turns = cache.get_json(upload_hash, "speaker_turns", diarization_settings(speaker_hints))
+    turns_cached = speaker_turns is not None
+    
+    with StageWatchdog(cancel_token, "extraction", config.STAGE_TIMEOUT_EXTRACTION_S):
+        audio = _obtain_audio(
+            video_path, audio_path, cache, upload_hash, cancel_token,
+            on_progress=lambda fraction, speed: _report_extraction_progress(jobs, job_id, fraction, speed),
+            extraction_mode="file"
+        )
+    
+    device = resource_manager.select_device()
+    if speaker_turns is None:
+        with StageWatchdog(cancel_token, "diarization", config.STAGE_TIMEOUT_DIARIZATION_S):
+            speaker_turns = _run_diarization_stage(audio, device, cancel_token, speaker_hints=speaker_hints)
+    if cache is not None and not turns_cached:
+        cache.put_json(upload_hash, "speaker_turns", diarization_settings(speaker_hints), speaker_turns)
+    
+    if config.INFERENCE_SERVICE_ENABLED:
+        model_context = contextlib.nullcontext(None)
+    else:
+        model_context = transcriber.ModelManager(
+            config.WHISPER_MODEL_SIZE,
+            device,
+            config.WHISPER_COMPUTE_TYPE
+        )
+    with StageWatchdog(cancel_token, "transcription", config.STAGE_TIMEOUT_TRANSCRIPTION_S), \
+            model_context as whisper_model:
+        if whisper_model is None and not config.INFERENCE_SERVICE_ENABLED:
+            raise RuntimeError("Failed to load Whisper model")
+        
+        def transcribe_window(waveform: np.ndarray) -> List[Dict[str, Any]]:
+            if whisper_model is None:
+                return inference_service.get_inference_service().transcribe(waveform, cancel_token)
+            return transcribe_audio(whisper_model, waveform, cancel_token)
+        
+        windowed.transcribe_windowed(
+            str(audio),
+            transcribe_window,
+            speaker_turns,
+            str(output_path),
+            config.WINDOW_SECONDS,
+            config.WINDOW_OVERLAP_S,
+            cancel_token
+        )
@@ -5,10 +5,23 @@ import torch
 import os
 import shutil
 import platform
+import threading
+import warnings
+from contextlib import contextmanager
 from pathlib import Path
 from pyannote.audio import Pipeline
 import logging
-from typing import Optional, Any, List, Dict
+from typing import Optional, Any, List, Dict, Callable, Iterator, Tuple
+
+import numpy as np
+
+from . import audio_utils
+from . import config
+from . import onnx_backend
+from . import resource_manager
+from . import shared_audio
+from .audio_utils import AudioInput
+from .cancellation import CancellationToken, JobCancelled
 
 
 # Set environment variable to disable symlinks warning and use direct copies instead
@@ -55,30 +68,47 @@ def windows_workaround_for_pyannote():
 
 def load_diarization_pipeline(
     pipeline_name: str,
-    auth_token: Optional[str] = None
+    auth_token: Optional[str] = None,
+    device: Optional[str] = None,
+    backend: Optional[str] = None
 ) -> Optional[Pipeline]:
     """Load the pyannote.audio diarization pipeline.
     
     Args:
         pipeline_name: Name of the pipeline to load
         auth_token: Optional Hugging Face authentication token
+        device: Device chosen by resource_manager.select_device(); if None,
+            the pipeline is placed on the GPU whenever one exists
+        backend: "torch", or "onnx" to run the models of a CPU pipeline
+            under ONNX Runtime; config.DIARIZATION_BACKEND if None
         
     Returns:
         Loaded pipeline or None if loading failed
     """
-    logging.info(f"Loading speaker diarization pipeline: {pipeline_name}...")
+    if device is None:
+        device = "cuda" if torch.cuda.is_available() else "cpu"
+    logging.info(f"Loading speaker diarization pipeline: {pipeline_name} ({device})...")
     
     # Apply Windows workaround
     windows_workaround_for_pyannote()
     
+    start_load = time.time()
     try:
         pipeline = Pipeline.from_pretrained(
             pipeline_name,
             use_auth_token=auth_token
         )
-        if torch.cuda.is_available():
-            pipeline.to(torch.device("cuda"))
-        logging.info("Diarization pipeline loaded successfully.")
+        if device != "cpu":
+            pipeline.to(torch.device(device))
+        elif (backend or config.DIARIZATION_BACKEND) == "onnx":
+            onnx_backend.use_onnx_runtime(
+                pipeline,
+                pipeline_name,
+                config.DIARIZATION_ONNX_DIR,
+                config.DIARIZATION_ONNX_THREADS,
+                config.DIARIZATION_ONNX_QUANTIZE
+            )
+        logging.info(f"Diarization pipeline loaded in {time.time() - start_load:.2f} seconds.")
         return pipeline
     except Exception as e:
         logging.error(f"Error loading diarization pipeline: {e}")
@@ -87,12 +117,228 @@ def load_diarization_pipeline(
         return None
 
 
-def run_diarization(pipeline: Optional[Pipeline], audio_path: str) -> Any:
+class _ResidentPipeline:
+    """A cached pipeline, used by one job at a time."""
+
+    def __init__(self, pipeline: Pipeline):
+        self.pipeline = pipeline
+        self.lock = threading.Lock()
+        self.last_used = time.monotonic()
+
+
+# Resident pipelines keyed by (pipeline name, device)
+_resident_pipelines: Dict[Tuple[str, str], _ResidentPipeline] = {}
+_resident_lock = threading.Lock()
+# Held while a pipeline is being loaded, so loads of other keys, lookups
+# and eviction do not wait for a slow load (or ONNX export)
+_loading_locks: Dict[Tuple[str, str], threading.Lock] = {}
+_evictor: Optional[threading.Thread] = None
+
+
+def evict_idle_pipelines(idle_seconds: float) -> int:
+    """Drop resident pipelines that have not been used for a while.
+    
+    Pipelines in use by a job are never evicted.
+    
+    Args:
+        idle_seconds: Minimum idle time of an evicted pipeline
+        
+    Returns:
+        Number of pipelines evicted
+    """
+    now = time.monotonic()
+    evicted = 0
+    with _resident_lock:
+        for key, resident in list(_resident_pipelines.items()):
+            if not resident.lock.acquire(blocking=False):
+                continue
+            try:
+                if now - resident.last_used >= idle_seconds:
+                    del _resident_pipelines[key]
+                    evicted += 1
+                    logging.info(f"Evicted idle diarization pipeline {key[0]} ({key[1]}).")
+            finally:
+                resident.lock.release()
+    if evicted:
+        resource_manager.release_memory()
+    return evicted
+
+
+def _run_evictor() -> None:
+    """Periodically evict idle pipelines, for the lifetime of the process."""
+    idle_seconds = config.DIARIZATION_PIPELINE_IDLE_S
+    while True:
+        time.sleep(min(idle_seconds, 60.0))
+        evict_idle_pipelines(idle_seconds)
+
+
+def _resident_pipeline(
+    pipeline_name: str,
+    auth_token: Optional[str],
+    device: str
+) -> Optional[_ResidentPipeline]:
+    """Get or load the resident pipeline for a name and device.
+    
+    The pipeline is loaded outside the module-wide lock; concurrent
+    requests for the same key wait for a single load.
+    """
+    global _evictor
+    key = (pipeline_name, device)
+    with _resident_lock:
+        resident = _resident_pipelines.get(key)
+        if resident is not None:
+            logging.info(f"Reusing resident diarization pipeline: {pipeline_name} ({device}).")
+            return resident
+        loading_lock = _loading_locks.setdefault(key, threading.Lock())
+    
+    with loading_lock:
+        with _resident_lock:
+            resident = _resident_pipelines.get(key)
+        if resident is not None:
+            # Loaded by another job while this one waited
+            return resident
+        pipeline = load_diarization_pipeline(pipeline_name, auth_token, device)
+        if pipeline is None:
+            return None
+        with _resident_lock:
+            resident = _ResidentPipeline(pipeline)
+            _resident_pipelines[key] = resident
+            if _evictor is None:
+                _evictor = threading.Thread(target=_run_evictor, name="pipeline-evictor", daemon=True)
+                _evictor.start()
+        return resident
+
+
+@contextmanager
+def resident_diarization_pipeline(
+    pipeline_name: str,
+    auth_token: Optional[str] = None,
+    device: str = "cpu"
+) -> Iterator[Optional[Pipeline]]:
+    """Borrow the process-wide pipeline for a name and device.
+    
+    The pipeline is loaded on first use and kept until it has been idle for
+    config.DIARIZATION_PIPELINE_IDLE_S seconds (0 loads it for every use).
+    Concurrent jobs wait for each other, since a pipeline is not safe to
+    call from several threads.
+    
+    Args:
+        pipeline_name: Name of the pipeline to load
+        auth_token: Optional Hugging Face authentication token
+        device: Device chosen by resource_manager.select_device()
+        
+    Yields:
+        The pipeline, or None if loading failed
+    """
+    if config.DIARIZATION_PIPELINE_IDLE_S <= 0:
+        yield load_diarization_pipeline(pipeline_name, auth_token, device)
+        return
+    resident = _resident_pipeline(pipeline_name, auth_token, device)
+    if resident is None:
+        yield None
+        return
+    with resident.lock:
+        try:
+            yield resident.pipeline
+        finally:
+            resident.last_used = time.monotonic()
+
+
+def _cancellation_hook(
+    cancel_token: Optional[CancellationToken],
+    artifacts: Optional[Dict[str, Any]] = None
+) -> Callable[..., None]:
+    """Build a pyannote progress hook that aborts the pipeline once cancelled.
+    
+    pyannote calls the hook between (and during) its internal steps, which
+    makes it the earliest point at which a running diarization can stop.
+    Given ``artifacts``, the hook also keeps the artefact of every step by
+    step name (e.g. "segmentation", "embeddings").
+    """
+    def hook(step_name: Optional[str] = None, step_artefact: Any = None, *args: Any, **kwargs: Any) -> None:
+        if cancel_token is not None:
+            cancel_token.raise_if_cancelled()
+        if artifacts is not None and step_name is not None and step_artefact is not None:
+            artifacts[step_name] = step_artefact
+    return hook
+
+
+def to_pipeline_input(audio: AudioInput) -> Any:
+    """Convert an audio input to what pyannote pipelines accept.
+    
+    File paths are passed through; in-memory waveforms are wrapped in the
+    ``{"waveform", "sample_rate"}`` mapping so pyannote skips file I/O.
+    """
+    if isinstance(audio, np.ndarray):
+        audio = np.ascontiguousarray(audio, dtype=np.float32)
+        with warnings.catch_warnings():
+            # Shared memory-mapped waveforms are read-only; pyannote only reads them
+            warnings.simplefilter("ignore", UserWarning)
+            waveform = torch.from_numpy(audio)
+        return {"waveform": waveform.unsqueeze(0), "sample_rate": audio_utils.SAMPLE_RATE}
+    return audio
+
+
+def speaker_hints(
+    num_speakers: Optional[int] = None,
+    min_speakers: Optional[int] = None,
+    max_speakers: Optional[int] = None
+) -> Dict[str, int]:
+    """Validate speaker-count hints and keep the ones that were given.
+    
+    Args:
+        num_speakers: Exact number of speakers, if known
+        min_speakers: Lower bound on the number of speakers
+        max_speakers: Upper bound on the number of speakers
+        
+    Returns:
+        Keyword arguments for the pyannote pipeline, e.g. {"num_speakers": 3}
+        
+    Raises:
+        ValueError: If a hint is below 1 or the bounds contradict each other
+    """
+    hints = {
+        name: value
+        for name, value in (
+            ("num_speakers", num_speakers),
+            ("min_speakers", min_speakers),
+            ("max_speakers", max_speakers),
+        )
+        if value is not None
+    }
+    for name, value in hints.items():
+        if value < 1:
+            raise ValueError(f"{name} must be at least 1")
+    if min_speakers is not None and max_speakers is not None and min_speakers > max_speakers:
+        raise ValueError("min_speakers must not exceed max_speakers")
+    if num_speakers is not None and (
+            (min_speakers is not None and num_speakers < min_speakers)
+            or (max_speakers is not None and num_speakers > max_speakers)):
+        raise ValueError("num_speakers must lie between min_speakers and max_speakers")
+    return hints
+
+
+def run_diarization(
+    pipeline: Optional[Pipeline],
+    audio_path: AudioInput,
+    cancel_token: Optional[CancellationToken] = None,
+    num_speakers: Optional[int] = None,
+    min_speakers: Optional[int] = None,
+    max_speakers: Optional[int] = None,
+    artifacts: Optional[Dict[str, Any]] = None
+) -> Any:
     """Run diarization on the audio file using the loaded pipeline.
     
     Args:
         pipeline: The loaded diarization pipeline
-        audio_path: Path to the audio file
+        audio_path: Path to the audio file, or a 16 kHz mono float32 waveform
+        cancel_token: Optional token; cancelling it stops the pipeline at
+            its next step
+        num_speakers: Exact number of speakers, if known
+        min_speakers: Lower bound on the number of speakers
+        max_speakers: Upper bound on the number of speakers
+        artifacts: Optional dict receiving the pipeline's intermediate
+            step artefacts, see reclustering.save_state()
         
     Returns:
         Diarization result or None if failed
@@ -101,12 +347,32 @@ def run_diarization(pipeline: Optional[Pipeline], audio_path: str) -> Any:
         logging.error("Error: Diarization pipeline not loaded.")
         return None
 
-    logging.info(f"Running speaker diarization on {os.path.basename(audio_path)}...")
+    hints = {
+        name: value
+        for name, value in (
+            ("num_speakers", num_speakers),
+            ("min_speakers", min_speakers),
+            ("max_speakers", max_speakers),
+        )
+        if value is not None
+    }
+    hints_text = ", ".join(f"{name}={value}" for name, value in hints.items()) or "no speaker hints"
+    logging.info(f"Running speaker diarization on {audio_utils.describe_audio(audio_path)} ({hints_text})...")
     start_diarization = time.time()
     try:
-        diarization_result = pipeline(audio_path)
-        logging.info(f"Diarization complete in {time.time() - start_diarization:.2f} seconds.")
+        pipeline_input = to_pipeline_input(audio_path)
+        if cancel_token is not None or artifacts is not None:
+            diarization_result = pipeline(
+                pipeline_input, hook=_cancellation_hook(cancel_token, artifacts), **hints
+            )
+        else:
+            diarization_result = pipeline(pipeline_input, **hints)
+        logging.info(f"Diarization inference complete in {time.time() - start_diarization:.2f} seconds "
+                     f"({hints_text}).")
         return diarization_result
+    except JobCancelled as e:
+        logging.warning(f"Diarization stopped: {e}")
+        return None
     except Exception as e:
         logging.error(f"Error during diarization: {e}")
         return None
@@ -137,4 +403,35 @@ def extract_speaker_turns(diarization_result: Any) -> List[Dict[str, Any]]:
     except Exception as e:
         logging.error(f"Error processing diarization result tracks: {e}. "
                      f"Result was: {diarization_result}")
-        return []
\ No newline at end of file
+        return []
+
+def diarize_shared_waveform(
+    shared_path: str,
+    pipeline_name: str,
+    auth_token: Optional[str] = None,
+    device: Optional[str] = None,
+    hints: Optional[Dict[str, int]] = None
+) -> Optional[List[Dict[str, Any]]]:
+    """Diarize a shared memory-mapped waveform in a worker process.
+    
+    The worker attaches to the waveform written by
+    shared_audio.write_shared_waveform() instead of decoding the audio
+    again, and returns plain speaker turns so the result can be pickled.
+    
+    Args:
+        shared_path: Path to the shared .npy waveform
+        pipeline_name: Name of the pipeline to load
+        auth_token: Optional Hugging Face authentication token
+        device: Device to place the pipeline on
+        hints: Speaker-count hints from speaker_hints()
+        
+    Returns:
+        Sorted speaker turns, or None if loading or diarization failed
+    """
+    pipeline = load_diarization_pipeline(pipeline_name, auth_token, device)
+    if pipeline is None:
+        return None
+    diarization_result = run_diarization(pipeline, shared_audio.attach_waveform(shared_path), **(hints or {}))
+    if diarization_result is None:
+        return None
+    return extract_speaker_turns(diarization_result)
@@ -11,7 +11,8 @@ def calculate_paths(
     video_path: Union[str, Path],
     repo_root: Union[str, Path],
     transcript_base_dir_name: str,
-    processed_video_dir: Union[str, Path]
+    processed_video_dir: Union[str, Path],
+    audio_format: str = "wav"
 ) -> Dict[str, Path]:
     """Calculate all necessary file paths for processing.
     
@@ -20,6 +21,7 @@ def calculate_paths(
         repo_root: Root directory of the repository
         transcript_base_dir_name: Base directory name for transcripts
         processed_video_dir: Directory to move processed videos to
+        audio_format: Container of the intermediate audio ("wav" or "flac")
         
     Returns:
         Dictionary containing all calculated paths
@@ -29,7 +31,7 @@ def calculate_paths(
     paths['video_path'] = video_path
     paths['base_name'] = video_path.stem
     paths['video_dir'] = video_path.parent
-    paths['audio_file'] = paths['video_dir'] / f"{paths['base_name']}_audio.wav"
+    paths['audio_file'] = paths['video_dir'] / f"{paths['base_name']}_audio.{audio_format}"
     
     transcript_base_dir = Path(repo_root) / transcript_base_dir_name
     now = datetime.datetime.now()
@@ -37,6 +39,7 @@ def calculate_paths(
     month = now.strftime('%m')
     paths['transcript_subdir'] = transcript_base_dir / year / month
     paths['output_txt_file'] = paths['transcript_subdir'] / f"{paths['base_name']}_transcript_speakers.txt"
+    paths['diarization_state_dir'] = diarization_state_dir(paths['output_txt_file'])
     
     # Add processed video path
     processed_dir = Path(processed_video_dir)
@@ -45,6 +48,19 @@ def calculate_paths(
     return paths
 
 
+def diarization_state_dir(transcript_path: Union[str, Path]) -> Path:
+    """Directory next to a transcript holding the state to re-cluster it.
+    
+    Args:
+        transcript_path: Path to the transcript file
+        
+    Returns:
+        Path of the state directory
+    """
+    transcript_path = Path(transcript_path)
+    return transcript_path.parent / f"{transcript_path.stem}_diarization"
+
+
 def create_directories(paths: Dict[str, Path]) -> None:
     """Create necessary directories for output files.
     
@@ -0,0 +1,216 @@
+# incremental.py
+"""Incremental processing of a recording that is still being written.
+
+Each run processes only the audio added since the previous run: the tail
+is decoded from a little before the committed position (the overlap gives
+diarization and Whisper context, so no word is cut at the boundary), and
+only words whose midpoint lies after that position are appended to the
+transcript. The last seconds of a growing file are held back until the next
+run, since the recording may end mid-word there.
+
+The tail is diarized on its own; its local speakers are mapped onto the
+speakers of earlier runs by embedding similarity with a SpeakerStitcher,
+whose centroids are saved in a state file next to the transcript together
+with the committed position. The transcript's last line is rewritten on the
+next run when the same speaker keeps talking, so lines are never split at
+run boundaries.
+
+The recording must be in a format ffmpeg can read while it grows (WAV,
+FLAC, Matroska/WebM, MPEG-TS, ...); MP4 files written by most recorders
+only become readable once finished.
+"""
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Union
+
+import numpy as np
+
+from . import alignment
+from . import audio_utils
+from . import diarizer
+from . import speaker_embeddings
+from . import windowed
+from .cancellation import CancellationToken
+from .output_utils import TxtTranscriptWriter
+
+STATE_SUFFIX = "_incremental.json"
+
+# Transcribes a 16 kHz mono tail; timestamps relative to the tail start
+TailTranscriber = Callable[[np.ndarray], List[Dict[str, Any]]]
+
+
+def state_path(transcript_path: Union[str, Path]) -> Path:
+    """State file kept next to an incrementally written transcript."""
+    transcript_path = Path(transcript_path)
+    return transcript_path.parent / f"{transcript_path.stem}{STATE_SUFFIX}"
+
+
+def load_state(transcript_path: Union[str, Path]) -> Optional[Dict[str, Any]]:
+    """Read the state of an incremental transcript, or None if there is none."""
+    path = state_path(transcript_path)
+    if not path.exists():
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logging.error(f"Could not read incremental state {path}: {e}")
+        return None
+
+
+def save_state(transcript_path: Union[str, Path], state: Dict[str, Any]) -> bool:
+    """Write the state of an incremental transcript atomically.
+
+    Returns:
+        True if saved, False on error
+    """
+    path = state_path(transcript_path)
+    tmp_path = path.with_suffix(".tmp")
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, path)
+        return True
+    except OSError as e:
+        logging.error(f"Could not save incremental state {path}: {e}")
+        return False
+
+
+def _new_state(media_path: str, stitch_threshold: float) -> Dict[str, Any]:
+    return {
+        "media": media_path,
+        "committed_s": 0.0,
+        "stitcher": speaker_embeddings.SpeakerStitcher(stitch_threshold).to_dict(),
+        "pending_offset": 0,
+        "pending_speaker": None,
+        "pending_text": "",
+    }
+
+
+def _append_words(
+    transcript_path: Path,
+    state: Dict[str, Any],
+    aligned_words: List[Dict[str, Any]]
+) -> None:
+    """Append words to the transcript, continuing its last line.
+
+    The last line written by the previous run is cut off and rewritten, so
+    a speaker talking across runs stays on one line. Its start offset and
+    content are kept in ``state`` for the next run.
+    """
+    mode = "r+" if transcript_path.exists() else "w"
+    with open(transcript_path, mode, encoding="utf-8") as f:
+        f.seek(state["pending_offset"])
+        f.truncate()
+        writer = TxtTranscriptWriter(f)
+        writer.current_speaker = state["pending_speaker"]
+        writer.current_line = state["pending_text"]
+        writer.write_words(aligned_words)
+        state["pending_offset"] = f.tell()
+        state["pending_speaker"] = writer.current_speaker
+        state["pending_text"] = writer.current_line
+        writer.close()
+
+
+def process_tail(
+    media_path: Union[str, Path],
+    transcript_path: Union[str, Path],
+    pipeline: Any,
+    transcribe: TailTranscriber,
+    overlap_seconds: float = 10.0,
+    holdback_seconds: float = 3.0,
+    stitch_threshold: float = 0.5,
+    final: bool = False,
+    speaker_hints: Optional[Dict[str, int]] = None,
+    cancel_token: Optional[CancellationToken] = None
+) -> Optional[Dict[str, Any]]:
+    """Process the audio added to a recording since the previous run.
+
+    Args:
+        media_path: The growing recording
+        transcript_path: Transcript to append to; its state file is kept
+            next to it
+        pipeline: Loaded pyannote diarization pipeline
+        transcribe: Transcribes a waveform, e.g. core.transcribe_audio()
+            with a loaded model
+        overlap_seconds: Audio before the committed position decoded again
+            for context
+        holdback_seconds: Audio at the end of the recording left for the
+            next run, since it may end mid-word
+        stitch_threshold: See speaker_embeddings.SpeakerStitcher
+        final: The recording is complete; nothing is held back
+        speaker_hints: Speaker-count hints for the whole recording; the
+            tail may hear fewer speakers, so it only gets the upper bound
+        cancel_token: Optional token; cancelling it stops decoding and
+            diarization
+
+    Returns:
+        Summary with the processed "start" and "end" (seconds), the number
+        of "words" appended and the "speakers" known so far; None if the
+        tail could not be decoded or diarized
+    """
+    transcript_path = Path(transcript_path)
+    state = load_state(transcript_path)
+    if state is None or state.get("media") != str(media_path):
+        if transcript_path.exists():
+            logging.info(f"Starting a new incremental transcript for {media_path}, "
+                         f"replacing {transcript_path.name}.")
+        transcript_path.unlink(missing_ok=True)
+        state = _new_state(str(media_path), stitch_threshold)
+
+    committed = state["committed_s"]
+    tail_start = max(0.0, committed - overlap_seconds)
+    waveform = audio_utils.decode_audio(str(media_path), cancel_token, start_seconds=tail_start)
+    if waveform is None:
+        return None
+    tail_end = tail_start + waveform.shape[0] / audio_utils.SAMPLE_RATE
+    commit_end = tail_end if final else tail_end - holdback_seconds
+    summary = {"start": committed, "end": committed, "words": 0,
+               "speakers": len(state["stitcher"]["labels"])}
+    if commit_end <= committed:
+        logging.info(f"No new audio in {media_path} after {committed:.1f}s.")
+        return summary
+
+    speaker_hints = speaker_hints or {}
+    max_speakers = speaker_hints.get("num_speakers") or speaker_hints.get("max_speakers")
+    diarization_result = diarizer.run_diarization(pipeline, waveform, cancel_token, max_speakers=max_speakers)
+    if diarization_result is None:
+        return None
+    local_turns = diarizer.extract_speaker_turns(diarization_result)
+    stitcher = speaker_embeddings.SpeakerStitcher.from_dict(state["stitcher"])
+    durations = speaker_embeddings.speaker_durations(local_turns)
+    mapping = stitcher.assign(speaker_embeddings.embed_speakers(pipeline, waveform, local_turns), durations)
+    # Speakers too short to embed cannot be stitched; as in sharding, their
+    # turns are dropped and their words go to the closest stitched speaker
+    unmatched = sorted(label for label in durations if label not in mapping)
+    if unmatched:
+        logging.warning(
+            f"{len(unmatched)} speakers of the tail from {tail_start:.1f}s have too little speech to be "
+            f"identified ({', '.join(f'{durations[label]:.1f}s' for label in unmatched)}); "
+            f"their words are given the closest identified speaker."
+        )
+    speaker_turns = windowed.merge_touching_turns([
+        dict(turn, start=turn["start"] + tail_start, end=turn["end"] + tail_start)
+        for turn in speaker_embeddings.relabel_turns(local_turns, mapping)
+    ])
+    if not speaker_turns and unmatched:
+        # Nobody in the tail could be identified: the last line's speaker is the closest one
+        speaker_turns = [{"start": tail_start, "end": tail_end, "speaker": state["pending_speaker"] or "UNKNOWN"}]
+
+    segments = windowed.keep_words_between(
+        windowed.shift_segments(transcribe(waveform), tail_start), committed, commit_end
+    )
+    aligned_words = alignment.align_words_with_speakers(
+        segments, windowed.turns_between(speaker_turns, committed, commit_end)
+    ) if segments and speaker_turns else []
+    _append_words(transcript_path, state, aligned_words)
+
+    state["committed_s"] = commit_end
+    state["stitcher"] = stitcher.to_dict()
+    save_state(transcript_path, state)
+    logging.info(f"Appended {len(aligned_words)} words from {committed:.1f}s to {commit_end:.1f}s "
+                 f"of {media_path}; {len(stitcher.labels)} speakers so far.")
+    return {"start": committed, "end": commit_end, "words": len(aligned_words),
+            "speakers": len(stitcher.labels)}
@@ -0,0 +1,316 @@
+# inference_service.py
+"""Shared Whisper inference service that batches VAD chunks across jobs.
+
+When several jobs are in flight, each one calling
+``BatchedInferencePipeline.transcribe`` on its own produces partly filled
+batches. This service owns a single Whisper model; jobs submit their VAD
+chunks to it and a worker thread packs chunks from all active jobs into
+common batches of up to ``WHISPER_BATCH_SIZE``. Results are routed back to
+the submitting job with their original timestamps.
+"""
+import time
+import logging
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, List, Optional, Union
+
+import numpy as np
+from faster_whisper import BatchedInferencePipeline, decode_audio
+from faster_whisper.vad import VadOptions, get_speech_timestamps, merge_segments
+
+from . import config
+from . import transcriber
+from . import resource_manager
+from .cancellation import CancellationToken
+
+SAMPLE_RATE = 16000
+CHUNK_LENGTH_S = 30
+CANCEL_POLL_SECONDS = 0.5
+
+
+class InferenceService:
+    """Packs VAD chunks from concurrent jobs into shared inference batches."""
+
+    def __init__(
+        self,
+        model_loader: Callable[[], Any],
+        batch_size: int = config.WHISPER_BATCH_SIZE,
+        max_wait_seconds: float = config.INFERENCE_BATCH_WAIT_MS / 1000.0
+    ):
+        self.batch_size = batch_size
+        self.max_wait_seconds = max_wait_seconds
+        self._model_loader = model_loader
+        self._model: Any = None
+        self._pipeline: Optional[BatchedInferencePipeline] = None
+        self._pending: List[Dict[str, Any]] = []
+        self._condition = threading.Condition()
+        self._worker: Optional[threading.Thread] = None
+        self._started_at = time.time()
+        self._stats = {
+            "batches": 0,
+            "chunks": 0,
+            "jobs": 0,
+            "busy_seconds": 0.0,
+            "audio_seconds": 0.0,
+        }
+
+    def _ensure_started(self) -> None:
+        """Load the model and start the batching thread on first use."""
+        with self._condition:
+            if self._worker is not None and self._worker.is_alive():
+                return
+            if self._model is None:
+                self._model = self._model_loader()
+                if self._model is None:
+                    raise RuntimeError("Failed to load Whisper model")
+                self._pipeline = BatchedInferencePipeline(model=self._model)
+            self._worker = threading.Thread(
+                target=self._run, name="inference-service", daemon=True
+            )
+            self._worker.start()
+
+    def _detect_language(self, audio: np.ndarray) -> Optional[str]:
+        """Detect the language of a job so only compatible chunks share a batch."""
+        if config.WHISPER_LANGUAGE:
+            return config.WHISPER_LANGUAGE
+        detect = getattr(self._model, "detect_language", None)
+        if detect is None:
+            return None
+        try:
+            language, probability, _ = detect(audio)
+            logging.info(f"Detected language: {language} (Prob: {probability:.2f})")
+            return language
+        except Exception as e:
+            logging.warning(f"Language detection failed, batching without a language: {e}")
+            return None
+
+    def transcribe(
+        self,
+        audio: Union[str, np.ndarray],
+        cancel_token: Optional[CancellationToken] = None,
+        clips: Optional[List[Dict[str, int]]] = None
+    ) -> List[Dict[str, Any]]:
+        """Transcribe one job's audio through the shared batches.
+
+        Blocks until every chunk of the job has been transcribed. If the
+        job is cancelled, its chunks that have not been batched yet are
+        withdrawn and JobCancelled is raised.
+
+        Args:
+            audio: Path to the audio file or a 16 kHz mono float32 waveform
+            cancel_token: Optional cancellation token of the job
+            clips: Speech clips as {"start", "end"} samples from the job's
+                shared VAD pass; detected here if omitted
+
+        Returns:
+            Segments in the format of transcriber.segments_to_dicts(), with
+            timestamps relative to the job's audio
+        """
+        if not isinstance(audio, np.ndarray):
+            audio = decode_audio(str(audio), sampling_rate=SAMPLE_RATE)
+
+        if clips is None:
+            vad_options = VadOptions(max_speech_duration_s=CHUNK_LENGTH_S, min_silence_duration_ms=160)
+            clips = merge_segments(get_speech_timestamps(audio, vad_options), vad_options)
+        segments = [
+            segment
+            for clip_segments in self.transcribe_clips(audio, cancel_token, clips)
+            for segment in clip_segments
+        ]
+        return sorted(segments, key=lambda segment: segment["start"])
+
+    def transcribe_clips(
+        self,
+        audio: Union[str, np.ndarray],
+        cancel_token: Optional[CancellationToken],
+        clips: List[Dict[str, int]],
+        word_timestamps: bool = True
+    ) -> List[List[Dict[str, Any]]]:
+        """Transcribe clips of one job's audio through the shared batches.
+
+        Like transcribe(), but the segments are kept per clip, so callers
+        can tell which clip each segment was decoded from even when clips
+        overlap. Without ``word_timestamps`` the clips are batched only
+        with other requests without them and the segments carry no words.
+
+        Returns:
+            The segments of each clip, in the order of ``clips``
+        """
+        self._ensure_started()
+        if not isinstance(audio, np.ndarray):
+            audio = decode_audio(str(audio), sampling_rate=SAMPLE_RATE)
+        if not clips:
+            return []
+
+        language = self._detect_language(audio)
+        futures: List[Future] = []
+        with self._condition:
+            self._stats["jobs"] += 1
+            for clip in clips:
+                future: Future = Future()
+                self._pending.append({
+                    "audio": audio[clip["start"]:clip["end"]],
+                    "offset": clip["start"] / SAMPLE_RATE,
+                    "language": language,
+                    "word_timestamps": word_timestamps,
+                    "queued_at": time.time(),
+                    "future": future,
+                })
+                futures.append(future)
+            self._condition.notify_all()
+
+        return [self._wait(future, futures, cancel_token) for future in futures]
+
+    def _wait(
+        self,
+        future: Future,
+        job_futures: List[Future],
+        cancel_token: Optional[CancellationToken]
+    ) -> List[Dict[str, Any]]:
+        """Wait for one chunk result while watching the job's cancellation token."""
+        while True:
+            if cancel_token is not None and cancel_token.cancelled:
+                withdrawn = set(job_futures)
+                with self._condition:
+                    self._pending = [
+                        item for item in self._pending if item["future"] not in withdrawn
+                    ]
+                cancel_token.raise_if_cancelled()
+            try:
+                return future.result(timeout=CANCEL_POLL_SECONDS)
+            except FutureTimeoutError:
+                continue
+
+    def _take_batch(self) -> List[Dict[str, Any]]:
+        """Wait for a full batch, or a partial one once its oldest chunk is due.
+
+        A batch only holds chunks with the language and word-timestamp
+        setting of the oldest one.
+        """
+        with self._condition:
+            while True:
+                if self._pending:
+                    oldest = self._pending[0]
+                    compatible = [
+                        item for item in self._pending
+                        if item["language"] == oldest["language"]
+                        and item["word_timestamps"] == oldest["word_timestamps"]
+                    ]
+                    waited = time.time() - oldest["queued_at"]
+                    if len(compatible) >= self.batch_size or waited >= self.max_wait_seconds:
+                        batch = compatible[:self.batch_size]
+                        taken = {id(item) for item in batch}
+                        self._pending = [item for item in self._pending if id(item) not in taken]
+                        return batch
+                    self._condition.wait(timeout=self.max_wait_seconds - waited)
+                else:
+                    self._condition.wait()
+
+    def _run(self) -> None:
+        """Worker loop running the shared batches."""
+        while True:
+            batch = self._take_batch()
+            try:
+                self._run_batch(batch)
+            except Exception as e:
+                logging.error(f"Error during shared batch inference: {e}")
+                for item in batch:
+                    if not item["future"].done():
+                        item["future"].set_exception(e)
+
+    def _run_batch(self, batch: List[Dict[str, Any]]) -> None:
+        """Transcribe one batch of chunks and route the segments back."""
+        start = time.time()
+        # Lay the chunks end to end and describe each one as a clip (in
+        # samples, like merge_segments produces), so the pipeline decodes
+        # exactly one chunk per batch element.
+        clip_timestamps = []
+        position = 0
+        for item in batch:
+            length = item["audio"].shape[0]
+            clip_timestamps.append({"start": position, "end": position + length})
+            item["batch_start"] = position / SAMPLE_RATE
+            item["segments"] = []
+            position += length
+        combined = np.concatenate([item["audio"] for item in batch])
+
+        raw_segments, _ = self._pipeline.transcribe(
+            combined,
+            language=batch[0]["language"],
+            batch_size=self.batch_size,
+            beam_size=config.WHISPER_BEAM_SIZE,
+            word_timestamps=batch[0]["word_timestamps"],
+            vad_filter=False,
+            clip_timestamps=clip_timestamps
+        )
+        for index, segment in transcriber.segments_by_clip(
+            raw_segments, clip_timestamps, self._pipeline.model.frames_per_second
+        ):
+            owner = batch[index]
+            owner["segments"].append(_shift_segment(segment, owner["offset"] - owner["batch_start"]))
+
+        elapsed = time.time() - start
+        with self._condition:
+            self._stats["batches"] += 1
+            self._stats["chunks"] += len(batch)
+            self._stats["busy_seconds"] += elapsed
+            self._stats["audio_seconds"] += position / SAMPLE_RATE
+        for item in batch:
+            item["future"].set_result(item.pop("segments"))
+
+    def stats(self) -> Dict[str, Any]:
+        """Utilization and throughput figures of the service.
+
+        Returns:
+            Dict with batch counts, mean batch fill ratio, busy fraction of
+            wall time and audio seconds transcribed per busy second
+        """
+        with self._condition:
+            stats = dict(self._stats)
+            stats["pending_chunks"] = len(self._pending)
+        uptime = time.time() - self._started_at
+        stats["batch_size"] = self.batch_size
+        stats["mean_batch_fill"] = (
+            stats["chunks"] / (stats["batches"] * self.batch_size) if stats["batches"] else 0.0
+        )
+        stats["utilization"] = stats["busy_seconds"] / uptime if uptime > 0 else 0.0
+        stats["realtime_factor"] = (
+            stats["audio_seconds"] / stats["busy_seconds"] if stats["busy_seconds"] else 0.0
+        )
+        return stats
+
+
+def _shift_segment(segment: Dict[str, Any], shift: float) -> Dict[str, Any]:
+    """Move a segment and its words by ``shift`` seconds."""
+    shifted = dict(segment, start=segment["start"] + shift, end=segment["end"] + shift)
+    shifted["words"] = [
+        dict(word, start=word["start"] + shift, end=word["end"] + shift)
+        for word in segment.get("words", [])
+    ]
+    return shifted
+
+
+def _load_default_model() -> Any:
+    """Load the Whisper model used by the shared service."""
+    device = resource_manager.select_device(min_memory_mb=config.GPU_MEMORY_THRESHOLD_MB)
+    return transcriber.load_whisper_model(
+        config.WHISPER_MODEL_SIZE, device, config.WHISPER_COMPUTE_TYPE
+    )
+
+
+_service: Optional[InferenceService] = None
+_service_lock = threading.Lock()
+
+
+def get_inference_service() -> InferenceService:
+    """Get the process-wide shared inference service."""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = InferenceService(_load_default_model)
+        return _service
+
+
+def get_inference_stats() -> Optional[Dict[str, Any]]:
+    """Get the shared service statistics, or None if it has not been used."""
+    return _service.stats() if _service is not None else None
@@ -0,0 +1,176 @@
+# job_queue.py
+"""Shortest-expected-job-first scheduling of transcription jobs.
+
+Each job's expected processing time is derived from the recording duration
+(probed with ffprobe at submission) and a seconds-of-work-per-second-of-audio
+rate that is refined as jobs complete with real inference; failed, cancelled
+and cache-hit jobs finish almost instantly and are left out. Jobs are started
+in order of expected processing time minus an aging credit proportional to the
+time they have been waiting, so long recordings are delayed behind short ones
+but never starved.
+"""
+import time
+import asyncio
+import heapq
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from . import config
+
+# Returns True if the job's processing time is representative (it ran
+# inference to completion); other jobs do not refine the processing rate
+JobRunner = Callable[[], Awaitable[Optional[bool]]]
+
+# Weight of the newest observation in the processing rate moving average
+RATE_SMOOTHING = 0.3
+
+
+class JobScheduler:
+    """Runs queued jobs shortest-expected-first, with aging."""
+
+    def __init__(
+        self,
+        max_concurrent: int = config.JOB_MAX_CONCURRENT,
+        seconds_per_audio_second: float = config.JOB_SECONDS_PER_AUDIO_SECOND,
+        aging_factor: float = config.JOB_AGING_FACTOR,
+        unknown_duration: float = config.JOB_UNKNOWN_DURATION_S
+    ):
+        self.max_concurrent = max_concurrent
+        self.seconds_per_audio_second = seconds_per_audio_second
+        self.aging_factor = aging_factor
+        self.unknown_duration = unknown_duration
+        self._queued: Dict[str, Dict[str, Any]] = {}
+        self._running: Dict[str, Dict[str, Any]] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._workers: List[asyncio.Task] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def expected_seconds(self, duration: Optional[float]) -> float:
+        """Estimate the processing time of a recording.
+
+        Args:
+            duration: Recording duration in seconds, or None if unknown
+
+        Returns:
+            Expected processing time in seconds
+        """
+        if duration is None:
+            duration = self.unknown_duration
+        return duration * self.seconds_per_audio_second
+
+    def _priority(self, entry: Dict[str, Any], now: float) -> float:
+        """Effective priority of a queued job; lower runs first."""
+        waited = now - entry["submitted_at"]
+        return entry["expected_seconds"] - self.aging_factor * waited
+
+    def _ordered_queue(self, now: float) -> List[Dict[str, Any]]:
+        """Queued jobs in the order they would be started now."""
+        return sorted(
+            self._queued.values(),
+            key=lambda entry: (self._priority(entry, now), entry["submitted_at"])
+        )
+
+    def submit(self, job_id: str, duration: Optional[float], runner: JobRunner) -> None:
+        """Queue a job.
+
+        Must be called from within the event loop that runs the jobs.
+
+        Args:
+            job_id: The job identifier
+            duration: Recording duration in seconds, or None if unknown
+            runner: Zero-argument coroutine function that processes the job
+                and returns True if its processing time is representative
+        """
+        self._queued[job_id] = {
+            "job_id": job_id,
+            "duration": duration,
+            "expected_seconds": self.expected_seconds(duration),
+            "submitted_at": time.time(),
+            "runner": runner,
+        }
+        self._ensure_workers()
+        self._wakeup.set()
+
+    def remove(self, job_id: str) -> bool:
+        """Remove a job that has not started yet.
+
+        Returns:
+            True if the job was queued and has been removed
+        """
+        return self._queued.pop(job_id, None) is not None
+
+    def queue_info(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get the queue position and expected start time of a queued job.
+
+        Returns:
+            Dict with "queue_position" (1-based) and "expected_start_time"
+            (UNIX timestamp), or None if the job is not queued
+        """
+        if job_id not in self._queued:
+            return None
+
+        now = time.time()
+        # Times at which each worker slot becomes free
+        slots = [
+            now + max(0.0, entry["started_at"] + entry["expected_seconds"] - now)
+            for entry in self._running.values()
+        ]
+        slots += [now] * max(0, self.max_concurrent - len(slots))
+        heapq.heapify(slots)
+
+        for position, entry in enumerate(self._ordered_queue(now), start=1):
+            start_time = heapq.heappop(slots)
+            if entry["job_id"] == job_id:
+                return {"queue_position": position, "expected_start_time": start_time}
+            heapq.heappush(slots, start_time + entry["expected_seconds"])
+        return None
+
+    def _ensure_workers(self) -> None:
+        """Start the worker tasks in the current event loop if needed."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._wakeup = asyncio.Event()
+            self._workers = []
+        self._workers = [task for task in self._workers if not task.done()]
+        while len(self._workers) < self.max_concurrent:
+            self._workers.append(loop.create_task(self._worker()))
+
+    def _next_job(self) -> Optional[Dict[str, Any]]:
+        """Pop the queued job with the best effective priority."""
+        if not self._queued:
+            return None
+        entry = self._ordered_queue(time.time())[0]
+        return self._queued.pop(entry["job_id"])
+
+    def _record_completion(self, entry: Dict[str, Any], elapsed: float) -> None:
+        """Refine the processing rate estimate from a finished job."""
+        if not entry["duration"]:
+            return
+        observed = elapsed / entry["duration"]
+        self.seconds_per_audio_second = (
+            (1 - RATE_SMOOTHING) * self.seconds_per_audio_second
+            + RATE_SMOOTHING * observed
+        )
+
+    async def _worker(self) -> None:
+        """Run queued jobs until cancelled."""
+        while True:
+            entry = self._next_job()
+            if entry is None:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            job_id = entry["job_id"]
+            entry["started_at"] = time.time()
+            self._running[job_id] = entry
+            representative = False
+            try:
+                representative = await entry["runner"]()
+            except Exception as e:
+                logging.exception(f"Unhandled error in job {job_id}: {e}")
+            finally:
+                self._running.pop(job_id, None)
+            if representative:
+                self._record_completion(entry, time.time() - entry["started_at"])
@@ -0,0 +1,225 @@
+# multitrack.py
+"""Speaker turns from recordings with one participant per track or channel.
+
+OBS and Zoom can record every participant to a separate audio track (or a
+separate channel of one track). For such recordings the speaker of every
+moment is known from which track is active, so voice activity per track
+replaces the pyannote pipeline. A frame only counts for a track when that
+track is within ``dominance_db`` of the loudest track, which keeps
+microphone bleed from creating phantom turns. Recordings whose tracks are
+active at the same time most of the time (e.g. a plain stereo mix) are not
+treated as separated.
+"""
+import os
+import json
+import logging
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from . import audio_utils
+from . import speech_trim
+from .cancellation import CancellationToken
+
+
+def probe_audio_tracks(media_path: str) -> List[Dict[str, Any]]:
+    """List the audio streams of a media file with ffprobe.
+
+    Args:
+        media_path: Path to the media file
+
+    Returns:
+        One dict per audio stream with "stream_index" (among the audio
+        streams), "channels" and "title" (None if untitled); empty if the
+        file could not be probed
+    """
+    ffprobe_command = [
+        "ffprobe",
+        "-v", "error",
+        "-select_streams", "a",
+        "-show_entries", "stream=channels:stream_tags=title",
+        "-of", "json",
+        str(media_path)
+    ]
+    try:
+        result = subprocess.run(ffprobe_command, check=True, capture_output=True, text=True)
+        streams = json.loads(result.stdout).get("streams", [])
+    except FileNotFoundError:
+        logging.error("Error: ffprobe command not found. Make sure ffmpeg is installed and in your system's PATH.")
+        return []
+    except (subprocess.CalledProcessError, ValueError) as e:
+        logging.warning(f"Could not probe audio tracks of {os.path.basename(str(media_path))}: {e}")
+        return []
+    return [
+        {
+            "stream_index": index,
+            "channels": stream.get("channels") or 1,
+            "title": (stream.get("tags") or {}).get("title"),
+        }
+        for index, stream in enumerate(streams)
+    ]
+
+
+def detect_track_sources(media_path: str, max_tracks: int = 8) -> List[Dict[str, Any]]:
+    """Find the per-participant sources of a recording.
+
+    Several audio streams become one source each; a single multichannel
+    stream becomes one source per channel.
+
+    Args:
+        media_path: Path to the media file
+        max_tracks: More sources than this are assumed to be a surround
+            mix rather than separate participants
+
+    Returns:
+        Sources with "stream_index", "channel" (None for a whole stream)
+        and "label", or an empty list if the recording has a single track
+    """
+    tracks = probe_audio_tracks(media_path)
+    if len(tracks) >= 2:
+        sources = [
+            {
+                "stream_index": track["stream_index"],
+                "channel": None,
+                "label": track["title"] or f"SPEAKER_{i:02d}",
+            }
+            for i, track in enumerate(tracks)
+        ]
+    elif len(tracks) == 1 and tracks[0]["channels"] >= 2:
+        sources = [
+            {"stream_index": 0, "channel": channel, "label": f"SPEAKER_{channel:02d}"}
+            for channel in range(tracks[0]["channels"])
+        ]
+    else:
+        return []
+    if len(sources) > max_tracks:
+        logging.info(f"{len(sources)} audio tracks/channels, treating the recording as a mix.")
+        return []
+    return sources
+
+
+def decode_tracks(
+    media_path: str,
+    sources: List[Dict[str, Any]],
+    cancel_token: Optional[CancellationToken] = None
+) -> Optional[List[np.ndarray]]:
+    """Decode every source to a 16 kHz mono waveform, in parallel.
+
+    Returns:
+        Waveforms padded to a common length, or None if any decode failed
+    """
+    with ThreadPoolExecutor(max_workers=len(sources)) as executor:
+        waveforms = list(executor.map(
+            lambda source: audio_utils.decode_audio(
+                media_path, cancel_token, source["stream_index"], source["channel"]
+            ),
+            sources
+        ))
+    if any(waveform is None for waveform in waveforms):
+        return None
+    length = max(waveform.shape[0] for waveform in waveforms)
+    # Only the shorter tracks are copied
+    return [
+        waveform if waveform.shape[0] == length else np.pad(waveform, (0, length - waveform.shape[0]))
+        for waveform in waveforms
+    ]
+
+
+def track_activity(
+    waveforms: List[np.ndarray],
+    threshold_db: float = -45.0,
+    dominance_db: float = 15.0
+) -> np.ndarray:
+    """Per-frame voice activity of every track.
+
+    Returns:
+        Boolean array of shape (tracks, frames)
+    """
+    levels = np.stack([speech_trim.frame_levels_db(waveform) for waveform in waveforms])
+    loudest = levels.max(axis=0)
+    return (levels > threshold_db) & (levels >= loudest - dominance_db)
+
+
+def tracks_are_separated(activity: np.ndarray, max_shared_activity: float = 0.5) -> bool:
+    """Whether tracks carry different participants rather than the same mix.
+
+    Args:
+        activity: Output of track_activity()
+        max_shared_activity: Largest fraction of active frames during which
+            several tracks may be active at once
+
+    Returns:
+        True if the tracks look like separate participants
+    """
+    active = activity.any(axis=0)
+    if not active.any():
+        return False
+    shared = (activity.sum(axis=0) >= 2).sum() / active.sum()
+    return bool(shared <= max_shared_activity)
+
+
+def activity_to_turns(
+    activity: np.ndarray,
+    labels: List[str],
+    duration: float,
+    min_silence_seconds: float = 0.5,
+    padding_seconds: float = 0.1
+) -> List[Dict[str, Any]]:
+    """Build speaker turns from per-track activity.
+
+    Returns:
+        Turns sorted by start, in the format of
+        diarizer.extract_speaker_turns() plus the "track" they came from
+    """
+    speaker_turns = []
+    for track, (voiced, label) in enumerate(zip(activity, labels)):
+        for start, end in speech_trim.mask_to_spans(voiced, duration, min_silence_seconds, padding_seconds):
+            speaker_turns.append({"start": start, "end": end, "speaker": label, "track": track})
+    return sorted(speaker_turns, key=lambda turn: turn["start"])
+
+
+def load_separated_tracks(
+    media_path: str,
+    cancel_token: Optional[CancellationToken] = None,
+    max_tracks: int = 8,
+    threshold_db: float = -45.0,
+    dominance_db: float = 15.0,
+    max_shared_activity: float = 0.5
+) -> Optional[Dict[str, Any]]:
+    """Decode a multitrack recording and derive its speaker turns.
+
+    Args:
+        media_path: Path to the media file
+        cancel_token: Optional token; cancelling it kills ffmpeg
+        max_tracks: See detect_track_sources()
+        threshold_db: Silence level in dBFS
+        dominance_db: How far below the loudest track a track may be and
+            still count as speaking
+        max_shared_activity: See tracks_are_separated()
+
+    Returns:
+        Dict with "labels", "waveforms" and "speaker_turns", or None if the
+        recording is not a separated multitrack recording
+    """
+    sources = detect_track_sources(media_path, max_tracks)
+    if not sources:
+        return None
+    waveforms = decode_tracks(media_path, sources, cancel_token)
+    if waveforms is None:
+        if cancel_token is not None:
+            cancel_token.raise_if_cancelled()
+        logging.warning("Could not decode every audio track, falling back to diarization.")
+        return None
+
+    activity = track_activity(waveforms, threshold_db, dominance_db)
+    if not tracks_are_separated(activity, max_shared_activity):
+        logging.info(f"{len(sources)} audio tracks/channels carry the same audio, falling back to diarization.")
+        return None
+
+    labels = [source["label"] for source in sources]
+    duration = waveforms[0].shape[0] / audio_utils.SAMPLE_RATE
+    speaker_turns = activity_to_turns(activity, labels, duration)
+    logging.info(f"Derived {len(speaker_turns)} speaker turns from {len(sources)} separate audio tracks.")
+    return {"labels": labels, "waveforms": waveforms, "speaker_turns": speaker_turns}
@@ -0,0 +1,223 @@
+# onnx_backend.py
+"""ONNX Runtime backend for the diarization models on CPU.
+
+On CPU-only nodes most of the diarization time goes into pyannote's
+segmentation model and, per chunk and local speaker, its embedding model.
+Both are plain PyTorch modules taking waveforms, so they are exported to
+ONNX once (optionally with dynamic int8 quantization of the weights) and
+stored next to each other in a model directory. File names carry a hash of
+the weights and input size, so new model weights are exported again
+instead of running a stale export. The pipeline keeps its own objects;
+only the ``forward`` of each module is replaced by an ONNX Runtime session
+with a fixed number of intra-op threads, so the pipeline, the cancellation
+hook and re-clustering work unchanged.
+
+Embedding models that are not a pyannote module (e.g. SpeechBrain's, whose
+feature extraction is not exportable) keep running in PyTorch.
+
+ONNX Runtime is an optional dependency (``onnxruntime``, plus ``onnx`` for
+quantization); without it the pipeline stays on PyTorch.
+"""
+import hashlib
+import logging
+import os
+import re
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+import torch
+
+from . import audio_utils
+
+ONNX_OPSET = 17
+DUMMY_WEIGHT_FRAMES = 100  # Weights are interpolated to the model's frames
+
+
+def weights_fingerprint(module: torch.nn.Module, *extra: Any) -> str:
+    """Short hash of a module's weights and of ``extra`` export settings."""
+    digest = hashlib.sha256(repr(extra).encode())
+    for name, tensor in module.state_dict().items():
+        tensor = tensor.detach().cpu().contiguous()
+        digest.update(f"{name}:{tensor.dtype}:{tuple(tensor.shape)}".encode())
+        digest.update(tensor.view(-1).view(torch.uint8).numpy().tobytes())
+    return digest.hexdigest()[:12]
+
+
+def model_path(
+    model_dir: Union[str, Path],
+    pipeline_name: str,
+    part: str,
+    fingerprint: str,
+    quantize: bool = False
+) -> Path:
+    """File of an exported model, e.g. pyannote_speaker-diarization_2.1-segmentation-<fingerprint>-int8.onnx."""
+    slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", pipeline_name)
+    return Path(model_dir) / f"{slug}-{part}-{fingerprint}{'-int8' if quantize else ''}.onnx"
+
+
+def export_module(
+    module: torch.nn.Module,
+    path: Path,
+    dummy_inputs: Sequence[torch.Tensor],
+    input_names: List[str],
+    dynamic_axes: Dict[str, Dict[int, str]]
+) -> bool:
+    """Export a PyTorch module to an ONNX file.
+
+    Returns:
+        True if exported, False if the module cannot be exported
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    start = time.time()
+    try:
+        was_training = module.training
+        module.eval()
+        with torch.no_grad():
+            torch.onnx.export(
+                module,
+                tuple(dummy_inputs),
+                str(tmp_path),
+                input_names=input_names,
+                output_names=["output"],
+                dynamic_axes=dynamic_axes,
+                opset_version=ONNX_OPSET
+            )
+        module.train(was_training)
+        os.replace(tmp_path, path)
+        logging.info(f"Exported {path.name} in {time.time() - start:.2f} seconds.")
+        return True
+    except Exception as e:
+        logging.error(f"Could not export {path.name} to ONNX: {e}")
+        tmp_path.unlink(missing_ok=True)
+        return False
+
+
+def quantize_model(source: Path, destination: Path) -> bool:
+    """Quantize the weights of an ONNX model to int8 (dynamic quantization).
+
+    Returns:
+        True if quantized, False on error
+    """
+    try:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        tmp_path = destination.with_suffix(".tmp")
+        quantize_dynamic(str(source), str(tmp_path), weight_type=QuantType.QInt8)
+        os.replace(tmp_path, destination)
+        logging.info(f"Quantized {source.name} to {destination.name}.")
+        return True
+    except Exception as e:
+        logging.error(f"Could not quantize {source.name}: {e}")
+        return False
+
+
+def create_session(path: Path, threads: int) -> Any:
+    """Open an ONNX Runtime CPU session with ``threads`` intra-op threads."""
+    import onnxruntime
+
+    options = onnxruntime.SessionOptions()
+    options.intra_op_num_threads = threads
+    options.inter_op_num_threads = 1
+    options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+    return onnxruntime.InferenceSession(str(path), options, providers=["CPUExecutionProvider"])
+
+
+def session_forward(session: Any, input_names: List[str]) -> Callable[..., torch.Tensor]:
+    """A module ``forward`` running an ONNX Runtime session.
+
+    A missing trailing ``weights`` input (embedding models called without
+    masks) is filled with ones, i.e. every frame counts.
+    """
+    def forward(*inputs: torch.Tensor, **named_inputs: torch.Tensor) -> torch.Tensor:
+        tensors = list(inputs) + [named_inputs[name] for name in input_names[len(inputs):] if name in named_inputs]
+        if len(tensors) < len(input_names):
+            tensors.append(torch.ones(tensors[0].shape[0], 1))
+        feeds = {
+            name: tensor.detach().cpu().numpy().astype(np.float32, copy=False)
+            for name, tensor in zip(input_names, tensors)
+        }
+        return torch.from_numpy(session.run(None, feeds)[0])
+    return forward
+
+
+def _prepare(
+    module: torch.nn.Module,
+    path: Path,
+    quantize: bool,
+    dummy_inputs: Sequence[torch.Tensor],
+    input_names: List[str],
+    dynamic_axes: Dict[str, Dict[int, str]]
+) -> Optional[Path]:
+    """Export (and quantize) a module unless done before; return the model to run."""
+    plain_path = path.with_name(path.name.replace("-int8.onnx", ".onnx"))
+    if not plain_path.exists() and not export_module(module, plain_path, dummy_inputs, input_names, dynamic_axes):
+        return None
+    if quantize and not path.exists() and not quantize_model(plain_path, path):
+        return None
+    return path
+
+
+def use_onnx_runtime(
+    pipeline: Any,
+    pipeline_name: str,
+    model_dir: Union[str, Path],
+    threads: int,
+    quantize: bool = False
+) -> bool:
+    """Run a loaded pipeline's segmentation and embedding models under ONNX Runtime.
+
+    Args:
+        pipeline: Diarization pipeline loaded on the CPU
+        pipeline_name: Name of the pipeline, used to name the exported models
+        model_dir: Directory holding the exported models
+        threads: Intra-op threads per ONNX Runtime session
+        quantize: Use int8 dynamically quantized models
+
+    Returns:
+        True if at least the segmentation model now runs under ONNX
+        Runtime, False if the pipeline stays on PyTorch
+    """
+    try:
+        import onnxruntime  # noqa: F401
+    except ImportError:
+        logging.error("onnxruntime is not installed, diarization stays on PyTorch.")
+        return False
+
+    segmentation = getattr(getattr(pipeline, "_segmentation", None), "model", None)
+    if not isinstance(segmentation, torch.nn.Module):
+        logging.error("Diarization pipeline exposes no segmentation model, it stays on PyTorch.")
+        return False
+
+    chunk_seconds = getattr(pipeline._segmentation, "duration", 5.0)
+    chunk = torch.zeros(1, 1, int(chunk_seconds * audio_utils.SAMPLE_RATE))
+    path = _prepare(
+        segmentation,
+        model_path(model_dir, pipeline_name, "segmentation", weights_fingerprint(segmentation, chunk_seconds), quantize),
+        quantize,
+        [chunk],
+        ["waveforms"],
+        {"waveforms": {0: "batch", 2: "samples"}, "output": {0: "batch", 1: "frames"}}
+    )
+    if path is None:
+        return False
+    segmentation.forward = session_forward(create_session(path, threads), ["waveforms"])
+    logging.info(f"Diarization segmentation runs under ONNX Runtime ({path.name}, {threads} threads).")
+
+    embedding = getattr(getattr(pipeline, "_embedding", None), "model_", None)
+    if not isinstance(embedding, torch.nn.Module):
+        logging.info("Diarization embedding model is not exportable, it stays on PyTorch.")
+        return True
+    path = _prepare(
+        embedding,
+        model_path(model_dir, pipeline_name, "embedding", weights_fingerprint(embedding, chunk_seconds), quantize),
+        quantize,
+        [chunk, torch.ones(1, DUMMY_WEIGHT_FRAMES)],
+        ["waveforms", "weights"],
+        {"waveforms": {0: "batch", 2: "samples"}, "weights": {0: "batch", 1: "frames"}, "output": {0: "batch"}}
+    )
+    if path is not None:
+        embedding.forward = session_forward(create_session(path, threads), ["waveforms", "weights"])
+        logging.info(f"Diarization embedding runs under ONNX Runtime ({path.name}, {threads} threads).")
+    return True
@@ -2,7 +2,7 @@
 """Utilities for formatting and saving transcript output."""
 import math
 import logging
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Optional, TextIO
 
 
 def format_srt_time(seconds: float) -> str:
@@ -30,27 +30,51 @@ def save_transcript_with_speakers(aligned_words: List[Dict[str, Any]], filepath:
     return save_to_txt(aligned_words, filepath)
 
 
+class TxtTranscriptWriter:
+    """Writes speaker-attributed words to a TXT transcript as they arrive.
+
+    Consecutive words of the same speaker are joined into one line; a line
+    is written out as soon as the speaker changes, so the transcript can be
+    produced incrementally without holding every word in memory.
+    """
+
+    def __init__(self, f_txt: TextIO):
+        self.f_txt = f_txt
+        self.current_speaker: Optional[str] = None
+        self.current_line = ""
+
+    def write_words(self, aligned_words: Iterable[Dict[str, Any]]) -> None:
+        """Append aligned words to the transcript."""
+        for word_info in aligned_words:
+            if not word_info or not word_info.get("text"):
+                continue
+            speaker = word_info.get("speaker", "UNKNOWN")
+            text = word_info["text"]
+            if self.current_speaker != speaker:
+                self._write_line()
+                self.current_speaker = speaker
+                self.current_line = text
+            else:
+                self.current_line += " " + text
+
+    def close(self) -> None:
+        """Write the pending line of the last speaker."""
+        self._write_line()
+        self.current_line = ""
+
+    def _write_line(self) -> None:
+        if self.current_line:
+            self.f_txt.write(f"[{self.current_speaker}]: {self.current_line.strip()}\n")
+
+
 def save_to_txt(aligned_words: List[Dict[str, Any]], filepath: str) -> bool:
     """Save the aligned transcript to a simple TXT file."""
     logging.info(f"Saving speaker-aligned TXT transcript to: {filepath}")
     try:
         with open(filepath, "w", encoding="utf-8") as f_txt:
-            current_speaker_txt = None
-            current_line_txt = ""
-            for word_info in aligned_words:
-                if not word_info or not word_info.get("text"):
-                    continue
-                speaker = word_info.get("speaker", "UNKNOWN")
-                text = word_info["text"]
-                if current_speaker_txt != speaker:
-                    if current_line_txt:
-                        f_txt.write(f"[{current_speaker_txt}]: {current_line_txt.strip()}\n")
-                    current_speaker_txt = speaker
-                    current_line_txt = text
-                else:
-                    current_line_txt += " " + text
-            if current_line_txt:
-                f_txt.write(f"[{current_speaker_txt}]: {current_line_txt.strip()}\n")
+            writer = TxtTranscriptWriter(f_txt)
+            writer.write_words(aligned_words)
+            writer.close()
         return True
     except Exception as e:
         logging.error(f"Error writing TXT file {filepath}: {e}")
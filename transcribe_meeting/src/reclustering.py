@@ -0,0 +1,223 @@
+# reclustering.py
+"""Re-clustering of a finished diarization with a new speaker count or threshold.
+
+pyannote's diarization pipeline segments the audio into chunks, embeds every
+local speaker of every chunk, and only then clusters those embeddings into
+global speakers. The segmentation, the per-frame speaker count and the
+embeddings are captured through the pipeline hook and saved in a state
+directory (the job directory, or next to a CLI transcript), together with
+the transcription segments. Changing the number of speakers or the
+clustering threshold afterwards then only re-runs the clustering and the
+reconstruction, which takes seconds, and the words are re-aligned to the new
+speaker turns without diarizing or transcribing again.
+"""
+import copy
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+from pyannote.audio.utils.signal import binarize
+from pyannote.core import SlidingWindow, SlidingWindowFeature
+
+STATE_FILENAME = "diarization_state.npz"
+SEGMENTS_FILENAME = "segments.json"
+
+# Pipeline hook steps whose artefacts are needed to re-cluster
+CAPTURED_STEPS = ("segmentation", "speaker_counting", "embeddings")
+
+# Pipeline internals re-clustering relies on (pyannote.audio 3.x SpeakerDiarization)
+PIPELINE_ATTRIBUTES = ("clustering", "segmentation", "_segmentation", "_frames", "reconstruct", "to_annotation")
+
+
+def _window_array(feature: SlidingWindowFeature) -> np.ndarray:
+    window = feature.sliding_window
+    return np.array([window.start, window.duration, window.step], dtype=np.float64)
+
+
+def _feature(data: np.ndarray, window: np.ndarray) -> SlidingWindowFeature:
+    start, duration, step = (float(value) for value in window)
+    return SlidingWindowFeature(data, SlidingWindow(start=start, duration=duration, step=step))
+
+
+def save_state(state_dir: Union[str, Path], artifacts: Dict[str, Any]) -> bool:
+    """Save the captured diarization artefacts.
+
+    Args:
+        state_dir: Directory to save the state in
+        artifacts: Hook artefacts collected by diarizer.run_diarization()
+
+    Returns:
+        True if saved, False if artefacts are missing or writing failed
+    """
+    missing = [step for step in CAPTURED_STEPS if step not in artifacts]
+    if missing:
+        logging.warning(f"Diarization state not saved, pipeline reported no {', '.join(missing)}.")
+        return False
+    state_path = Path(state_dir) / STATE_FILENAME
+    tmp_path = state_path.with_suffix(".tmp")
+    try:
+        state_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                segmentation=artifacts["segmentation"].data,
+                segmentation_window=_window_array(artifacts["segmentation"]),
+                count=artifacts["speaker_counting"].data,
+                count_window=_window_array(artifacts["speaker_counting"]),
+                embeddings=np.asarray(artifacts["embeddings"]),
+            )
+        os.replace(tmp_path, state_path)
+        return True
+    except OSError as e:
+        logging.error(f"Could not save diarization state to {state_path}: {e}")
+        return False
+
+
+def load_state(state_dir: Union[str, Path]) -> Optional[Dict[str, Any]]:
+    """Load a state saved with save_state().
+
+    Returns:
+        The "segmentation" and "speaker_counting" features and the
+        "embeddings" array, or None if there is no readable state
+    """
+    state_path = Path(state_dir) / STATE_FILENAME
+    if not state_path.exists():
+        return None
+    try:
+        with np.load(state_path) as stored:
+            return {
+                "segmentation": _feature(stored["segmentation"], stored["segmentation_window"]),
+                "speaker_counting": _feature(stored["count"], stored["count_window"]),
+                "embeddings": stored["embeddings"],
+            }
+    except (OSError, ValueError, KeyError) as e:
+        logging.error(f"Could not load diarization state from {state_path}: {e}")
+        return None
+
+
+def save_segments(state_dir: Union[str, Path], segments: List[Dict[str, Any]]) -> bool:
+    """Save the transcription segments the speakers are re-aligned with.
+
+    Returns:
+        True if saved, False on error
+    """
+    segments_path = Path(state_dir) / SEGMENTS_FILENAME
+    tmp_path = segments_path.with_suffix(".tmp")
+    try:
+        segments_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(segments, f)
+        os.replace(tmp_path, segments_path)
+        return True
+    except OSError as e:
+        logging.error(f"Could not save segments to {segments_path}: {e}")
+        return False
+
+
+def load_segments(state_dir: Union[str, Path]) -> Optional[List[Dict[str, Any]]]:
+    """Load segments saved with save_segments(), or None if there are none."""
+    segments_path = Path(state_dir) / SEGMENTS_FILENAME
+    if not segments_path.exists():
+        return None
+    try:
+        with open(segments_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logging.error(f"Could not load segments from {segments_path}: {e}")
+        return None
+
+
+def recluster(
+    pipeline: Any,
+    state: Dict[str, Any],
+    speaker_hints: Optional[Dict[str, int]] = None,
+    threshold: Optional[float] = None
+) -> List[Dict[str, Any]]:
+    """Cluster saved embeddings again and rebuild the speaker turns.
+
+    This repeats the steps of pyannote's SpeakerDiarization.apply() after
+    the embeddings, without running the segmentation or embedding models.
+
+    Args:
+        pipeline: The loaded diarization pipeline the state was made with
+        state: State from load_state()
+        speaker_hints: Speaker-count hints from diarizer.speaker_hints()
+        threshold: Clustering threshold replacing the pipeline's own
+
+    Returns:
+        Sorted speaker turns, labelled SPEAKER_00, SPEAKER_01, ...
+
+    Raises:
+        RuntimeError: If the installed pyannote.audio pipeline does not
+            expose the internals re-clustering needs
+    """
+    missing = [name for name in PIPELINE_ATTRIBUTES if not hasattr(pipeline, name)]
+    if missing:
+        raise RuntimeError(
+            f"The diarization pipeline does not support re-clustering (no {', '.join(missing)}); "
+            f"check the installed pyannote.audio version"
+        )
+    start = time.time()
+    hints = speaker_hints or {}
+    segmentations = state["segmentation"]
+    count = state["speaker_counting"]
+    if np.nanmax(count.data) == 0.0:
+        return []
+
+    num_speakers = hints.get("num_speakers")
+    min_speakers = hints.get("min_speakers")
+    max_speakers = hints.get("max_speakers")
+    if hasattr(pipeline, "set_num_speakers"):
+        num_speakers, min_speakers, max_speakers = pipeline.set_num_speakers(
+            num_speakers=num_speakers, min_speakers=min_speakers, max_speakers=max_speakers
+        )
+
+    clustering = pipeline.clustering
+    if threshold is not None:
+        # The pipeline may be resident and shared with running jobs
+        clustering = copy.deepcopy(clustering)
+        clustering.threshold = threshold
+
+    # Powerset models (pyannote.audio >= 3) already give binary activations
+    # and have no segmentation threshold
+    specifications = getattr(getattr(pipeline._segmentation, "model", None), "specifications", None)
+    if getattr(specifications, "powerset", False):
+        binarized = segmentations
+    else:
+        binarized = binarize(segmentations, onset=pipeline.segmentation.threshold, initial_state=False)
+    hard_clusters = clustering(
+        embeddings=state["embeddings"],
+        segmentations=binarized,
+        num_clusters=num_speakers,
+        min_clusters=min_speakers,
+        max_clusters=max_speakers,
+        frames=pipeline._frames,
+    )[0]
+    # Speakers inactive in a chunk belong to no cluster
+    hard_clusters[np.sum(binarized.data, axis=1) == 0] = -2
+    if max_speakers is not None:
+        # Counting may overcount speakers active at once; cap it as apply() does
+        count = SlidingWindowFeature(
+            np.minimum(count.data, max_speakers).astype(np.int8), count.sliding_window
+        )
+
+    discrete = pipeline.reconstruct(segmentations, hard_clusters, count)
+    annotation = pipeline.to_annotation(
+        discrete, min_duration_on=0.0, min_duration_off=pipeline.segmentation.min_duration_off
+    )
+    annotation = annotation.rename_labels(
+        {label: f"SPEAKER_{index:02d}" for index, label in enumerate(annotation.labels())}
+    )
+
+    speaker_turns = [
+        {"start": turn.start, "end": turn.end, "speaker": label}
+        for turn, _, label in annotation.itertracks(yield_label=True)
+    ]
+    speaker_turns.sort(key=lambda turn: turn["start"])
+    logging.info(f"Re-clustered into {len(annotation.labels())} speakers in "
+                 f"{time.time() - start:.2f} seconds.")
+    return speaker_turns
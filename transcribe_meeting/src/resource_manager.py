@@ -80,6 +80,16 @@ def cleanup_gpu_memory() -> None:
         logging.error(f"Error clearing GPU memory: {e}")
 
 
+def release_memory() -> None:
+    """Release memory held by finished or cancelled jobs.
+
+    Runs garbage collection so dropped model references are freed, then
+    clears the GPU cache.
+    """
+    gc.collect()
+    cleanup_gpu_memory()
+
+
 def monitor_gpu_usage(tag: str = "") -> None:
     """Log current GPU memory usage for monitoring.
     
@@ -0,0 +1,327 @@
+# sharding.py
+"""Sharded processing of one long recording on several API workers.
+
+A coordinator cuts the recording into overlapping shards (16 kHz mono
+FLAC, extracted with seeked ffmpeg processes) and sends each one to a free
+worker instance of the API over HTTP, asking for speaker embeddings with
+the result. Every worker diarizes and transcribes its shard on its own, so
+the shard results use local times and local speaker labels.
+
+The results are merged in timeline order: the local speakers of each shard
+are mapped onto global speakers by embedding similarity with a
+SpeakerStitcher, turns and words are moved to recording time, and each
+shard only contributes the words and turns up to the middle of its overlap
+with the next shard, so the cut falls where both shards had context. Words
+of a speaker that could not be matched (no embedding) are given the
+closest merged turn.
+
+A shard that fails on one worker is retried on the others. Workers only
+need the regular API; to try it on one machine, start several instances on
+different ports (see the README).
+"""
+import json
+import logging
+import math
+import subprocess
+import tempfile
+import threading
+import time
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Collection, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from . import alignment
+from . import audio_utils
+from . import output_utils
+from . import speaker_embeddings
+from . import windowed
+
+SHARD_FORMAT = "flac"
+REQUEST_TIMEOUT_S = 60.0
+
+# Statuses of a job that is still running on a worker
+PENDING_STATUSES = ("queued", "processing")
+
+
+def plan_shards(
+    duration: float,
+    shard_seconds: float,
+    overlap_seconds: float
+) -> List[Tuple[float, float]]:
+    """Split a recording into shards sharing ``overlap_seconds`` with the next one.
+
+    Returns:
+        (start, end) of every shard in seconds, in timeline order
+    """
+    if duration <= shard_seconds:
+        return [(0.0, duration)]
+    step = shard_seconds - overlap_seconds
+    shards = []
+    start = 0.0
+    while True:
+        end = min(start + shard_seconds, duration)
+        shards.append((start, end))
+        if end >= duration:
+            return shards
+        start += step
+
+
+def extract_shard(
+    media_path: str,
+    shard_path: Union[str, Path],
+    start_seconds: float,
+    duration_seconds: float
+) -> bool:
+    """Extract one shard of a recording as 16 kHz mono FLAC.
+
+    Returns:
+        True if extracted, False on error
+    """
+    ffmpeg_command = [
+        "ffmpeg",
+        "-nostdin",
+        "-loglevel", "error",
+        "-ss", f"{start_seconds:.6f}",  # Input seek: only the shard is demuxed
+        "-i", str(media_path),
+        "-t", f"{duration_seconds:.6f}",
+        "-map", "0:a:0",
+        "-ac", "1",
+        "-ar", str(audio_utils.SAMPLE_RATE),
+        "-c:a", "flac",
+        "-y",
+        str(shard_path)
+    ]
+    try:
+        audio_utils.run_ffmpeg(ffmpeg_command)
+        return True
+    except FileNotFoundError:
+        logging.error("Error: ffmpeg command not found. Make sure ffmpeg is installed and in your system's PATH.")
+        return False
+    except subprocess.CalledProcessError as e:
+        logging.error(f"Could not extract the shard at {start_seconds:.1f}s of {media_path}: {e.stderr}")
+        return False
+
+
+class ShardWorker:
+    """Client for one worker instance of the API."""
+
+    def __init__(self, base_url: str, poll_seconds: float = 5.0, timeout: float = REQUEST_TIMEOUT_S):
+        """
+        Args:
+            base_url: Root URL of the worker, e.g. http://10.0.0.2:8000
+            poll_seconds: How often the status of a running job is polled
+            timeout: Timeout of each HTTP request
+        """
+        self.base_url = base_url.rstrip("/")
+        self.poll_seconds = poll_seconds
+        self.timeout = timeout
+
+    def _request(
+        self,
+        method: str,
+        path: str,
+        body: Any = None,
+        headers: Optional[Dict[str, str]] = None
+    ) -> Any:
+        """Send a request to the worker and decode its JSON response."""
+        request = urllib.request.Request(self.base_url + path, data=body, method=method, headers=headers or {})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            return json.load(response)
+
+    def transcribe(self, shard_path: Path, max_speakers: Optional[int] = None) -> Dict[str, Any]:
+        """Process a shard on the worker and return its result document.
+
+        The shard is streamed to ``/transcribe/stream``, the job is polled
+        until it finishes, and the job is deleted on the worker afterwards.
+
+        Returns:
+            The "speaker_turns", "words" and "speaker_embeddings" of the shard
+
+        Raises:
+            OSError: If the worker cannot be reached or answers with an error
+            RuntimeError: If the job fails on the worker
+        """
+        params = {"filename": shard_path.name, "with_embeddings": "true"}
+        if max_speakers:
+            params["max_speakers"] = str(max_speakers)
+        with open(shard_path, "rb") as f:
+            job = self._request(
+                "POST",
+                "/transcribe/stream?" + urllib.parse.urlencode(params),
+                f,
+                {"Content-Type": "application/octet-stream", "Content-Length": str(shard_path.stat().st_size)}
+            )
+        job_id = job["job_id"]
+        try:
+            while job["status"] in PENDING_STATUSES:
+                time.sleep(self.poll_seconds)
+                job = self._request("GET", f"/jobs/{job_id}")
+            if job["status"] != "completed":
+                raise RuntimeError(f"Job {job_id} on {self.base_url} {job['status']}: {job.get('message')}")
+            return self._request("GET", f"/jobs/{job_id}/result")
+        finally:
+            try:
+                self._request("DELETE", f"/jobs/{job_id}")
+            except (OSError, ValueError) as e:
+                logging.warning(f"Could not delete job {job_id} on {self.base_url}: {e}")
+
+
+class _IdleWorkers:
+    """Workers not processing a shard at the moment."""
+
+    def __init__(self, workers: Sequence[ShardWorker]):
+        self._idle = list(workers)
+        self._condition = threading.Condition()
+
+    def acquire(self, exclude: Collection[ShardWorker]) -> ShardWorker:
+        """Wait for an idle worker not in ``exclude`` and take it."""
+        with self._condition:
+            self._condition.wait_for(lambda: any(worker not in exclude for worker in self._idle))
+            worker = next(worker for worker in self._idle if worker not in exclude)
+            self._idle.remove(worker)
+            return worker
+
+    def release(self, worker: ShardWorker) -> None:
+        """Return a worker taken with acquire()."""
+        with self._condition:
+            self._idle.append(worker)
+            self._condition.notify_all()
+
+
+def merge_shards(
+    results: Sequence[Dict[str, Any]],
+    shards: Sequence[Tuple[float, float]],
+    stitch_threshold: float = 0.5
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Merge the shard results into turns and words of the whole recording.
+
+    Args:
+        results: Result document of every shard, in timeline order
+        shards: (start, end) of every shard, from plan_shards()
+        stitch_threshold: See speaker_embeddings.SpeakerStitcher
+
+    Returns:
+        The merged speaker turns and aligned words, in recording time
+    """
+    cuts = [(shards[i + 1][0] + shards[i][1]) / 2 for i in range(len(shards) - 1)]
+    keep_ranges = list(zip([-math.inf] + cuts, cuts + [math.inf]))
+    stitcher = speaker_embeddings.SpeakerStitcher(stitch_threshold)
+
+    speaker_turns: List[Dict[str, Any]] = []
+    words: List[Dict[str, Any]] = []
+    for result, (offset, _), (keep_start, keep_end) in zip(results, shards, keep_ranges):
+        local_turns = result.get("speaker_turns") or []
+        embeddings = {
+            label: speaker_embeddings.normalize(np.asarray(vector, dtype=np.float32))
+            for label, vector in (result.get("speaker_embeddings") or {}).items()
+        }
+        if local_turns and not embeddings:
+            logging.warning(f"Shard at {offset:.1f}s has no speaker embeddings; "
+                            f"its words get the speakers of the neighbouring shards.")
+        mapping = stitcher.assign(embeddings, speaker_embeddings.speaker_durations(local_turns))
+
+        for turn in speaker_embeddings.relabel_turns(local_turns, mapping):
+            start = max(turn["start"] + offset, keep_start)
+            end = min(turn["end"] + offset, keep_end)
+            if start < end:
+                speaker_turns.append(dict(turn, start=start, end=end))
+        for word in result.get("words") or []:
+            start, end = word["start"] + offset, word["end"] + offset
+            if keep_start <= (start + end) / 2 < keep_end:
+                words.append(dict(word, start=start, end=end, speaker=mapping.get(word.get("speaker"))))
+
+    speaker_turns = windowed.merge_touching_turns(speaker_turns)
+    unmatched = [word for word in words if word["speaker"] is None]
+    if unmatched:
+        words = [word for word in words if word["speaker"] is not None]
+        words.extend(alignment.align_words_with_speakers([{"words": unmatched}], speaker_turns))
+        words.sort(key=lambda word: word["start"])
+    return speaker_turns, words
+
+
+def run_sharded(
+    media_path: Union[str, Path],
+    worker_urls: Sequence[str],
+    output_path: Union[str, Path],
+    shard_seconds: float = 1800.0,
+    overlap_seconds: float = 30.0,
+    speaker_hints: Optional[Dict[str, int]] = None,
+    stitch_threshold: float = 0.5,
+    poll_seconds: float = 5.0
+) -> Dict[str, Any]:
+    """Transcribe a recording by spreading its shards over several workers.
+
+    Each worker processes one shard at a time; a shard that fails on one
+    worker is retried on each of the others once.
+
+    Args:
+        media_path: The recording
+        worker_urls: Root URLs of the worker API instances
+        output_path: Transcript to write
+        shard_seconds: Length of each shard
+        overlap_seconds: Audio shared by consecutive shards
+        speaker_hints: Speaker-count hints for the whole recording; a shard
+            may hear fewer speakers, so workers only get the upper bound
+        stitch_threshold: See speaker_embeddings.SpeakerStitcher
+        poll_seconds: How often workers are polled for the job status
+
+    Returns:
+        Summary with the number of "shards", "speakers" and "words" and the
+        wall-clock "seconds"
+
+    Raises:
+        RuntimeError: If the recording cannot be read or a shard fails on
+            every worker
+    """
+    if not worker_urls:
+        raise RuntimeError("No workers given")
+    duration = audio_utils.probe_duration(str(media_path))
+    if not duration:
+        raise RuntimeError(f"Could not determine the duration of {media_path}")
+    shards = plan_shards(duration, shard_seconds, overlap_seconds)
+    speaker_hints = speaker_hints or {}
+    max_speakers = speaker_hints.get("num_speakers") or speaker_hints.get("max_speakers")
+
+    workers = [ShardWorker(url, poll_seconds) for url in worker_urls]
+    idle_workers = _IdleWorkers(workers)
+    logging.info(f"Splitting {media_path} ({duration:.0f}s) into {len(shards)} shards "
+                 f"for {len(worker_urls)} workers.")
+    start_time = time.time()
+
+    with tempfile.TemporaryDirectory() as shard_dir:
+        def process(index: int) -> Dict[str, Any]:
+            start, end = shards[index]
+            shard_path = Path(shard_dir) / f"shard_{index:03d}.{SHARD_FORMAT}"
+            if not extract_shard(str(media_path), shard_path, start, end - start):
+                raise RuntimeError(f"Could not extract shard {index} of {media_path}")
+            tried: List[ShardWorker] = []
+            last_error: Optional[Exception] = None
+            while len(tried) < len(workers):
+                worker = idle_workers.acquire(tried)
+                tried.append(worker)
+                try:
+                    result = worker.transcribe(shard_path, max_speakers)
+                    logging.info(f"Shard {index} ({start:.0f}s to {end:.0f}s) done on {worker.base_url}.")
+                    return result
+                except (OSError, ValueError, RuntimeError) as e:
+                    logging.warning(f"Shard {index} failed on {worker.base_url}: {e}")
+                    last_error = e
+                finally:
+                    idle_workers.release(worker)
+            raise RuntimeError(f"Shard {index} failed on every worker: {last_error}")
+
+        with ThreadPoolExecutor(max_workers=len(worker_urls)) as executor:
+            results = list(executor.map(process, range(len(shards))))
+
+    speaker_turns, words = merge_shards(results, shards, stitch_threshold)
+    if not output_utils.save_transcript_with_speakers(words, str(output_path)):
+        raise RuntimeError(f"Could not save the transcript to {output_path}")
+    seconds = time.time() - start_time
+    speakers = len({turn["speaker"] for turn in speaker_turns})
+    logging.info(f"Sharded transcription of {media_path} finished in {seconds:.2f} seconds: "
+                 f"{len(words)} words, {speakers} speakers.")
+    return {"shards": len(shards), "speakers": speakers, "words": len(words), "seconds": seconds}
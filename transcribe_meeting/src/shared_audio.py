@@ -0,0 +1,93 @@
+# shared_audio.py
+"""Decoded audio shared between stages and worker processes via a memory map.
+
+The job audio is decoded once into ``audio.f32.npy`` in the job directory.
+Every stage, in this process or in a worker process, attaches to that file
+with ``np.load(..., mmap_mode="r")``: the pages live in the OS page cache and
+are shared rather than copied, so running stages concurrently costs little
+extra memory.
+"""
+import os
+import struct
+import logging
+import subprocess
+from pathlib import Path
+from typing import Optional, Union
+
+import numpy as np
+
+from . import audio_utils
+from .cancellation import CancellationToken
+
+SHARED_AUDIO_FILENAME = "audio.f32.npy"
+
+# The data is streamed in before its length is known, so a fixed-size
+# header is reserved up front and filled in at the end.
+NPY_HEADER_BYTES = 128
+
+
+def _npy_header(num_samples: int) -> bytes:
+    """Build a fixed-size .npy v1.0 header for a 1-D little-endian float32 array."""
+    header = "{'descr': '<f4', 'fortran_order': False, 'shape': (%d,), }" % num_samples
+    # magic (6) + version (2) + header length (2) + header ending in a newline
+    header = header.ljust(NPY_HEADER_BYTES - 10 - 1) + "\n"
+    return b"\x93NUMPY\x01\x00" + struct.pack("<H", len(header)) + header.encode("latin1")
+
+
+def write_shared_waveform(
+    media_path: Union[str, Path],
+    job_dir: Union[str, Path],
+    cancel_token: Optional[CancellationToken] = None
+) -> Optional[Path]:
+    """Decode a recording once into a memory-mappable .npy file.
+
+    The PCM stream from ffmpeg is converted chunk by chunk and appended to
+    the file, so the whole waveform is never held in memory.
+
+    Args:
+        media_path: Path to the input media file
+        job_dir: Directory to write the shared audio file to
+        cancel_token: Optional token; cancelling it kills ffmpeg
+
+    Returns:
+        Path to the .npy file, or None if decoding failed
+    """
+    shared_path = Path(job_dir) / SHARED_AUDIO_FILENAME
+    tmp_path = shared_path.with_suffix(".tmp")
+    logging.info(f"Decoding audio from {os.path.basename(str(media_path))} into {shared_path.name}...")
+    try:
+        num_samples = 0
+        with open(tmp_path, "wb") as f:
+            f.write(b"\x00" * NPY_HEADER_BYTES)
+            for chunk in audio_utils.iter_pcm_chunks(str(media_path), cancel_token):
+                f.write(chunk.astype("<f4", copy=False).tobytes())
+                num_samples += chunk.shape[0]
+            f.seek(0)
+            f.write(_npy_header(num_samples))
+        os.replace(tmp_path, shared_path)
+        logging.info(f"Shared audio written: {num_samples / audio_utils.SAMPLE_RATE:.1f}s.")
+        return shared_path
+    except FileNotFoundError:
+        logging.error("Error: ffmpeg command not found. Make sure ffmpeg is installed and in your system's PATH.")
+    except subprocess.CalledProcessError as e:
+        if cancel_token is not None and cancel_token.cancelled:
+            logging.warning(f"FFmpeg audio decoding stopped: {cancel_token.reason}")
+        else:
+            logging.error(f"Error during FFmpeg execution: {e}")
+            logging.error(f"FFmpeg stderr:\n{e.stderr}")
+    except Exception as e:
+        logging.error(f"An unexpected error occurred while writing shared audio: {e}")
+    tmp_path.unlink(missing_ok=True)
+    return None
+
+
+def attach_waveform(shared_path: Union[str, Path]) -> np.ndarray:
+    """Attach to a shared waveform without copying it.
+
+    Args:
+        shared_path: Path written by write_shared_waveform()
+
+    Returns:
+        Read-only memory-mapped float32 waveform
+    """
+    return np.load(str(shared_path), mmap_mode="r")
@@ -0,0 +1,213 @@
+# speaker_embeddings.py
+"""Speaker embeddings and stitching of local speaker labels.
+
+Whenever audio is diarized in pieces (windows of a long recording, shards,
+new tails of a growing file), each piece labels its speakers SPEAKER_00,
+SPEAKER_01, ... on its own. A centroid embedding per local speaker is
+computed with the diarization pipeline's own embedding model, and a
+SpeakerStitcher matches those centroids against the global speakers seen so
+far by cosine similarity, so the same voice keeps the same label.
+"""
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import torch
+
+from . import audio_utils
+
+# Speakers with less speech than this in a piece cannot be embedded reliably
+MIN_EMBED_SECONDS = 0.5
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalize embeddings along their last axis."""
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def speaker_durations(speaker_turns: List[Dict[str, Any]]) -> Dict[str, float]:
+    """Total speech duration of every speaker label."""
+    durations: Dict[str, float] = {}
+    for turn in speaker_turns:
+        durations[turn["speaker"]] = durations.get(turn["speaker"], 0.0) + turn["end"] - turn["start"]
+    return durations
+
+
+def embed_speakers(
+    pipeline: Any,
+    waveform: np.ndarray,
+    speaker_turns: List[Dict[str, Any]],
+    max_seconds: float = 30.0
+) -> Dict[str, np.ndarray]:
+    """Compute one centroid embedding per speaker of a diarized waveform.
+
+    The longest turns of each speaker, up to ``max_seconds`` in total, are
+    concatenated and embedded with the pipeline's embedding model.
+
+    Args:
+        pipeline: Loaded pyannote diarization pipeline
+        waveform: 16 kHz mono float32 waveform the turns refer to
+        speaker_turns: Turns from diarizer.extract_speaker_turns()
+        max_seconds: Most speech embedded per speaker
+
+    Returns:
+        Normalized embedding per speaker label; speakers with less than
+        MIN_EMBED_SECONDS of speech, or all speakers if the pipeline has no
+        embedding model, are missing
+    """
+    embedding_model = getattr(pipeline, "_embedding", None)
+    if embedding_model is None:
+        logging.warning("Diarization pipeline exposes no embedding model, speakers cannot be stitched.")
+        return {}
+
+    embeddings: Dict[str, np.ndarray] = {}
+    sr = audio_utils.SAMPLE_RATE
+    for label in sorted({turn["speaker"] for turn in speaker_turns}):
+        turns = sorted(
+            (turn for turn in speaker_turns if turn["speaker"] == label),
+            key=lambda turn: turn["end"] - turn["start"],
+            reverse=True
+        )
+        pieces = []
+        remaining = int(max_seconds * sr)
+        for turn in turns:
+            piece = waveform[int(turn["start"] * sr):int(turn["end"] * sr)][:remaining]
+            pieces.append(piece)
+            remaining -= piece.shape[0]
+            if remaining <= 0:
+                break
+        speech = np.concatenate(pieces) if pieces else np.zeros(0, dtype=np.float32)
+        if speech.shape[0] < MIN_EMBED_SECONDS * sr:
+            continue
+        batch = torch.from_numpy(np.ascontiguousarray(speech, dtype=np.float32))[None, None]
+        embedding = np.asarray(embedding_model(batch))[0]
+        if np.all(np.isfinite(embedding)):
+            embeddings[label] = normalize(embedding)
+    return embeddings
+
+
+def match_greedy(similarity: np.ndarray, threshold: float) -> List[Tuple[int, int]]:
+    """One-to-one matching of rows to columns of a similarity matrix.
+
+    Pairs are taken greedily by descending similarity; each row and each
+    column is used at most once, and pairs below ``threshold`` are never
+    taken.
+
+    Returns:
+        (row, column) index pairs, best first
+    """
+    if similarity.size == 0:
+        return []
+    rows, columns = np.nonzero(similarity >= threshold)
+    order = np.argsort(similarity[rows, columns])[::-1]
+    pairs: List[Tuple[int, int]] = []
+    used_rows, used_columns = set(), set()
+    for index in order:
+        row, column = int(rows[index]), int(columns[index])
+        if row in used_rows or column in used_columns:
+            continue
+        pairs.append((row, column))
+        used_rows.add(row)
+        used_columns.add(column)
+    return pairs
+
+
+class SpeakerStitcher:
+    """Maps local speaker labels of successive pieces onto global speakers.
+
+    Each global speaker keeps a running, duration-weighted centroid. The
+    local speakers of one piece are matched greedily by descending cosine
+    similarity, so two local speakers of the same piece never share a
+    global speaker; a local speaker matching no global speaker above the
+    threshold becomes a new one.
+    """
+
+    def __init__(self, threshold: float = 0.5, label_format: str = "SPEAKER_{:02d}"):
+        """
+        Args:
+            threshold: Lowest cosine similarity at which two centroids are
+                considered the same voice
+            label_format: Format of new global labels, given their index
+        """
+        self.threshold = threshold
+        self.label_format = label_format
+        self.labels: List[str] = []
+        self._sums: List[np.ndarray] = []
+        self._weights: List[float] = []
+
+    @property
+    def centroids(self) -> np.ndarray:
+        """Normalized centroid of every global speaker, in label order."""
+        if not self._sums:
+            return np.zeros((0, 0), dtype=np.float32)
+        return normalize(np.stack(self._sums))
+
+    def assign(
+        self,
+        embeddings: Dict[str, np.ndarray],
+        durations: Optional[Dict[str, float]] = None
+    ) -> Dict[str, str]:
+        """Map the local speakers of one piece to global labels.
+
+        Args:
+            embeddings: Normalized embedding per local speaker label
+            durations: Speech seconds per local speaker, used to weight
+                the centroid update (1.0 each if omitted)
+
+        Returns:
+            Global label for every local label in ``embeddings``
+        """
+        durations = durations or {}
+        local_labels = list(embeddings)
+        mapping: Dict[str, str] = {}
+        if local_labels and self._sums:
+            similarity = np.stack([embeddings[label] for label in local_labels]) @ self.centroids.T
+            for local_index, global_index in match_greedy(similarity, self.threshold):
+                mapping[local_labels[local_index]] = self.labels[global_index]
+                logging.debug(f"Stitched {local_labels[local_index]} to {self.labels[global_index]} "
+                              f"(similarity {similarity[local_index, global_index]:.2f}).")
+
+        for local_label in local_labels:
+            weight = max(durations.get(local_label, 1.0), 1e-3)
+            if local_label in mapping:
+                index = self.labels.index(mapping[local_label])
+                self._sums[index] = self._sums[index] + weight * embeddings[local_label]
+                self._weights[index] += weight
+            else:
+                mapping[local_label] = self.label_format.format(len(self.labels))
+                self.labels.append(mapping[local_label])
+                self._sums.append(weight * embeddings[local_label])
+                self._weights.append(weight)
+        return mapping
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-serializable state, for resuming stitching later."""
+        return {
+            "threshold": self.threshold,
+            "label_format": self.label_format,
+            "labels": list(self.labels),
+            "sums": [vector.tolist() for vector in self._sums],
+            "weights": list(self._weights),
+        }
+
+    @classmethod
+    def from_dict(cls, state: Dict[str, Any]) -> "SpeakerStitcher":
+        """Restore a stitcher saved with to_dict()."""
+        stitcher = cls(state["threshold"], state["label_format"])
+        stitcher.labels = list(state["labels"])
+        stitcher._sums = [np.asarray(vector, dtype=np.float32) for vector in state["sums"]]
+        stitcher._weights = list(state["weights"])
+        return stitcher
+
+
+def relabel_turns(
+    speaker_turns: List[Dict[str, Any]],
+    mapping: Dict[str, str]
+) -> List[Dict[str, Any]]:
+    """Apply a local-to-global label mapping, dropping unmapped speakers."""
+    return [
+        dict(turn, speaker=mapping[turn["speaker"]])
+        for turn in speaker_turns
+        if turn["speaker"] in mapping
+    ]
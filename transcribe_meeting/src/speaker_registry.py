@@ -0,0 +1,277 @@
+# speaker_registry.py
+"""Registry of known voices, shared by all jobs.
+
+Every registered speaker has a name and a normalized centroid embedding
+(computed with speaker_embeddings.embed_speakers()). The centroids are kept
+as one float32 matrix, stored on disk as ``embeddings.npy`` next to
+``speakers.json`` with the names and accumulated speech seconds. Matching
+the speakers of a new job is a single matrix product against that matrix,
+so a lookup costs one BLAS call however many voices are registered.
+
+Speakers that match no registered voice can be enrolled under a new stable
+name (VOICE_0001, ...), which can later be renamed to the person's name.
+"""
+import contextlib
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+
+from . import config
+from .speaker_embeddings import match_greedy, normalize
+
+EMBEDDINGS_FILENAME = "embeddings.npy"
+SPEAKERS_FILENAME = "speakers.json"
+NEW_NAME_FORMAT = "VOICE_{:04d}"
+
+
+class SpeakerRegistry:
+    """Named centroid embeddings of known voices, persisted in a directory."""
+
+    def __init__(self, directory: Union[str, Path]):
+        """
+        Args:
+            directory: Directory holding the registry files; created on
+                the first save
+        """
+        self.directory = Path(directory)
+        self.names: List[str] = []
+        self.weights: List[float] = []
+        self.matrix = np.zeros((0, 0), dtype=np.float32)
+        # Reentrant, so identify_speakers() can hold it across match, enroll and save
+        self._lock = threading.RLock()
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def _load(self) -> None:
+        """Read the registry files, starting empty if there are none."""
+        speakers_path = self.directory / SPEAKERS_FILENAME
+        embeddings_path = self.directory / EMBEDDINGS_FILENAME
+        if not speakers_path.exists() or not embeddings_path.exists():
+            return
+        try:
+            with open(speakers_path, "r", encoding="utf-8") as f:
+                speakers = json.load(f)
+            matrix = np.load(embeddings_path)
+            if matrix.shape[0] != len(speakers["names"]):
+                raise ValueError("names and embeddings differ in length")
+        except (OSError, ValueError, KeyError) as e:
+            logging.error(f"Could not load the speaker registry from {self.directory}: {e}")
+            return
+        self.names = list(speakers["names"])
+        self.weights = [float(weight) for weight in speakers["weights"]]
+        self.matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+        logging.info(f"Loaded {len(self.names)} registered speakers from {self.directory}.")
+
+    def save(self) -> bool:
+        """Write the registry files atomically.
+
+        Returns:
+            True if saved, False on error
+        """
+        with self._lock:
+            try:
+                self.directory.mkdir(parents=True, exist_ok=True)
+                embeddings_tmp = self.directory / (EMBEDDINGS_FILENAME + ".tmp")
+                speakers_tmp = self.directory / (SPEAKERS_FILENAME + ".tmp")
+                with open(embeddings_tmp, "wb") as f:
+                    np.save(f, self.matrix)
+                with open(speakers_tmp, "w", encoding="utf-8") as f:
+                    json.dump({"names": self.names, "weights": self.weights}, f, indent=2)
+                os.replace(embeddings_tmp, self.directory / EMBEDDINGS_FILENAME)
+                os.replace(speakers_tmp, self.directory / SPEAKERS_FILENAME)
+                return True
+            except OSError as e:
+                logging.error(f"Could not save the speaker registry to {self.directory}: {e}")
+                return False
+
+    def match(
+        self,
+        embeddings: Dict[str, np.ndarray],
+        threshold: float
+    ) -> Dict[str, Dict[str, Any]]:
+        """Match speaker embeddings against the registered voices.
+
+        Every registered voice is matched by at most one speaker, so two
+        speakers of one recording never get the same name.
+
+        Args:
+            embeddings: Normalized embedding per speaker label
+            threshold: Lowest cosine similarity accepted as the same voice
+
+        Returns:
+            For every matched label, the registered "name" and the cosine
+            similarity as "confidence"
+        """
+        labels = list(embeddings)
+        with self._lock:
+            if not labels or not self.names:
+                return {}
+            similarity = np.stack([embeddings[label] for label in labels]).astype(np.float32) @ self.matrix.T
+            return {
+                labels[row]: {"name": self.names[column], "confidence": float(similarity[row, column])}
+                for row, column in match_greedy(similarity, threshold)
+            }
+
+    def enroll(self, name: str, embedding: np.ndarray, weight: float = 1.0) -> None:
+        """Add a voice, or fold the embedding into the centroid of a known name.
+
+        Args:
+            name: Name of the speaker
+            embedding: Normalized embedding
+            weight: Speech seconds behind the embedding
+        """
+        with self._lock:
+            self._enroll(name, embedding, weight)
+
+    def enroll_new(self, embedding: np.ndarray, weight: float = 1.0) -> str:
+        """Register a voice under a new name, picked and taken in one step.
+
+        Args:
+            embedding: Normalized embedding
+            weight: Speech seconds behind the embedding
+
+        Returns:
+            The new name
+        """
+        with self._lock:
+            name = self.new_name()
+            self._enroll(name, embedding, weight)
+            return name
+
+    def _enroll(self, name: str, embedding: np.ndarray, weight: float) -> None:
+        """enroll() with the lock held."""
+        embedding = normalize(np.asarray(embedding, dtype=np.float32))
+        weight = max(weight, 1e-3)
+        if name in self.names:
+            index = self.names.index(name)
+            total = self.weights[index] + weight
+            self.matrix[index] = normalize(
+                (self.weights[index] * self.matrix[index] + weight * embedding) / total
+            )
+            self.weights[index] = total
+            return
+        if self.names:
+            self.matrix = np.vstack([self.matrix, embedding[None]])
+        else:
+            self.matrix = embedding[None].copy()
+        self.names.append(name)
+        self.weights.append(weight)
+
+    def rename(self, old_name: str, new_name: str) -> bool:
+        """Rename a registered speaker.
+
+        Returns:
+            True if renamed, False if ``old_name`` is unknown or ``new_name`` taken
+        """
+        with self._lock:
+            if old_name not in self.names or new_name in self.names:
+                return False
+            self.names[self.names.index(old_name)] = new_name
+            return True
+
+    def remove(self, name: str) -> bool:
+        """Forget a registered speaker.
+
+        Returns:
+            True if removed, False if unknown
+        """
+        with self._lock:
+            if name not in self.names:
+                return False
+            index = self.names.index(name)
+            del self.names[index]
+            del self.weights[index]
+            self.matrix = np.delete(self.matrix, index, axis=0)
+            return True
+
+    def new_name(self) -> str:
+        """An unused name for a newly enrolled voice; see enroll_new() to take it."""
+        with self._lock:
+            index = len(self.names) + 1
+            while NEW_NAME_FORMAT.format(index) in self.names:
+                index += 1
+            return NEW_NAME_FORMAT.format(index)
+
+
+def identify_speakers(
+    registry: SpeakerRegistry,
+    embeddings: Dict[str, np.ndarray],
+    durations: Dict[str, float],
+    threshold: float,
+    enroll: bool = False
+) -> Dict[str, Dict[str, Any]]:
+    """Name the speakers of a job from the registry.
+
+    Args:
+        registry: The speaker registry
+        embeddings: Normalized embedding per speaker label of the job
+        durations: Speech seconds per speaker label
+        threshold: Lowest cosine similarity accepted as the same voice
+        enroll: Fold matched embeddings into their centroids and register
+            unmatched speakers under new names, then save the registry; the
+            registry stays locked meanwhile, so concurrent jobs neither take
+            the same new name nor miss each other's new voices
+
+    Returns:
+        Per speaker label with an embedding: "name" (the label itself if
+        unknown and not enrolled), "confidence" (cosine similarity, 0.0
+        for unknown speakers) and whether the voice was "known"
+    """
+    with registry._lock if enroll else contextlib.nullcontext():
+        matches = registry.match(embeddings, threshold)
+        identities: Dict[str, Dict[str, Any]] = {}
+        for label in embeddings:
+            weight = durations.get(label, 1.0)
+            if label in matches:
+                identities[label] = dict(matches[label], known=True)
+                if enroll:
+                    registry.enroll(matches[label]["name"], embeddings[label], weight)
+            elif enroll:
+                name = registry.enroll_new(embeddings[label], weight)
+                identities[label] = {"name": name, "confidence": 0.0, "known": False}
+            else:
+                identities[label] = {"name": label, "confidence": 0.0, "known": False}
+        if enroll and embeddings:
+            registry.save()
+    for label, identity in identities.items():
+        logging.info(f"Speaker {label} identified as {identity['name']} "
+                     f"(confidence {identity['confidence']:.2f}).")
+    return identities
+
+
+def rename_speakers(
+    items: List[Dict[str, Any]],
+    identities: Dict[str, Dict[str, Any]]
+) -> List[Dict[str, Any]]:
+    """Replace the "speaker" of turns or segments by the identified names."""
+    return [
+        dict(item, speaker=identities[item["speaker"]]["name"])
+        if item.get("speaker") in identities else item
+        for item in items
+    ]
+
+
+_default_registry: Optional[SpeakerRegistry] = None
+_default_registry_lock = threading.Lock()
+
+
+def get_speaker_registry() -> Optional[SpeakerRegistry]:
+    """Get the process-wide speaker registry.
+
+    Returns:
+        The configured registry, or None if speaker identification is disabled
+    """
+    global _default_registry
+    if not config.SPEAKER_REGISTRY_ENABLED:
+        return None
+    with _default_registry_lock:
+        if _default_registry is None:
+            _default_registry = SpeakerRegistry(config.SPEAKER_REGISTRY_DIR)
+        return _default_registry
@@ -0,0 +1,250 @@
+# speech_trim.py
+"""Energy-based removal of long non-speech spans before inference.
+
+Dead air before a meeting, breaks and muted screen-shares are cut out of the
+waveform, so diarization and transcription only process audio that may
+contain speech. An OffsetMap records where every kept span came from; speaker
+turns and word timestamps produced on the trimmed audio are translated back
+to original-file time with it before the transcript is written.
+"""
+import bisect
+import logging
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from . import audio_utils
+
+FRAME_SECONDS = 0.03
+
+
+class OffsetMap:
+    """Maps timestamps on trimmed audio back to the original recording."""
+
+    def __init__(self, spans: List[Tuple[float, float]], original_duration: float):
+        """
+        Args:
+            spans: Kept (start, end) spans of the original audio, in seconds,
+                sorted and non-overlapping
+            original_duration: Duration of the original audio in seconds
+        """
+        self.spans = spans
+        self.original_duration = original_duration
+        # Start of each kept span on the trimmed timeline
+        self.trimmed_starts: List[float] = []
+        position = 0.0
+        for start, end in spans:
+            self.trimmed_starts.append(position)
+            position += end - start
+        self.trimmed_duration = position
+
+    @property
+    def removed_fraction(self) -> float:
+        """Fraction of the original duration that was cut out."""
+        if self.original_duration <= 0:
+            return 0.0
+        return 1.0 - self.trimmed_duration / self.original_duration
+
+    def _span_index(self, t: float, is_end: bool = False) -> int:
+        """Index of the kept span containing trimmed time ``t``.
+
+        A time exactly on a cut belongs to the following span, unless it is
+        the end of an interval, in which case it belongs to the preceding one.
+        """
+        if is_end:
+            index = bisect.bisect_left(self.trimmed_starts, t) - 1
+        else:
+            index = bisect.bisect_right(self.trimmed_starts, t) - 1
+        return min(max(index, 0), len(self.spans) - 1)
+
+    def to_original(self, t: float, is_end: bool = False) -> float:
+        """Translate a trimmed timestamp to original-file time.
+
+        Args:
+            t: Timestamp on the trimmed audio in seconds
+            is_end: Whether ``t`` ends an interval
+
+        Returns:
+            Timestamp on the original audio in seconds
+        """
+        if not self.spans:
+            return t
+        index = self._span_index(t, is_end)
+        start, end = self.spans[index]
+        return min(start + max(t - self.trimmed_starts[index], 0.0), end)
+
+    def map_interval(self, start: float, end: float) -> List[Tuple[float, float]]:
+        """Translate a trimmed interval, splitting it where it crosses a cut.
+
+        Returns:
+            Original-time (start, end) pieces in order
+        """
+        if not self.spans:
+            return [(start, end)]
+        first = self._span_index(start)
+        last = self._span_index(end, is_end=True)
+        if last <= first:
+            return [(self.to_original(start), self.to_original(end, is_end=True))]
+        pieces = [(self.to_original(start), self.spans[first][1])]
+        pieces += [self.spans[index] for index in range(first + 1, last)]
+        pieces.append((self.spans[last][0], self.to_original(end, is_end=True)))
+        return pieces
+
+
+def detect_speech_spans(
+    waveform: np.ndarray,
+    threshold_db: float = -45.0,
+    min_silence_seconds: float = 2.0,
+    padding_seconds: float = 0.25
+) -> List[Tuple[float, float]]:
+    """Find the spans of a waveform to keep.
+
+    Frames whose RMS level is below ``threshold_db`` dBFS are silent; only
+    silent runs of at least ``min_silence_seconds`` are cut, and kept spans
+    are widened by ``padding_seconds`` so word onsets and tails survive.
+
+    Args:
+        waveform: 16 kHz mono float32 waveform
+        threshold_db: Silence level in dBFS
+        min_silence_seconds: Shortest silence that is removed
+        padding_seconds: Audio kept on each side of a speech span
+
+    Returns:
+        Sorted, non-overlapping (start, end) spans in seconds
+    """
+    duration = waveform.shape[0] / audio_utils.SAMPLE_RATE
+    levels = frame_levels_db(waveform)
+    if levels.size == 0:
+        return [(0.0, duration)] if duration > 0 else []
+    return mask_to_spans(levels > threshold_db, duration, min_silence_seconds, padding_seconds)
+
+
+def frame_levels_db(waveform: np.ndarray) -> np.ndarray:
+    """RMS level of each FRAME_SECONDS frame of a waveform, in dBFS."""
+    frame_length = int(FRAME_SECONDS * audio_utils.SAMPLE_RATE)
+    num_frames = waveform.shape[0] // frame_length
+    frames = np.asarray(waveform[:num_frames * frame_length], dtype=np.float32)
+    rms = np.sqrt(np.mean(frames.reshape(num_frames, frame_length) ** 2, axis=1))
+    return 20 * np.log10(np.maximum(rms, 1e-10))
+
+
+def mask_to_spans(
+    voiced: np.ndarray,
+    duration: float,
+    min_silence_seconds: float,
+    padding_seconds: float
+) -> List[Tuple[float, float]]:
+    """Turn a per-frame voice activity mask into padded time spans.
+
+    Args:
+        voiced: Boolean mask with one entry per FRAME_SECONDS frame
+        duration: Duration of the audio in seconds
+        min_silence_seconds: Shorter gaps between voiced frames are bridged
+        padding_seconds: Audio added on each side of a span
+
+    Returns:
+        Sorted, non-overlapping (start, end) spans in seconds
+    """
+    spans: List[Tuple[float, float]] = []
+    voiced_frames = np.flatnonzero(voiced)
+    if voiced_frames.size == 0:
+        return spans
+    # Runs of voiced frames separated by silences that are long enough to cut
+    min_gap = int(np.ceil(min_silence_seconds / FRAME_SECONDS))
+    breaks = np.flatnonzero(np.diff(voiced_frames) > min_gap)
+    run_starts = np.concatenate(([voiced_frames[0]], voiced_frames[breaks + 1]))
+    run_ends = np.concatenate((voiced_frames[breaks], [voiced_frames[-1]])) + 1
+
+    for run_start, run_end in zip(run_starts, run_ends):
+        start = max(0.0, run_start * FRAME_SECONDS - padding_seconds)
+        end = min(duration, run_end * FRAME_SECONDS + padding_seconds)
+        if spans and start <= spans[-1][1]:
+            spans[-1] = (spans[-1][0], end)
+        else:
+            spans.append((start, end))
+    return spans
+
+
+def trim_silence(
+    waveform: np.ndarray,
+    threshold_db: float = -45.0,
+    min_silence_seconds: float = 2.0,
+    padding_seconds: float = 0.25
+) -> Tuple[np.ndarray, OffsetMap]:
+    """Cut long non-speech spans out of a waveform.
+
+    Args:
+        waveform: 16 kHz mono float32 waveform
+        threshold_db: Silence level in dBFS
+        min_silence_seconds: Shortest silence that is removed
+        padding_seconds: Audio kept on each side of a speech span
+
+    Returns:
+        Tuple of (trimmed waveform, offset map back to the original)
+    """
+    spans = detect_speech_spans(waveform, threshold_db, min_silence_seconds, padding_seconds)
+    trimmed, offset_map = cut_spans(waveform, spans)
+    duration = offset_map.original_duration
+    logging.info(
+        f"Speech trim kept {offset_map.trimmed_duration:.1f}s of {duration:.1f}s "
+        f"in {len(spans)} spans; {offset_map.removed_fraction:.1%} less audio to diarize and transcribe."
+    )
+    return trimmed, offset_map
+
+
+def cut_spans(
+    waveform: np.ndarray,
+    spans: List[Tuple[float, float]]
+) -> Tuple[np.ndarray, OffsetMap]:
+    """Keep only the given spans of a waveform.
+
+    Args:
+        waveform: 16 kHz mono float32 waveform
+        spans: Sorted, non-overlapping (start, end) spans in seconds
+
+    Returns:
+        Tuple of (concatenated spans, offset map back to the original)
+    """
+    offset_map = OffsetMap(spans, waveform.shape[0] / audio_utils.SAMPLE_RATE)
+    pieces = [
+        waveform[int(start * audio_utils.SAMPLE_RATE):int(end * audio_utils.SAMPLE_RATE)]
+        for start, end in spans
+    ]
+    trimmed = np.concatenate(pieces) if pieces else np.zeros(0, dtype=np.float32)
+    return trimmed, offset_map
+
+
+def remap_speaker_turns(
+    speaker_turns: List[Dict[str, Any]],
+    offset_map: OffsetMap
+) -> List[Dict[str, Any]]:
+    """Translate speaker turns to original time, splitting turns across cuts."""
+    remapped = []
+    for turn in speaker_turns:
+        for start, end in offset_map.map_interval(turn["start"], turn["end"]):
+            remapped.append(dict(turn, start=start, end=end))
+    return remapped
+
+
+def remap_segments(
+    segments: List[Dict[str, Any]],
+    offset_map: OffsetMap
+) -> List[Dict[str, Any]]:
+    """Translate transcription segments and their words to original time."""
+    remapped = []
+    for segment in segments:
+        words = [
+            dict(
+                word,
+                start=offset_map.to_original(word["start"]),
+                end=offset_map.to_original(word["end"], is_end=True)
+            )
+            for word in segment.get("words", [])
+        ]
+        remapped.append(dict(
+            segment,
+            start=offset_map.to_original(segment["start"]),
+            end=offset_map.to_original(segment["end"], is_end=True),
+            words=words
+        ))
+    return remapped
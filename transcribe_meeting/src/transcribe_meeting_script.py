@@ -3,14 +3,28 @@ import sys
 import argparse
 import logging
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 
-from transcribe_meeting.core import process_video
-from transcribe_meeting.file_manager import calculate_paths
+from transcribe_meeting.batch import (
+    collect_video_files,
+    format_batch_summary,
+    is_batch_target,
+    run_batch
+)
+from transcribe_meeting.diarizer import speaker_hints
+from transcribe_meeting.core import process_growing_file, recluster_transcript
+from transcribe_meeting.file_manager import calculate_paths, create_directories, diarization_state_dir
+from transcribe_meeting.speaker_registry import SpeakerRegistry
+from transcribe_meeting.sharding import run_sharded
 from transcribe_meeting.config import (
     REPO_ROOT,
     TRANSCRIPT_BASE_DIR_NAME,
-    PROCESSED_VIDEO_DIR
+    PROCESSED_VIDEO_DIR,
+    SPEAKER_REGISTRY_DIR,
+    SHARD_SECONDS,
+    SHARD_OVERLAP_S,
+    SHARD_POLL_S,
+    SPEAKER_STITCH_THRESHOLD
 )
 
 
@@ -77,7 +91,9 @@ def main() -> int:
     )
     parser.add_argument(
         "video_path",
-        help="Path to the video file to transcribe"
+        nargs="?",
+        help="Path to the video file to transcribe, or a directory / glob "
+             "pattern to transcribe several files in one batch"
     )
     parser.add_argument(
         "--output-dir",
@@ -88,22 +104,93 @@ def main() -> int:
         help="Path to the log file",
         default="transcribe.log"
     )
+    parser.add_argument(
+        "--num-speakers",
+        type=int,
+        help="Exact number of speakers, if known (speeds up diarization)"
+    )
+    parser.add_argument(
+        "--min-speakers",
+        type=int,
+        help="Lower bound on the number of speakers"
+    )
+    parser.add_argument(
+        "--max-speakers",
+        type=int,
+        help="Upper bound on the number of speakers"
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Transcribe only the audio added to a growing recording since the "
+             "last run and append it to its transcript"
+    )
+    parser.add_argument(
+        "--final",
+        action="store_true",
+        help="With --incremental: the recording is complete, process it to the end"
+    )
+    parser.add_argument(
+        "--workers",
+        nargs="+",
+        metavar="URL",
+        help="Split the recording into shards and transcribe them on these "
+             "API worker instances, e.g. http://127.0.0.1:8001"
+    )
+    parser.add_argument(
+        "--recluster",
+        metavar="TRANSCRIPT",
+        help="Re-cluster the speakers of an existing transcript with the given "
+             "speaker counts or --cluster-threshold, without transcribing again"
+    )
+    parser.add_argument(
+        "--cluster-threshold",
+        type=float,
+        help="Clustering threshold for --recluster"
+    )
+    parser.add_argument(
+        "--rename-speaker",
+        nargs=2,
+        metavar=("OLD", "NEW"),
+        help="Rename a voice in the speaker registry and exit"
+    )
     args = parser.parse_args()
+    if args.rename_speaker:
+        return rename_registered_speaker(*args.rename_speaker)
+    if not args.video_path and not args.recluster:
+        parser.error("video_path is required")
+    try:
+        hints = speaker_hints(args.num_speakers, args.min_speakers, args.max_speakers)
+    except ValueError as e:
+        parser.error(str(e))
 
     # Setup logging
     setup_logging(args.log_file)
 
+    if args.recluster:
+        return run_recluster(args.recluster, hints, args.cluster_threshold)
+
     try:
+        if is_batch_target(args.video_path):
+            return run_batch_mode(args.video_path, args.output_dir, hints)
+
         # Validate paths
         paths = validate_paths(args.video_path, args.output_dir)
 
+        if args.incremental:
+            return run_incremental(paths, args.final, hints)
+
+        if args.workers:
+            return run_sharded_mode(paths, args.workers, hints)
+
         # Process video
-        process_video(
-            job_id="cli",
-            video_path=paths["video_path"],
-            jobs={},  # Not used in CLI mode
-            transcript_base_dir=paths["transcript_subdir"]
+        summary = run_batch(
+            [paths["video_path"]],
+            transcript_base_dir_name=args.output_dir or TRANSCRIPT_BASE_DIR_NAME,
+            speaker_hints=hints
         )
+        if summary["files_failed"]:
+            raise RuntimeError(summary["results"][0]["error"])
 
         logging.info(f"Transcription complete. Output saved to: {paths['output_txt_file']}")
         return 0
@@ -113,5 +200,137 @@ def main() -> int:
         return 1
 
 
+def run_incremental(
+    paths: Dict[str, Path],
+    final: bool = False,
+    hints: Optional[Dict[str, int]] = None
+) -> int:
+    """Append the new tail of a growing recording to its transcript.
+    
+    Args:
+        paths: Paths from validate_paths()
+        final: The recording is complete
+        hints: Speaker-count hints
+        
+    Returns:
+        0 on success, 1 on failure
+    """
+    create_directories(paths)
+    summary = process_growing_file(paths["video_path"], paths["output_txt_file"], final, hints)
+    if summary is None:
+        logging.error(f"Could not process the new audio of {paths['video_path']}")
+        return 1
+    logging.info(f"Processed {summary['start']:.1f}s to {summary['end']:.1f}s: {summary['words']} words, "
+                 f"{summary['speakers']} speakers. Transcript: {paths['output_txt_file']}")
+    return 0
+
+
+def run_sharded_mode(
+    paths: Dict[str, Path],
+    workers: List[str],
+    hints: Optional[Dict[str, int]] = None
+) -> int:
+    """Transcribe one recording in shards on several API workers.
+    
+    Args:
+        paths: Paths from validate_paths()
+        workers: Root URLs of the worker API instances
+        hints: Speaker-count hints
+        
+    Returns:
+        0 on success, 1 on failure
+    """
+    create_directories(paths)
+    summary = run_sharded(
+        paths["video_path"],
+        workers,
+        paths["output_txt_file"],
+        SHARD_SECONDS,
+        SHARD_OVERLAP_S,
+        hints,
+        SPEAKER_STITCH_THRESHOLD,
+        SHARD_POLL_S
+    )
+    logging.info(f"Transcribed {summary['shards']} shards on {len(workers)} workers in "
+                 f"{summary['seconds']:.0f}s: {summary['words']} words, {summary['speakers']} speakers. "
+                 f"Transcript: {paths['output_txt_file']}")
+    return 0
+
+
+def run_recluster(
+    transcript: str,
+    hints: Optional[Dict[str, int]] = None,
+    threshold: Optional[float] = None
+) -> int:
+    """Re-cluster the speakers of a transcript and overwrite it.
+    
+    Args:
+        transcript: Path to a transcript written by this tool
+        hints: New speaker-count hints
+        threshold: New clustering threshold
+        
+    Returns:
+        0 on success, 1 on failure
+    """
+    transcript_path = Path(transcript)
+    try:
+        recluster_transcript(diarization_state_dir(transcript_path), transcript_path, hints, threshold)
+    except Exception as e:
+        logging.error(f"Error during re-clustering: {e}")
+        return 1
+    logging.info(f"Re-clustered transcript saved to: {transcript_path}")
+    return 0
+
+
+def rename_registered_speaker(old_name: str, new_name: str) -> int:
+    """Rename a voice in the speaker registry.
+    
+    Args:
+        old_name: Current name, e.g. VOICE_0003
+        new_name: New name, used in all later transcripts
+        
+    Returns:
+        0 on success, 1 on failure
+    """
+    registry = SpeakerRegistry(SPEAKER_REGISTRY_DIR)
+    if not registry.rename(old_name, new_name):
+        print(f"Cannot rename {old_name}: unknown speaker, or {new_name} already exists")
+        return 1
+    if not registry.save():
+        return 1
+    print(f"Renamed {old_name} to {new_name}")
+    return 0
+
+
+def run_batch_mode(
+    target: str,
+    output_dir: Optional[str] = None,
+    hints: Optional[Dict[str, int]] = None
+) -> int:
+    """Transcribe every media file matched by a directory or glob pattern.
+    
+    Args:
+        target: Directory or glob pattern
+        output_dir: Optional custom output directory
+        hints: Speaker-count hints applied to every file
+        
+    Returns:
+        0 if every file succeeded, 1 otherwise
+    """
+    video_files = collect_video_files(target)
+    if not video_files:
+        logging.error(f"No media files found for: {target}")
+        return 1
+
+    logging.info(f"Batch mode: {len(video_files)} files to process.")
+    summary = run_batch(
+        video_files,
+        transcript_base_dir_name=output_dir or TRANSCRIPT_BASE_DIR_NAME,
+        speaker_hints=hints
+    )
+    print(format_batch_summary(summary))
+    return 0 if summary["files_failed"] == 0 else 1
+
+
 if __name__ == "__main__":
     sys.exit(main())
\ No newline at end of file
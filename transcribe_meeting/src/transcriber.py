@@ -1,11 +1,10 @@
 # transcriber.py
 import time
-import os
 from faster_whisper import WhisperModel, BatchedInferencePipeline
 from . import config
 from . import audio_utils
 import logging
-from typing import Optional, Any, Tuple, Dict
+from typing import Optional, Any, Tuple, Dict, List, Iterable, Iterator
 
 class ModelManager:
     """Context manager for handling Whisper model resources"""
@@ -43,8 +42,20 @@ def load_whisper_model(model_size: str, device: str, compute_type: str) -> Optio
         logging.error(f"Error loading Whisper base model: {e}")
         return None
 
-def run_transcription(model: Optional[WhisperModel], audio_path: str) -> Tuple[Optional[Any], Optional[Dict]]:
-    """ Runs transcription using BatchedInferencePipeline. """
+def run_transcription(
+    model: Optional[WhisperModel],
+    audio_path: audio_utils.AudioInput,
+    clip_timestamps: Optional[List[Dict[str, Any]]] = None,
+    word_timestamps: bool = True
+) -> Tuple[Optional[Any], Optional[Dict]]:
+    """ Runs transcription using BatchedInferencePipeline.
+
+    ``audio_path`` may also be a 16 kHz mono float32 waveform, which
+    faster-whisper consumes directly without reading a file. Given
+    ``clip_timestamps`` (sample ranges from a shared VAD pass), only those
+    clips are transcribed and Whisper's own VAD is skipped. Without
+    ``word_timestamps`` the segments carry no words, which is faster.
+    """
     if model is None:
         logging.error("Error: Whisper base model not loaded.")
         return None, None
@@ -53,8 +64,9 @@ def run_transcription(model: Optional[WhisperModel], audio_path: str) -> Tuple[O
     batch_size = config.WHISPER_BATCH_SIZE
     beam_size = config.WHISPER_BEAM_SIZE
 
-    logging.info(f"Running transcription on {os.path.basename(audio_path)} "
-          f"(batch_size={batch_size}, beam_size={beam_size}, word timestamps enabled)...")
+    logging.info(f"Running transcription on {audio_utils.describe_audio(audio_path)} "
+          f"(batch_size={batch_size}, beam_size={beam_size}, "
+          f"word timestamps {'enabled' if word_timestamps else 'disabled'})...")
     start_transcription = time.time()
 
     try:
@@ -64,12 +76,16 @@ def run_transcription(model: Optional[WhisperModel], audio_path: str) -> Tuple[O
         logging.info("BatchedInferencePipeline initialized.")
 
         # Call transcribe on the batched model
+        if clip_timestamps is not None:
+            vad_arguments = {"vad_filter": False, "clip_timestamps": clip_timestamps}
+        else:
+            vad_arguments = {"vad_filter": True}
         segments, info = batched_model.transcribe(
             audio_path,
             batch_size=batch_size,
             beam_size=beam_size,
-            word_timestamps=True,
-            vad_filter=True
+            word_timestamps=word_timestamps,
+            **vad_arguments
         )
 
         # Note: 'segments' is a generator that will be materialized later
@@ -81,4 +97,57 @@ def run_transcription(model: Optional[WhisperModel], audio_path: str) -> Tuple[O
         logging.error(f"Error during batched transcription: {e}")
         import traceback
         traceback.print_exc()
-        return None, None
\ No newline at end of file
+        return None, None
+
+def segments_to_dicts(segments: Iterable[Any]) -> List[Dict[str, Any]]:
+    """ Materializes faster-whisper segments into plain, JSON-serializable dicts.
+
+    The word entries use the keys expected by the alignment module
+    ("text", "start", "end", "confidence"). Segments that are already dicts
+    are passed through unchanged.
+    """
+    segment_dicts = []
+    for segment in segments:
+        if isinstance(segment, dict):
+            segment_dicts.append(segment)
+            continue
+        words = [
+            {
+                "text": word.word.strip(),
+                "start": word.start,
+                "end": word.end,
+                "confidence": word.probability,
+            }
+            for word in (getattr(segment, "words", None) or [])
+        ]
+        segment_dicts.append({
+            "start": segment.start,
+            "end": segment.end,
+            "text": segment.text.strip(),
+            "words": words,
+        })
+    return segment_dicts
+
+def segments_by_clip(
+    segments: Iterable[Any],
+    clip_timestamps: List[Dict[str, int]],
+    frames_per_second: int
+) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """ Pairs the segments of a batched ``clip_timestamps`` run with their clip.
+
+    The batched pipeline decodes every clip (at most 30 s) as one chunk and
+    yields the segments clip by clip, each with the ``seek`` frame where its
+    clip starts, so segments map to their clip even when clips overlap or
+    touch.
+
+    Yields:
+        (index of the clip in ``clip_timestamps``, segment as a dict)
+    """
+    start_frames = [
+        int(clip["start"] / audio_utils.SAMPLE_RATE * frames_per_second) for clip in clip_timestamps
+    ]
+    index = 0
+    for segment in segments:
+        # Move on to the clip starting at the segment's frame
+        index = next((i for i in range(index, len(start_frames)) if start_frames[i] == segment.seek), index)
+        yield index, segments_to_dicts([segment])[0]
@@ -0,0 +1,131 @@
+# turn_transcription.py
+"""Diarize-first transcription of speaker turns.
+
+Instead of transcribing the whole recording and assigning every word to a
+speaker afterwards, the speaker turns are grouped into clips of one speaker
+each (consecutive short turns of the same speaker merged, long turns split,
+up to Whisper's 30 s window) and the clips are transcribed as batches via
+``clip_timestamps``. Every segment then belongs to exactly one speaker (the
+one of the clip it was decoded from), so no word alignment is needed and
+word timestamps become optional.
+"""
+from typing import Any, Callable, Dict, List, Optional
+
+from . import audio_utils
+
+CLIP_MAX_S = 30.0  # Whisper's input window
+
+# Transcribes the clips (sample ranges) of the job audio and returns the
+# segments of each clip, in clip order; see transcribe_turns()
+ClipTranscriber = Callable[[List[Dict[str, int]]], List[List[Dict[str, Any]]]]
+
+
+def group_turns(
+    speaker_turns: List[Dict[str, Any]],
+    max_seconds: float = CLIP_MAX_S,
+    max_gap_seconds: float = 2.0
+) -> List[Dict[str, Any]]:
+    """Group speaker turns into single-speaker clips of at most ``max_seconds``.
+
+    Consecutive turns of the same speaker with gaps up to
+    ``max_gap_seconds`` are merged while the clip stays short enough; turns
+    longer than ``max_seconds`` are split into equal pieces. Overlapping
+    turns of different speakers each get their own clips.
+
+    Args:
+        speaker_turns: Turns sorted by start, from diarizer.extract_speaker_turns()
+        max_seconds: Longest clip
+        max_gap_seconds: Longest silence inside a clip
+
+    Returns:
+        Clips with "start", "end" (seconds) and "speaker", sorted by start
+    """
+    clips: List[Dict[str, Any]] = []
+    for turn in speaker_turns:
+        duration = turn["end"] - turn["start"]
+        if duration <= 0:
+            continue
+        pieces = int(-(-duration // max_seconds))
+        piece = duration / pieces
+        for index in range(pieces):
+            start = turn["start"] + index * piece
+            end = turn["end"] if index == pieces - 1 else start + piece
+            previous = clips[-1] if clips else None
+            if (previous is not None and previous["speaker"] == turn["speaker"]
+                    and 0 <= start - previous["end"] <= max_gap_seconds
+                    and end - previous["start"] <= max_seconds):
+                previous["end"] = end
+            else:
+                clips.append({"start": start, "end": end, "speaker": turn["speaker"]})
+    return sorted(clips, key=lambda clip: clip["start"])
+
+
+def clip_samples(clips: List[Dict[str, Any]], total_samples: Optional[int] = None) -> List[Dict[str, int]]:
+    """Sample ranges of clips, the ``clip_timestamps`` format of faster-whisper."""
+    ranges = []
+    for clip in clips:
+        start = int(clip["start"] * audio_utils.SAMPLE_RATE)
+        end = int(clip["end"] * audio_utils.SAMPLE_RATE)
+        if total_samples is not None:
+            end = min(end, total_samples)
+        if end > start:
+            ranges.append({"start": start, "end": end})
+    return ranges
+
+
+def transcribe_turns(
+    transcribe: ClipTranscriber,
+    speaker_turns: List[Dict[str, Any]],
+    max_seconds: float = CLIP_MAX_S,
+    total_samples: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """Transcribe the speaker turns of a recording as single-speaker clips.
+
+    Args:
+        transcribe: Transcribes the given sample ranges of the job audio
+            in batches, returning the segments of each range (in recording
+            time), e.g. core.transcribe_clips()
+        speaker_turns: Turns from diarizer.extract_speaker_turns()
+        max_seconds: Longest clip
+        total_samples: Length of the job audio; clips are cut to it
+
+    Returns:
+        Segments in the format of transcriber.segments_to_dicts(), each
+        with the "speaker" of the clip it came from
+    """
+    speakers: List[str] = []
+    ranges: List[Dict[str, int]] = []
+    for clip in group_turns(speaker_turns, max_seconds):
+        for sample_range in clip_samples([clip], total_samples):
+            speakers.append(clip["speaker"])
+            ranges.append(sample_range)
+    if not ranges:
+        return []
+    return [
+        dict(segment, speaker=speaker)
+        for speaker, segments in zip(speakers, transcribe(ranges))
+        for segment in segments
+    ]
+
+
+def segments_to_words(segments: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Speaker-attributed entries for the transcript writers.
+
+    Returns:
+        One entry per word when word timestamps are present, otherwise one
+        per segment, in the format of alignment.align_words_with_speakers()
+    """
+    entries = []
+    for segment in segments:
+        words = segment.get("words") or [
+            {"text": segment.get("text", ""), "start": segment["start"], "end": segment["end"]}
+        ]
+        for word in words:
+            entries.append({
+                "text": word["text"],
+                "start": word["start"],
+                "end": word["end"],
+                "speaker": segment["speaker"],
+                "confidence": word.get("confidence", 1.0),
+            })
+    return sorted(entries, key=lambda entry: entry["start"])
@@ -0,0 +1,102 @@
+# vad.py
+"""One voice activity detection pass shared by diarization and transcription.
+
+faster-whisper's ``vad_filter`` runs Silero VAD inside every transcription,
+and pyannote segments the whole recording again. With the shared pass,
+Silero runs once per job, and its speech regions are used twice. They
+become Whisper's clip timestamps (with ``vad_filter`` off), and only the
+speech is cut out and given to pyannote, so embedding and clustering skip
+silence. The regions are saved in the job directory, so a later rerun on
+the same job reads them back instead of running the VAD again.
+"""
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Tuple, Union
+
+import numpy as np
+from faster_whisper.vad import VadOptions, get_speech_timestamps, merge_segments
+
+from . import audio_utils
+
+VAD_FILENAME = "vad.json"
+CLIP_LENGTH_S = 30  # Whisper's input window
+
+
+def _vad_options() -> VadOptions:
+    """The options the inference service also uses for its chunks."""
+    return VadOptions(max_speech_duration_s=CLIP_LENGTH_S, min_silence_duration_ms=160)
+
+
+def detect_speech(waveform: np.ndarray) -> List[Dict[str, int]]:
+    """Run Silero VAD over a waveform.
+
+    Args:
+        waveform: 16 kHz mono float32 waveform
+
+    Returns:
+        Speech regions as {"start", "end"} sample indices, sorted
+    """
+    start = time.time()
+    speech = get_speech_timestamps(waveform, _vad_options())
+    logging.info(f"VAD found {len(speech)} speech regions in {time.time() - start:.2f} seconds.")
+    return [{"start": int(region["start"]), "end": int(region["end"])} for region in speech]
+
+
+def load_or_detect(waveform: np.ndarray, job_dir: Union[str, Path]) -> List[Dict[str, int]]:
+    """Read the job's speech regions, running the VAD if not done yet.
+
+    Args:
+        waveform: 16 kHz mono float32 waveform of the job
+        job_dir: Job directory holding VAD_FILENAME
+
+    Returns:
+        Speech regions as {"start", "end"} sample indices
+    """
+    vad_path = Path(job_dir) / VAD_FILENAME
+    if vad_path.exists():
+        try:
+            with open(vad_path, "r", encoding="utf-8") as f:
+                stored = json.load(f)
+            if stored.get("samples") == waveform.shape[0]:
+                logging.info(f"Reusing speech regions from {vad_path.name}.")
+                return stored["speech"]
+        except (OSError, ValueError, KeyError) as e:
+            logging.warning(f"Ignoring unreadable {vad_path}: {e}")
+
+    speech = detect_speech(waveform)
+    tmp_path = vad_path.with_suffix(".tmp")
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"samples": int(waveform.shape[0]), "speech": speech}, f)
+        os.replace(tmp_path, vad_path)
+    except OSError as e:
+        logging.warning(f"Could not store speech regions in {vad_path}: {e}")
+    return speech
+
+
+def whisper_clips(speech: List[Dict[str, int]]) -> List[Dict[str, Any]]:
+    """Group speech regions into clips of up to CLIP_LENGTH_S for Whisper.
+
+    Returns:
+        Clips as {"start", "end"} sample indices, the format faster-whisper
+        accepts as ``clip_timestamps``
+    """
+    if not speech:
+        return []
+    return merge_segments([dict(region) for region in speech], _vad_options())
+
+
+def speech_spans(speech: List[Dict[str, int]]) -> List[Tuple[float, float]]:
+    """Speech regions as sorted, non-overlapping (start, end) seconds."""
+    spans: List[Tuple[float, float]] = []
+    for region in sorted(speech, key=lambda region: region["start"]):
+        start = region["start"] / audio_utils.SAMPLE_RATE
+        end = region["end"] / audio_utils.SAMPLE_RATE
+        if spans and start <= spans[-1][1]:
+            spans[-1] = (spans[-1][0], max(spans[-1][1], end))
+        else:
+            spans.append((start, end))
+    return spans
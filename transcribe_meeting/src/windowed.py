@@ -0,0 +1,276 @@
+# windowed.py
+"""Bounded-memory processing of very long recordings.
+
+The audio is decoded through an ffmpeg pipe and transcribed in overlapping
+fixed-length windows. Each window's words are aligned with the speaker turns
+and appended to the transcript before the next window is decoded, so the
+waveform, the segment list and the aligned word list never exist for the
+whole recording and peak memory does not grow with its length.
+
+A word in the overlap of two windows is kept by exactly one of them: the
+overlap is split at its midpoint, and each window keeps only the words whose
+midpoint falls on its side. Words near a window edge, which Whisper may cut
+or hallucinate, therefore always come from the window where they are at
+least half an overlap away from the edge.
+
+Diarization can be windowed the same way: each window is diarized on its
+own and its local speaker labels are stitched into global identities by
+speaker embedding similarity (see speaker_embeddings).
+"""
+import logging
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from . import alignment
+from . import audio_utils
+from . import diarizer
+from . import speaker_embeddings
+from .audio_utils import AudioInput
+from .output_utils import TxtTranscriptWriter
+from .cancellation import CancellationToken
+
+# Transcribes one 16 kHz mono window; timestamps relative to the window start
+WindowTranscriber = Callable[[np.ndarray], List[Dict[str, Any]]]
+
+
+def _iter_raw_windows(
+    media_path: AudioInput,
+    window_seconds: float,
+    overlap_seconds: float,
+    cancel_token: Optional[CancellationToken] = None
+) -> Iterator[Tuple[float, np.ndarray]]:
+    """Yield (offset seconds, waveform) windows; the last may be shorter."""
+    window = int(window_seconds * audio_utils.SAMPLE_RATE)
+    overlap = int(overlap_seconds * audio_utils.SAMPLE_RATE)
+    step = window - overlap
+    buffer = np.zeros(0, dtype=np.float32)
+    offset = 0
+    if isinstance(media_path, np.ndarray):
+        chunk_length = int(audio_utils.PCM_CHUNK_SECONDS * audio_utils.SAMPLE_RATE)
+        chunks = (media_path[i:i + chunk_length] for i in range(0, media_path.shape[0], chunk_length))
+    else:
+        chunks = audio_utils.iter_pcm_chunks(str(media_path), cancel_token)
+    for chunk in chunks:
+        buffer = np.concatenate((buffer, chunk))
+        while buffer.shape[0] >= window:
+            yield offset / audio_utils.SAMPLE_RATE, buffer[:window]
+            buffer = buffer[step:]
+            offset += step
+    # The tail is already covered unless it extends past the last overlap
+    if buffer.shape[0] > overlap or (offset == 0 and buffer.shape[0] > 0):
+        yield offset / audio_utils.SAMPLE_RATE, buffer
+
+
+def iter_windows(
+    media_path: AudioInput,
+    window_seconds: float = 600.0,
+    overlap_seconds: float = 10.0,
+    cancel_token: Optional[CancellationToken] = None
+) -> Iterator[Tuple[float, np.ndarray, bool]]:
+    """Decode a recording into overlapping windows.
+
+    Only the current window and one decode chunk are held in memory.
+
+    Args:
+        media_path: Path to the media file, any ffmpeg input such as
+            ``pipe:0``, or an already decoded waveform
+        window_seconds: Length of each window
+        overlap_seconds: Audio shared by consecutive windows
+        cancel_token: Optional token; cancelling it kills ffmpeg
+
+    Yields:
+        Tuples of (offset in seconds, float32 waveform, is last window)
+
+    Raises:
+        ValueError: If the overlap is not shorter than the window
+        subprocess.CalledProcessError: If decoding fails or is cancelled
+    """
+    if not 0 <= overlap_seconds < window_seconds:
+        raise ValueError("overlap_seconds must be at least 0 and shorter than window_seconds")
+    windows = _iter_raw_windows(media_path, window_seconds, overlap_seconds, cancel_token)
+    previous = next(windows, None)
+    for current in windows:
+        yield previous[0], previous[1], False
+        previous = current
+    if previous is not None:
+        yield previous[0], previous[1], True
+
+
+def shift_segments(segments: List[Dict[str, Any]], offset: float) -> List[Dict[str, Any]]:
+    """Move window-relative segments and their words to recording time."""
+    return [
+        dict(
+            segment,
+            start=segment["start"] + offset,
+            end=segment["end"] + offset,
+            words=[
+                dict(word, start=word["start"] + offset, end=word["end"] + offset)
+                for word in segment.get("words", [])
+            ]
+        )
+        for segment in segments
+    ]
+
+
+def keep_words_between(
+    segments: List[Dict[str, Any]],
+    start: float,
+    end: float
+) -> List[Dict[str, Any]]:
+    """Keep only the words whose midpoint lies in [start, end).
+
+    Returns:
+        The segments that still have words, with the other words removed
+    """
+    kept = []
+    for segment in segments:
+        words = [
+            word for word in segment.get("words", [])
+            if start <= (word["start"] + word["end"]) / 2 < end
+        ]
+        if words:
+            kept.append(dict(segment, words=words))
+    return kept
+
+
+def turns_between(
+    speaker_turns: List[Dict[str, Any]],
+    start: float,
+    end: float
+) -> List[Dict[str, Any]]:
+    """Speaker turns overlapping [start, end], or all turns if none do.
+
+    Falling back to every turn lets words in a gap between turns still be
+    given the closest speaker, as in a full alignment.
+    """
+    overlapping = [turn for turn in speaker_turns if turn["end"] >= start and turn["start"] <= end]
+    return overlapping or speaker_turns
+
+
+def transcribe_windowed(
+    media_path: str,
+    transcribe: WindowTranscriber,
+    speaker_turns: List[Dict[str, Any]],
+    output_path: str,
+    window_seconds: float = 600.0,
+    overlap_seconds: float = 10.0,
+    cancel_token: Optional[CancellationToken] = None
+) -> int:
+    """Transcribe a recording window by window, appending to the transcript.
+
+    Args:
+        media_path: Path to the media file, or any ffmpeg input
+        transcribe: Transcribes one window; see WindowTranscriber
+        speaker_turns: Speaker turns of the whole recording
+        output_path: Path of the TXT transcript to write
+        window_seconds: Length of each window
+        overlap_seconds: Audio shared by consecutive windows
+        cancel_token: Optional token checked between windows
+
+    Returns:
+        Number of words written
+
+    Raises:
+        JobCancelled: If the job was cancelled
+        subprocess.CalledProcessError: If decoding fails
+    """
+    logging.info(f"Windowed transcription in {window_seconds:.0f}s windows "
+                 f"with {overlap_seconds:.0f}s overlap, writing to: {output_path}")
+    words_written = 0
+    committed_until = 0.0
+    with open(output_path, "w", encoding="utf-8") as f_txt:
+        writer = TxtTranscriptWriter(f_txt)
+        for offset, waveform, is_last in iter_windows(media_path, window_seconds, overlap_seconds, cancel_token):
+            if cancel_token is not None:
+                cancel_token.raise_if_cancelled()
+            window_end = offset + waveform.shape[0] / audio_utils.SAMPLE_RATE
+            cut = float("inf") if is_last else window_end - overlap_seconds / 2
+
+            segments = keep_words_between(
+                shift_segments(transcribe(waveform), offset), committed_until, cut
+            )
+            aligned_words = alignment.align_words_with_speakers(
+                segments, turns_between(speaker_turns, committed_until, min(cut, window_end))
+            ) if segments else []
+            writer.write_words(aligned_words)
+            f_txt.flush()
+            words_written += len(aligned_words)
+            committed_until = cut
+            logging.info(f"Window at {offset:.0f}s: {len(aligned_words)} words.")
+        writer.close()
+    return words_written
+
+
+def merge_touching_turns(speaker_turns: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Join consecutive turns of the same speaker that touch, e.g. at a window cut."""
+    merged: List[Dict[str, Any]] = []
+    for turn in sorted(speaker_turns, key=lambda turn: turn["start"]):
+        previous = next((m for m in reversed(merged[-4:]) if m["speaker"] == turn["speaker"]), None)
+        if previous is not None and turn["start"] <= previous["end"] + 1e-6:
+            previous["end"] = max(previous["end"], turn["end"])
+        else:
+            merged.append(dict(turn))
+    return merged
+
+
+def diarize_windowed(
+    pipeline: Any,
+    audio: AudioInput,
+    window_seconds: float = 600.0,
+    overlap_seconds: float = 30.0,
+    stitch_threshold: float = 0.5,
+    cancel_token: Optional[CancellationToken] = None,
+    speaker_hints: Optional[Dict[str, int]] = None
+) -> List[Dict[str, Any]]:
+    """Diarize a recording window by window and stitch the speakers.
+
+    Memory and clustering cost are bounded by the window size. Turns in
+    the overlap of two windows are cut at its midpoint, like words in
+    transcribe_windowed().
+
+    Args:
+        pipeline: Loaded pyannote diarization pipeline
+        audio: Path to the audio file, or a 16 kHz mono float32 waveform
+        window_seconds: Length of each window
+        overlap_seconds: Audio shared by consecutive windows
+        stitch_threshold: See speaker_embeddings.SpeakerStitcher
+        cancel_token: Optional token; cancelling it stops the current window
+        speaker_hints: Speaker-count hints for the whole recording; a window
+            may hear fewer speakers, so each window only gets the upper bound
+
+    Returns:
+        Sorted speaker turns, in the format of diarizer.extract_speaker_turns()
+
+    Raises:
+        JobCancelled: If the job was cancelled
+        RuntimeError: If diarizing a window fails
+    """
+    stitcher = speaker_embeddings.SpeakerStitcher(stitch_threshold)
+    speaker_hints = speaker_hints or {}
+    max_speakers = speaker_hints.get("num_speakers") or speaker_hints.get("max_speakers")
+    speaker_turns: List[Dict[str, Any]] = []
+    committed_until = 0.0
+    for offset, waveform, is_last in iter_windows(audio, window_seconds, overlap_seconds, cancel_token):
+        diarization_result = diarizer.run_diarization(pipeline, waveform, cancel_token, max_speakers=max_speakers)
+        if diarization_result is None:
+            if cancel_token is not None:
+                cancel_token.raise_if_cancelled()
+            raise RuntimeError(f"Diarization of the window at {offset:.0f}s failed")
+        local_turns = diarizer.extract_speaker_turns(diarization_result)
+        mapping = stitcher.assign(
+            speaker_embeddings.embed_speakers(pipeline, waveform, local_turns),
+            speaker_embeddings.speaker_durations(local_turns)
+        )
+
+        window_end = offset + waveform.shape[0] / audio_utils.SAMPLE_RATE
+        cut = float("inf") if is_last else window_end - overlap_seconds / 2
+        for turn in speaker_embeddings.relabel_turns(local_turns, mapping):
+            start = max(turn["start"] + offset, committed_until)
+            end = min(turn["end"] + offset, cut)
+            if end > start:
+                speaker_turns.append(dict(turn, start=start, end=end))
+        committed_until = cut
+        logging.info(f"Diarized window at {offset:.0f}s: {len(mapping)} speakers, "
+                     f"{len(stitcher.labels)} in total so far.")
+    return merge_touching_turns(speaker_turns)
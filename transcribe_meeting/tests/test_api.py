@@ -119,6 +119,58 @@ def test_transcribe_video_endpoint(mock_process, test_client, setup_temp_dir):
     assert job_id in jobs
 
 
+def test_transcribe_video_rejects_contradicting_speaker_hints(test_client, setup_temp_dir):
+    """min_speakers above max_speakers is rejected before the upload is stored."""
+    with open(setup_temp_dir["video_path"], "rb") as video_file:
+        response = test_client.post(
+            "/transcribe",
+            files={"file": ("test_video.mp4", video_file, "video/mp4")},
+            data={"min_speakers": "5", "max_speakers": "2"}
+        )
+
+    assert response.status_code == 400
+
+
+def _mp4_head(*boxes):
+    """Build the start of an MP4 file from (type, payload size) boxes."""
+    return b"".join((8 + size).to_bytes(4, "big") + box + b"\0" * size for box, size in boxes)
+
+
+@patch("transcribe_meeting.api.audio_utils.probe_duration", return_value=60.0)
+@patch("transcribe_meeting.api._pipe_to_ffmpeg", new_callable=AsyncMock)
+@patch("transcribe_meeting.api.process_video")
+def test_transcribe_stream_pipes_streamable_upload(mock_process, mock_pipe, mock_probe, test_client):
+    """Uploads with the MP4 index up front are piped into ffmpeg."""
+    mock_pipe.return_value = "abc123"
+    body = _mp4_head((b"ftyp", 16), (b"moov", 64), (b"mdat", 256))
+
+    response = test_client.post("/transcribe/stream?filename=meeting.mp4", content=body)
+
+    assert response.status_code == 200
+    job_id = response.json()["job_id"]
+    assert job_id in jobs
+    assert mock_pipe.await_args[0][2].name.startswith("upload_audio.")
+    del jobs[job_id]
+
+
+@patch("transcribe_meeting.api.audio_utils.probe_duration", return_value=60.0)
+@patch("transcribe_meeting.api._pipe_to_ffmpeg", new_callable=AsyncMock)
+@patch("transcribe_meeting.api.process_video")
+def test_transcribe_stream_saves_moov_at_end_upload(mock_process, mock_pipe, mock_probe, test_client):
+    """MP4 uploads with the index at the end fall back to a saved file."""
+    body = _mp4_head((b"ftyp", 16), (b"mdat", 256), (b"moov", 64))
+
+    response = test_client.post("/transcribe/stream?filename=meeting.mp4", content=body)
+
+    assert response.status_code == 200
+    job_id = response.json()["job_id"]
+    mock_pipe.assert_not_called()
+    saved = Path(tempfile.gettempdir()) / "transcribe_meeting" / job_id / "meeting.mp4"
+    assert saved.read_bytes() == body
+    del jobs[job_id]
+    shutil.rmtree(saved.parent)
+
+
 def test_get_job_status_found(test_client, mock_job):
     """Test getting job status when the job exists."""
     response = test_client.get(f"/jobs/{mock_job}")
@@ -169,6 +221,46 @@ def test_download_transcript_not_completed(test_client, mock_job):
     assert response.status_code == 400
 
 
+def test_get_job_result(test_client, mock_job, tmp_path):
+    """Test fetching the JSON result of a completed job."""
+    with patch("transcribe_meeting.api.TEMP_DIR", tmp_path):
+        assert test_client.get(f"/jobs/{mock_job}/result").status_code == 404
+
+        (tmp_path / mock_job).mkdir()
+        (tmp_path / mock_job / "result.json").write_text('{"words": []}')
+        response = test_client.get(f"/jobs/{mock_job}/result")
+        assert response.status_code == 200
+        assert response.json() == {"words": []}
+
+        jobs[mock_job]["status"] = "processing"
+        assert test_client.get(f"/jobs/{mock_job}/result").status_code == 400
+
+
+@patch("transcribe_meeting.api.recluster_transcript")
+def test_recluster_job(mock_recluster, test_client, mock_job):
+    """Test re-clustering the speakers of a completed job."""
+    jobs[mock_job]["speakers"] = {"SPEAKER_00": {"name": "Alice", "confidence": 0.9}}
+    response = test_client.post(f"/jobs/{mock_job}/recluster", params={"num_speakers": 3, "threshold": 0.6})
+    assert response.status_code == 200
+    assert response.json()["message"] == "Speakers re-clustered"
+    assert response.json()["speakers"] is None
+    _, output_path, hints, threshold = mock_recluster.call_args[0]
+    assert output_path.name == "transcript.txt"
+    assert hints == {"num_speakers": 3}
+    assert threshold == 0.6
+
+
+@patch("transcribe_meeting.api.recluster_transcript")
+def test_recluster_job_without_state(mock_recluster, test_client, mock_job):
+    """Test re-clustering a job that kept no diarization state."""
+    mock_recluster.side_effect = RuntimeError("No diarization state to re-cluster")
+    response = test_client.post(f"/jobs/{mock_job}/recluster", params={"num_speakers": 2})
+    assert response.status_code == 409
+
+    jobs[mock_job]["status"] = "processing"
+    assert test_client.post(f"/jobs/{mock_job}/recluster").status_code == 400
+
+
 @patch("transcribe_meeting.api.cleanup_job_files")
 def test_delete_job(mock_cleanup, test_client, mock_job):
     """Test deleting a job."""
@@ -190,15 +282,15 @@ def test_delete_job_not_found(test_client):
     assert response.status_code == 404
 
 
-@patch("transcribe_meeting.api.shutil.rmtree")
-@patch("transcribe_meeting.api.Path")
-def test_cleanup_job_files(mock_path, mock_rmtree):
+@patch("transcribe_meeting.core.shutil.rmtree")
+@patch("transcribe_meeting.core.TEMP_DIR")
+def test_cleanup_job_files(mock_temp_dir, mock_rmtree):
     """Test cleaning up job files."""
     # Setup
     job_id = "test-job"
     mock_path_instance = MagicMock()
     mock_path_instance.exists.return_value = True
-    mock_path.return_value = mock_path_instance
+    mock_temp_dir.__truediv__.return_value = mock_path_instance
     
     # Call the function
     cleanup_job_files(job_id)
@@ -0,0 +1,77 @@
+"""Tests for the artifact_cache module."""
+
+import io
+import os
+import sys
+import hashlib
+from pathlib import Path
+import pytest
+from unittest.mock import patch
+
+# Add the src directory to path so we can import the package
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from transcribe_meeting import artifact_cache
+from transcribe_meeting.artifact_cache import ArtifactCache
+
+
+SETTINGS = {"model": "large", "compute_type": "int8", "beam_size": 5}
+
+
+def test_copy_with_hash(tmp_path):
+    data = b"video bytes" * 1000
+    destination = tmp_path / "upload.mp4"
+    digest = artifact_cache.copy_with_hash(io.BytesIO(data), destination)
+    assert destination.read_bytes() == data
+    assert digest == hashlib.sha256(data).hexdigest()
+    assert artifact_cache.hash_file(destination) == digest
+
+
+def test_json_round_trip(tmp_path):
+    cache = ArtifactCache(tmp_path, max_bytes=1024 * 1024)
+    turns = [{"start": 0.0, "end": 1.0, "speaker": "SPEAKER_00"}]
+    assert cache.get_json("abc", "speaker_turns", SETTINGS) is None
+    cache.put_json("abc", "speaker_turns", SETTINGS, turns)
+    assert cache.get_json("abc", "speaker_turns", SETTINGS) == turns
+
+
+def test_settings_change_is_a_miss(tmp_path):
+    cache = ArtifactCache(tmp_path, max_bytes=1024 * 1024)
+    cache.put_json("abc", "segments", SETTINGS, [])
+    other_settings = dict(SETTINGS, model="small")
+    assert cache.get_json("abc", "segments", other_settings) is None
+    assert cache.get_json("def", "segments", SETTINGS) is None
+
+
+def test_file_round_trip(tmp_path):
+    cache = ArtifactCache(tmp_path / "cache", max_bytes=1024 * 1024)
+    source = tmp_path / "audio.wav"
+    source.write_bytes(b"RIFF" + b"\x00" * 100)
+    cache.put_file("abc", "audio", {}, source, ".wav")
+    cached = cache.get_file("abc", "audio", {}, ".wav")
+    assert cached is not None
+    assert cached.read_bytes() == source.read_bytes()
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = ArtifactCache(tmp_path, max_bytes=250)
+    payload = "x" * 100
+    cache.put_json("first", "segments", SETTINGS, payload)
+    cache.put_json("second", "segments", SETTINGS, payload)
+    # Make "first" the oldest, then touch it so "second" becomes the LRU entry
+    for name, mtime in (("first", 1000), ("second", 2000)):
+        path = cache._entry_path(name, "segments", SETTINGS, ".json")
+        os.utime(path, (mtime, mtime))
+    assert cache.get_json("first", "segments", SETTINGS) == payload
+
+    cache.put_json("third", "segments", SETTINGS, payload)
+
+    assert cache.get_json("second", "segments", SETTINGS) is None
+    assert cache.get_json("first", "segments", SETTINGS) == payload
+    assert cache.get_json("third", "segments", SETTINGS) == payload
+    assert cache.size_bytes() <= 250
+
+
+def test_get_artifact_cache_disabled():
+    with patch.object(artifact_cache.config, "ARTIFACT_CACHE_ENABLED", False):
+        assert artifact_cache.get_artifact_cache() is None
@@ -2,6 +2,8 @@
 
 import sys
 import os
+import json
+import wave
 from pathlib import Path
 import pytest
 from unittest.mock import patch, MagicMock
@@ -99,4 +101,223 @@ class TestAudioUtils:
         result = extract_audio("nonexistent.mp4", "output.wav")
         
         # Assertions
-        assert result is False
\ No newline at end of file
+        assert result is False
+
+def _fake_ffmpeg_process(pcm: bytes, returncode: int = 0) -> MagicMock:
+    """Build a Popen mock whose stdout yields raw PCM bytes."""
+    import io
+    process = MagicMock()
+    process.stdout = io.BytesIO(pcm)
+    process.stderr = io.BytesIO(b"")
+    process.returncode = returncode
+    process.poll.return_value = returncode
+    return process
+
+
+@patch("transcribe_meeting.audio_utils.subprocess.Popen")
+def test_decode_audio_to_memory(mock_popen):
+    """Test decoding s16le PCM from the ffmpeg pipe into float32."""
+    import numpy as np
+    samples = np.array([0, 16384, -32768, 32767], dtype=np.int16)
+    mock_popen.return_value = _fake_ffmpeg_process(samples.tobytes())
+
+    waveform = audio_utils.decode_audio("input.mp4")
+
+    assert waveform.dtype == np.float32
+    np.testing.assert_allclose(waveform, [0.0, 0.5, -1.0, 32767 / 32768.0])
+    command = mock_popen.call_args[0][0]
+    assert command[command.index("-f") + 1] == "s16le"
+    assert command[-1] == "-"
+
+
+@patch("transcribe_meeting.audio_utils.subprocess.Popen")
+def test_decode_audio_failure(mock_popen):
+    """Test that a failing ffmpeg decode returns None."""
+    mock_popen.return_value = _fake_ffmpeg_process(b"", returncode=1)
+    assert audio_utils.decode_audio("broken.mp4") is None
+
+
+def test_describe_audio():
+    """Test log descriptions of path and in-memory inputs."""
+    import numpy as np
+    assert audio_utils.describe_audio("/tmp/job/audio.wav") == "audio.wav"
+    assert "16.0s" in audio_utils.describe_audio(np.zeros(16000 * 16, dtype=np.float32))
+
+
+def _probe_result(format_name, codec, sample_rate, channels, duration="60.0"):
+    stream = {"codec_name": codec, "sample_rate": str(sample_rate), "channels": channels}
+    return MagicMock(stdout=json.dumps({
+        "format": {"format_name": format_name, "duration": duration},
+        "streams": [stream] if codec else [],
+    }))
+
+
+@patch("transcribe_meeting.audio_utils.run_ffmpeg")
+@patch("transcribe_meeting.audio_utils.subprocess.run")
+def test_extract_audio_skips_ready_wav(mock_run, mock_ffmpeg, tmp_path):
+    source = tmp_path / "meeting.wav"
+    source.write_bytes(b"RIFF")
+    mock_run.return_value = _probe_result("wav", "pcm_s16le", 16000, 1)
+
+    assert audio_utils.extract_audio(str(source), str(tmp_path / "audio.wav")) is True
+    assert (tmp_path / "audio.wav").read_bytes() == b"RIFF"
+    mock_ffmpeg.assert_not_called()
+
+
+@patch("transcribe_meeting.audio_utils.run_ffmpeg")
+@patch("transcribe_meeting.audio_utils.subprocess.run")
+def test_extract_audio_maps_first_audio_stream(mock_run, mock_ffmpeg):
+    mock_run.return_value = _probe_result("mov,mp4,m4a,3gp,3g2,mj2", "aac", 48000, 2)
+
+    assert audio_utils.extract_audio("meeting.mp4", "audio.wav") is True
+    command = mock_ffmpeg.call_args[0][0]
+    assert command[command.index("-map") + 1] == "0:a:0"
+    assert command[command.index("-ac") + 1] == "1"
+
+
+@patch("transcribe_meeting.audio_utils._extraction_speed", 60.0)
+@patch("transcribe_meeting.audio_utils.run_ffmpeg")
+@patch("transcribe_meeting.audio_utils.subprocess.run")
+def test_extract_audio_logs_time_saved_on_both_paths(mock_run, mock_ffmpeg, tmp_path, caplog):
+    source = tmp_path / "meeting.wav"
+    source.write_bytes(b"RIFF")
+    caplog.set_level("INFO")
+    mock_run.return_value = _probe_result("wav", "pcm_s16le", 16000, 1)
+    assert audio_utils.extract_audio(str(source), str(tmp_path / "audio.wav")) is True
+    mock_run.return_value = _probe_result("mov,mp4,m4a,3gp,3g2,mj2", "aac", 48000, 2)
+    assert audio_utils.extract_audio("meeting.mp4", str(tmp_path / "audio.wav")) is True
+
+    saved = [r.getMessage() for r in caplog.records if "of extraction" in r.getMessage()]
+    assert len(saved) == 2
+    assert "meeting.wav" in saved[0] and "meeting.mp4" in saved[1]
+
+
+@patch("transcribe_meeting.audio_utils.run_ffmpeg")
+@patch("transcribe_meeting.audio_utils.subprocess.run")
+def test_extract_audio_without_audio_stream(mock_run, mock_ffmpeg):
+    mock_run.return_value = _probe_result("mov,mp4,m4a,3gp,3g2,mj2", None, None, None)
+
+    assert audio_utils.extract_audio("screen.mp4", "audio.wav") is False
+    mock_ffmpeg.assert_not_called()
+
+
+def test_range_bounds_cover_timeline():
+    bounds = audio_utils._range_bounds(1000, 3)
+    assert bounds == [(0, 333), (333, 667), (667, 1000)]
+
+
+@patch("transcribe_meeting.audio_utils.run_ffmpeg")
+def test_extract_range_is_sample_exact(mock_ffmpeg, tmp_path):
+    pcm_path = tmp_path / "range.pcm"
+
+    def fake_ffmpeg(command, cancel_token=None, on_progress=None):
+        pcm_path.write_bytes(b"\x01\x00" * 90)
+    mock_ffmpeg.side_effect = fake_ffmpeg
+
+    audio_utils._extract_range("meeting.mp4", str(pcm_path), 16000, 100, None)
+    assert pcm_path.read_bytes() == b"\x01\x00" * 90 + b"\x00\x00" * 10
+
+    audio_utils._extract_range("meeting.mp4", str(pcm_path), 16000, 50, None)
+    assert pcm_path.read_bytes() == b"\x01\x00" * 50
+
+
+@patch("transcribe_meeting.audio_utils._extract_range")
+@patch("transcribe_meeting.audio_utils.probe_audio_stream")
+def test_extract_audio_parallel_joins_ranges(mock_probe, mock_range, tmp_path):
+    mock_probe.return_value = {
+        "format_name": "mov,mp4,m4a,3gp,3g2,mj2", "duration": 3.0,
+        "codec_name": "aac", "sample_rate": 48000, "channels": 2,
+    }
+
+    def fake_range(media_path, pcm_path, start_sample, num_samples, cancel_token, on_progress):
+        Path(pcm_path).write_bytes(bytes([start_sample // 16000]) * 2 * 16000)
+    mock_range.side_effect = fake_range
+
+    output = tmp_path / "audio.wav"
+    assert audio_utils.extract_audio_parallel("meeting.mp4", str(output), 3) is True
+
+    assert [call[0][2] for call in mock_range.call_args_list] == [0, 16000, 32000]
+    with wave.open(str(output), "rb") as wav_file:
+        assert wav_file.getnframes() == 3 * 16000
+        assert wav_file.getframerate() == 16000
+    assert list(tmp_path.glob("*.pcm")) == []
+
+
+@patch("transcribe_meeting.audio_utils.run_ffmpeg")
+@patch("transcribe_meeting.audio_utils.probe_audio_stream")
+def test_extract_audio_parallel_fallback_probes_once(mock_probe, mock_ffmpeg, tmp_path):
+    mock_probe.return_value = {
+        "format_name": "mov,mp4,m4a,3gp,3g2,mj2", "duration": 30.0,
+        "codec_name": "aac", "sample_rate": 48000, "channels": 2,
+    }
+
+    assert audio_utils.extract_audio_parallel("meeting.mp4", str(tmp_path / "audio.wav"), 3, min_duration=60) is True
+
+    assert mock_probe.call_count == 1
+    mock_ffmpeg.assert_called_once()
+
+
+def test_parse_progress_values():
+    assert audio_utils.parse_progress_speed("12.5x") == 12.5
+    assert audio_utils.parse_progress_speed("N/A") is None
+    assert audio_utils.parse_progress_time({"out_time_us": "30000000"}) == 30.0
+    assert audio_utils.parse_progress_time({"out_time_us": "N/A", "out_time_ms": "1500000"}) == 1.5
+    assert audio_utils.parse_progress_time({}) is None
+
+
+@patch("transcribe_meeting.audio_utils.subprocess.Popen")
+def test_run_ffmpeg_reports_progress(mock_popen):
+    process = MagicMock(returncode=0)
+    process.stdout = iter([
+        "out_time_us=15000000\n", "speed=20x\n", "progress=continue\n",
+        "out_time_us=60000000\n", "speed=24x\n", "progress=end\n",
+    ])
+    process.stderr.read.return_value = ""
+    mock_popen.return_value = process
+    reports = []
+
+    on_progress = audio_utils._progress_reporter(60.0, lambda fraction, speed: reports.append((fraction, speed)))
+    audio_utils.run_ffmpeg(["ffmpeg", "-i", "in.mp4", "out.wav"], on_progress=on_progress)
+
+    command = mock_popen.call_args[0][0]
+    assert command[:4] == ["ffmpeg", "-progress", "pipe:1", "-nostats"]
+    assert reports == [(0.25, 20.0), (1.0, 24.0)]
+
+
+@patch("transcribe_meeting.audio_utils.run_ffmpeg")
+@patch("transcribe_meeting.audio_utils.subprocess.run")
+def test_extract_audio_to_flac(mock_run, mock_ffmpeg):
+    # A ready WAV still has to be encoded when FLAC is requested
+    mock_run.return_value = _probe_result("wav", "pcm_s16le", 16000, 1)
+
+    assert audio_utils.extract_audio("meeting.wav", "audio.flac") is True
+    command = mock_ffmpeg.call_args[0][0]
+    assert command[command.index("-acodec") + 1] == "flac"
+
+
+def test_mp4_needs_seeking():
+    def box(box_type, size):
+        return (8 + size).to_bytes(4, "big") + box_type + b"\0" * size
+
+    assert audio_utils.mp4_needs_seeking(box(b"ftyp", 16) + box(b"moov", 32)) is False
+    assert audio_utils.mp4_needs_seeking(box(b"ftyp", 16) + box(b"mdat", 32)) is True
+    assert audio_utils.mp4_needs_seeking(box(b"ftyp", 16) + box(b"free", 8)[:6]) is None
+    assert audio_utils.mp4_needs_seeking(b"\x1a\x45\xdf\xa3" + b"\0" * 12) is False  # Matroska
+    assert audio_utils.mp4_needs_seeking(b"ftyp") is None
+
+
+@patch("transcribe_meeting.audio_utils.subprocess.Popen")
+def test_run_ffmpeg_kills_ffmpeg_when_progress_callback_fails(mock_popen):
+    import io
+    process = mock_popen.return_value
+    process.stdout = io.StringIO("out_time_us=1000000\nprogress=continue\n")
+    process.stderr = io.StringIO("")
+
+    def failing_callback(block):
+        raise RuntimeError("job status update failed")
+
+    with pytest.raises(RuntimeError):
+        audio_utils.run_ffmpeg(["ffmpeg", "-i", "meeting.mp4", "out.wav"], on_progress=failing_callback)
+
+    process.kill.assert_called_once()
+    process.wait.assert_called_once()
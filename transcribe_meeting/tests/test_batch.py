@@ -0,0 +1,77 @@
+"""Tests for the batch module."""
+
+import sys
+from pathlib import Path
+import pytest
+from unittest.mock import patch, MagicMock
+
+# Add the src directory to path so we can import the package
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from transcribe_meeting import batch
+
+
+def test_is_batch_target(tmp_path):
+    assert batch.is_batch_target(str(tmp_path)) is True
+    assert batch.is_batch_target(str(tmp_path / "*.mp4")) is True
+    assert batch.is_batch_target(str(tmp_path / "meeting.mp4")) is False
+
+
+def test_collect_video_files_from_directory(tmp_path):
+    (tmp_path / "b.mp4").touch()
+    (tmp_path / "a.mkv").touch()
+    (tmp_path / "notes.txt").touch()
+    result = batch.collect_video_files(str(tmp_path))
+    assert [path.name for path in result] == ["a.mkv", "b.mp4"]
+
+
+def test_collect_video_files_from_glob(tmp_path):
+    (tmp_path / "monday.mp4").touch()
+    (tmp_path / "tuesday.mp4").touch()
+    (tmp_path / "tuesday.mkv").touch()
+    result = batch.collect_video_files(str(tmp_path / "*.mp4"))
+    assert [path.name for path in result] == ["monday.mp4", "tuesday.mp4"]
+
+
+def test_summarize_batch():
+    results = [
+        {"video_path": "a.mp4", "status": "completed", "error": None, "audio_seconds": 600.0},
+        {"video_path": "b.mp4", "status": "failed", "error": "boom", "audio_seconds": 0.0},
+    ]
+    summary = batch.summarize_batch(results, 60.0)
+    assert summary["files_completed"] == 1
+    assert summary["files_failed"] == 1
+    assert summary["realtime_factor"] == pytest.approx(10.0)
+    assert "FAILED b.mp4: boom" in batch.format_batch_summary(summary)
+
+
+@patch("transcribe_meeting.batch.transcribe_audio_file")
+@patch("transcribe_meeting.batch.file_manager")
+@patch("transcribe_meeting.batch.audio_utils")
+@patch("transcribe_meeting.batch.diarizer")
+@patch("transcribe_meeting.batch.transcriber.ModelManager")
+@patch("transcribe_meeting.batch.resource_manager")
+def test_run_batch_loads_models_once_and_continues_after_failure(
+    mock_resource_manager, mock_model_manager, mock_diarizer, mock_audio_utils,
+    mock_file_manager, mock_transcribe
+):
+    mock_model_manager.return_value.__enter__.return_value = MagicMock()
+    mock_file_manager.calculate_paths.side_effect = lambda video_path, *args: {
+        "video_path": Path(video_path),
+        "audio_file": Path(f"{video_path}.wav"),
+        "output_txt_file": Path(f"{video_path}.txt"),
+        "transcript_subdir": Path("out"),
+    }
+    mock_audio_utils.extract_audio_parallel.return_value = True
+    mock_audio_utils.get_audio_duration.return_value = 60.0
+    mock_transcribe.side_effect = [RuntimeError("Diarization failed"), [], []]
+
+    summary = batch.run_batch([Path("a.mp4"), Path("b.mp4"), Path("c.mp4")])
+
+    mock_model_manager.assert_called_once()
+    mock_diarizer.load_diarization_pipeline.assert_called_once()
+    assert mock_audio_utils.extract_audio_parallel.call_count == 3
+    assert summary["files_completed"] == 2
+    assert summary["files_failed"] == 1
+    assert summary["results"][0]["error"] == "Diarization failed"
+    assert mock_file_manager.delete_temp_audio.call_count == 3
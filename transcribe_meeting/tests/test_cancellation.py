@@ -0,0 +1,73 @@
+"""Tests for the cancellation module."""
+
+import sys
+import time
+import subprocess
+import threading
+from pathlib import Path
+import pytest
+
+# Add the src directory to path so we can import the package
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from transcribe_meeting.cancellation import CancellationToken, JobCancelled, StageWatchdog
+from transcribe_meeting.audio_utils import run_ffmpeg
+
+SLEEP_COMMAND = [sys.executable, "-c", "import time; time.sleep(30)"]
+
+
+def test_raise_if_cancelled():
+    token = CancellationToken()
+    token.raise_if_cancelled()
+    token.cancel("stop please")
+    assert token.cancelled is True
+    with pytest.raises(JobCancelled, match="stop please"):
+        token.raise_if_cancelled()
+
+
+def test_cancel_kills_registered_process():
+    token = CancellationToken()
+    process = subprocess.Popen(SLEEP_COMMAND)
+    token.register_process(process)
+    token.cancel()
+    assert process.wait(timeout=5) != 0
+
+
+def test_process_registered_after_cancel_is_killed():
+    token = CancellationToken()
+    token.cancel()
+    process = subprocess.Popen(SLEEP_COMMAND)
+    token.register_process(process)
+    assert process.wait(timeout=5) != 0
+
+
+def test_run_ffmpeg_is_killed_on_cancel():
+    token = CancellationToken()
+    threading.Timer(0.2, token.cancel).start()
+    start = time.time()
+    with pytest.raises(subprocess.CalledProcessError):
+        run_ffmpeg(SLEEP_COMMAND, token)
+    assert time.time() - start < 5
+
+
+def test_watchdog_cancels_on_timeout():
+    token = CancellationToken()
+    with StageWatchdog(token, "extraction", 0.1):
+        time.sleep(0.5)
+    assert token.cancelled is True
+    assert "extraction" in token.reason
+
+
+def test_watchdog_does_not_fire_when_stage_finishes():
+    token = CancellationToken()
+    with StageWatchdog(token, "transcription", 0.5):
+        pass
+    time.sleep(0.7)
+    assert token.cancelled is False
+
+
+def test_watchdog_disabled_with_zero_timeout():
+    token = CancellationToken()
+    with StageWatchdog(token, "diarization", 0):
+        time.sleep(0.1)
+    assert token.cancelled is False
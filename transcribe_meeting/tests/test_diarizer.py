@@ -93,4 +93,128 @@ def test_extract_speaker_turns_with_unsorted_speakers():
         {"start": 1.0, "end": 2.0, "speaker": "SPEAKER_2"},
         {"start": 2.0, "end": 3.0, "speaker": "SPEAKER_1"}
     ]
-    assert result == expected
\ No newline at end of file
+    assert result == expected
+
+
+def test_run_diarization_stops_when_cancelled():
+    from transcribe_meeting.cancellation import CancellationToken
+
+    def fake_pipeline(audio_path, hook=None):
+        hook("segmentation", None)
+        return "diarization-result"
+
+    token = CancellationToken()
+    assert run_diarization(fake_pipeline, "test-audio.wav", token) == "diarization-result"
+    token.cancel()
+    assert run_diarization(fake_pipeline, "test-audio.wav", token) is None
+
+def test_run_diarization_keeps_step_artifacts():
+    def fake_pipeline(audio_path, hook=None, num_speakers=None):
+        hook("segmentation", "segmentation-feature")
+        hook("embeddings", "embedding-array", completed=1, total=1)
+        return "diarization-result"
+
+    artifacts = {}
+    assert run_diarization(fake_pipeline, "test-audio.wav", num_speakers=2, artifacts=artifacts) == "diarization-result"
+    assert artifacts == {"segmentation": "segmentation-feature", "embeddings": "embedding-array"}
+
+def test_run_diarization_with_in_memory_waveform():
+    import numpy as np
+    pipeline = MagicMock(return_value="diarization-result")
+    waveform = np.zeros(16000, dtype=np.float32)
+
+    result = run_diarization(pipeline, waveform)
+
+    assert result == "diarization-result"
+    pipeline_input = pipeline.call_args[0][0]
+    assert pipeline_input["sample_rate"] == 16000
+    assert tuple(pipeline_input["waveform"].shape) == (1, 16000)
+
+@patch('torch.cuda.is_available')
+@patch("transcribe_meeting.diarizer.Pipeline.from_pretrained")
+def test_load_diarization_pipeline_on_selected_cpu(mock_from_pretrained, mock_cuda_available):
+    mock_pipeline = MagicMock()
+    mock_from_pretrained.return_value = mock_pipeline
+    mock_cuda_available.return_value = True
+
+    result = load_diarization_pipeline("test-pipeline", "test-token", device="cpu")
+
+    assert result == mock_pipeline
+    mock_pipeline.to.assert_not_called()
+
+@patch("transcribe_meeting.diarizer.config")
+@patch("transcribe_meeting.diarizer.load_diarization_pipeline")
+def test_resident_pipeline_is_reused_per_device_and_evicted(mock_load, mock_config):
+    from transcribe_meeting import diarizer
+    mock_config.DIARIZATION_PIPELINE_IDLE_S = 600
+    mock_load.side_effect = lambda name, token, device: f"{name}-{device}"
+    diarizer._resident_pipelines.clear()
+
+    with diarizer.resident_diarization_pipeline("test-pipeline", None, "cpu") as first:
+        pass
+    with diarizer.resident_diarization_pipeline("test-pipeline", None, "cpu") as second:
+        # A pipeline in use is never evicted
+        assert diarizer.evict_idle_pipelines(0) == 0
+    with diarizer.resident_diarization_pipeline("test-pipeline", None, "cuda") as third:
+        pass
+
+    assert first == second == "test-pipeline-cpu"
+    assert third == "test-pipeline-cuda"
+    assert mock_load.call_count == 2
+    assert diarizer.evict_idle_pipelines(3600) == 0
+    assert diarizer.evict_idle_pipelines(0) == 2
+    assert diarizer._resident_pipelines == {}
+
+@patch("transcribe_meeting.diarizer.config")
+@patch("transcribe_meeting.diarizer.load_diarization_pipeline")
+def test_slow_pipeline_load_does_not_block_other_devices(mock_load, mock_config):
+    import threading
+    from transcribe_meeting import diarizer
+    mock_config.DIARIZATION_PIPELINE_IDLE_S = 600
+    cuda_loading, release_cuda = threading.Event(), threading.Event()
+
+    def load(name, token, device):
+        if device == "cuda":
+            cuda_loading.set()
+            release_cuda.wait(5)
+        return f"{name}-{device}"
+    mock_load.side_effect = load
+    diarizer._resident_pipelines.clear()
+
+    results = []
+    def use_cuda():
+        with diarizer.resident_diarization_pipeline("test-pipeline", None, "cuda") as pipeline:
+            results.append(pipeline)
+    threads = [threading.Thread(target=use_cuda) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    assert cuda_loading.wait(5)
+
+    # While the CUDA pipeline loads, the CPU pipeline loads and eviction runs
+    with diarizer.resident_diarization_pipeline("test-pipeline", None, "cpu") as cpu:
+        assert cpu == "test-pipeline-cpu"
+    assert diarizer.evict_idle_pipelines(3600) == 0
+
+    release_cuda.set()
+    for thread in threads:
+        thread.join(5)
+    assert results == ["test-pipeline-cuda"] * 2
+    assert mock_load.call_count == 2
+    diarizer._resident_pipelines.clear()
+
+def test_run_diarization_passes_speaker_hints():
+    pipeline = MagicMock(return_value="diarization-result")
+    result = run_diarization(pipeline, "test-audio.wav", num_speakers=3)
+    assert result == "diarization-result"
+    assert pipeline.call_args.kwargs == {"num_speakers": 3}
+
+def test_speaker_hints_validation():
+    from transcribe_meeting.diarizer import speaker_hints
+    assert speaker_hints() == {}
+    assert speaker_hints(min_speakers=2, max_speakers=5) == {"min_speakers": 2, "max_speakers": 5}
+    with pytest.raises(ValueError):
+        speaker_hints(num_speakers=0)
+    with pytest.raises(ValueError):
+        speaker_hints(min_speakers=4, max_speakers=2)
+    with pytest.raises(ValueError):
+        speaker_hints(num_speakers=6, max_speakers=5)
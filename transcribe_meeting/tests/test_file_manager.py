@@ -60,6 +60,18 @@ def test_calculate_paths(temp_dir, monkeypatch):
     assert paths["transcript_subdir"] == repo_root / transcript_base_dir_name / "2023" / "05"
     assert paths["output_txt_file"] == paths["transcript_subdir"] / "test_video_transcript_speakers.txt"
     assert paths["processed_video_path"] == processed_video_dir / "test_video.mp4"
+    assert paths["diarization_state_dir"] == paths["transcript_subdir"] / "test_video_transcript_speakers_diarization"
+
+def test_calculate_paths_flac_audio(temp_dir):
+    """Test that the intermediate audio file follows the requested format."""
+    paths = calculate_paths(
+        temp_dir / "test_video.mp4",
+        temp_dir / "repo_root",
+        "transcripts",
+        temp_dir / "processed",
+        audio_format="flac"
+    )
+    assert paths["audio_file"] == temp_dir / "test_video_audio.flac"
 
 def test_create_directories(temp_dir):
     """Test directory creation functionality."""
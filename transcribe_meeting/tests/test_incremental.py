@@ -0,0 +1,103 @@
+"""Tests for the incremental module."""
+
+import sys
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+import numpy as np
+
+# Add the src directory to path so we can import the package
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from transcribe_meeting.incremental import load_state, process_tail
+
+SR = 16000
+
+
+def _recording(seconds):
+    """A ramp, so every sample encodes its own time."""
+    return np.arange(int(seconds * SR), dtype=np.float32) / SR
+
+
+def _transcribe(waveform):
+    # One word per second of audio, named after its recording time
+    offset = round(float(waveform[0]))
+    return [{"start": 0.0, "end": waveform.shape[0] / SR, "words": [
+        {"text": f"w{offset + i}", "start": float(i), "end": i + 0.5}
+        for i in range(int(waveform.shape[0] / SR))
+    ]}]
+
+
+@patch("transcribe_meeting.incremental.speaker_embeddings.embed_speakers")
+@patch("transcribe_meeting.incremental.diarizer")
+@patch("transcribe_meeting.incremental.audio_utils.decode_audio")
+def test_growing_recording_is_appended_with_stable_speakers(mock_decode, mock_diarizer, mock_embed, tmp_path):
+    alice, bob = np.array([1.0, 0.0]), np.array([0.0, 1.0])
+    transcript = tmp_path / "meeting.txt"
+
+    # First run: 20 s recorded, Alice talking
+    mock_decode.side_effect = lambda path, token, start_seconds: _recording(20)[int(start_seconds * SR):]
+    mock_diarizer.extract_speaker_turns.return_value = [{"start": 0.0, "end": 20.0, "speaker": "SPEAKER_00"}]
+    mock_embed.return_value = {"SPEAKER_00": alice}
+    summary = process_tail("meeting.mkv", transcript, MagicMock(), _transcribe,
+                           overlap_seconds=10, holdback_seconds=3)
+    assert summary == {"start": 0.0, "end": 17.0, "words": 17, "speakers": 1}
+    assert transcript.read_text() == "[SPEAKER_00]: " + " ".join(f"w{i}" for i in range(17)) + "\n"
+
+    # Second run: 30 s recorded; the tail from 7 s labels Alice SPEAKER_01 and Bob SPEAKER_00
+    mock_decode.side_effect = lambda path, token, start_seconds: _recording(30)[int(start_seconds * SR):]
+    mock_diarizer.extract_speaker_turns.return_value = [
+        {"start": 0.0, "end": 12.0, "speaker": "SPEAKER_01"},
+        {"start": 12.0, "end": 23.0, "speaker": "SPEAKER_00"},
+    ]
+    mock_embed.return_value = {"SPEAKER_00": bob, "SPEAKER_01": alice}
+    summary = process_tail("meeting.mkv", transcript, MagicMock(), _transcribe,
+                           overlap_seconds=10, holdback_seconds=3, final=True)
+
+    assert mock_decode.call_args[1]["start_seconds"] == 7.0
+    assert summary == {"start": 17.0, "end": 30.0, "words": 13, "speakers": 2}
+    # Alice's line is continued, not repeated
+    assert transcript.read_text() == (
+        "[SPEAKER_00]: " + " ".join(f"w{i}" for i in range(19)) + "\n"
+        "[SPEAKER_01]: " + " ".join(f"w{i}" for i in range(19, 30)) + "\n"
+    )
+    assert load_state(transcript)["committed_s"] == 30.0
+
+
+@patch("transcribe_meeting.incremental.diarizer")
+@patch("transcribe_meeting.incremental.audio_utils.decode_audio")
+def test_no_new_audio_changes_nothing(mock_decode, mock_diarizer, tmp_path):
+    mock_decode.return_value = _recording(2)
+    summary = process_tail("meeting.mkv", tmp_path / "meeting.txt", MagicMock(), _transcribe, holdback_seconds=3)
+    assert summary["words"] == 0
+    mock_diarizer.run_diarization.assert_not_called()
+    assert not (tmp_path / "meeting.txt").exists()
+
+
+@patch("transcribe_meeting.incremental.speaker_embeddings.embed_speakers")
+@patch("transcribe_meeting.incremental.diarizer")
+@patch("transcribe_meeting.incremental.audio_utils.decode_audio")
+def test_words_of_unidentified_speakers_are_kept(mock_decode, mock_diarizer, mock_embed, tmp_path, caplog):
+    transcript = tmp_path / "meeting.txt"
+    mock_decode.side_effect = lambda path, token, start_seconds: _recording(10)[int(start_seconds * SR):]
+
+    # A short interjection (SPEAKER_01) is too short to embed
+    mock_diarizer.extract_speaker_turns.return_value = [
+        {"start": 0.0, "end": 4.9, "speaker": "SPEAKER_00"},
+        {"start": 4.9, "end": 5.6, "speaker": "SPEAKER_01"},
+        {"start": 5.6, "end": 10.0, "speaker": "SPEAKER_00"},
+    ]
+    mock_embed.return_value = {"SPEAKER_00": np.array([1.0, 0.0])}
+    summary = process_tail("meeting.mkv", transcript, MagicMock(), _transcribe, holdback_seconds=3)
+
+    assert summary["words"] == 7 and summary["speakers"] == 1
+    assert "too little speech to be identified" in caplog.text
+
+    # A tail with nobody identifiable continues the last line
+    mock_decode.side_effect = lambda path, token, start_seconds: _recording(12)[int(start_seconds * SR):]
+    mock_diarizer.extract_speaker_turns.return_value = [{"start": 0.0, "end": 0.4, "speaker": "SPEAKER_00"}]
+    mock_embed.return_value = {}
+    summary = process_tail("meeting.mkv", transcript, MagicMock(), _transcribe,
+                           overlap_seconds=10, holdback_seconds=3, final=True)
+
+    assert summary["words"] == 5
+    assert transcript.read_text() == "[SPEAKER_00]: " + " ".join(f"w{i}" for i in range(12)) + "\n"
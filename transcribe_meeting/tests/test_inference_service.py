@@ -0,0 +1,127 @@
+"""Tests for the inference_service module."""
+
+import sys
+import threading
+from pathlib import Path
+from types import SimpleNamespace
+import numpy as np
+import pytest
+from unittest.mock import patch, MagicMock
+
+# Add the src directory to path so we can import the package
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from transcribe_meeting import inference_service
+from transcribe_meeting.inference_service import InferenceService, SAMPLE_RATE
+
+
+def _fake_transcribe(audio, clip_timestamps=None, word_timestamps=True, **kwargs):
+    """Return one segment per clip, spanning the clip, like the real pipeline."""
+    segments = []
+    for clip in clip_timestamps:
+        start = clip["start"] / SAMPLE_RATE
+        end = clip["end"] / SAMPLE_RATE
+        words = [SimpleNamespace(word="hello", start=start, end=end, probability=0.9)]
+        segments.append(SimpleNamespace(
+            seek=int(start * 100), start=start, end=end, text="hello", words=words if word_timestamps else None
+        ))
+    return segments, MagicMock()
+
+
+@pytest.fixture
+def service():
+    with patch("transcribe_meeting.inference_service.BatchedInferencePipeline") as mock_pipeline, \
+         patch("transcribe_meeting.inference_service.get_speech_timestamps") as mock_vad, \
+         patch("transcribe_meeting.inference_service.merge_segments") as mock_merge:
+        mock_pipeline.return_value.transcribe.side_effect = _fake_transcribe
+        mock_pipeline.return_value.model.frames_per_second = 100
+        mock_vad.return_value = []
+        model = MagicMock()
+        model.detect_language.return_value = ("en", 0.99, [])
+        svc = InferenceService(lambda: model, batch_size=4, max_wait_seconds=0.2)
+        svc.mock_pipeline = mock_pipeline
+        svc.mock_merge = mock_merge
+        yield svc
+
+
+def test_chunks_from_concurrent_jobs_share_batches(service):
+    # Two jobs with two 1-second chunks each
+    service.mock_merge.return_value = [
+        {"start": 0, "end": SAMPLE_RATE},
+        {"start": 2 * SAMPLE_RATE, "end": 3 * SAMPLE_RATE},
+    ]
+    audio = np.zeros(4 * SAMPLE_RATE, dtype=np.float32)
+    results = {}
+
+    def run(name):
+        results[name] = service.transcribe(audio)
+
+    threads = [threading.Thread(target=run, args=(name,)) for name in ("a", "b")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    stats = service.stats()
+    assert stats["chunks"] == 4
+    assert stats["batches"] == 1
+    assert stats["mean_batch_fill"] == 1.0
+    for name in ("a", "b"):
+        assert [segment["start"] for segment in results[name]] == [0.0, 2.0]
+        assert results[name][1]["words"][0]["end"] == 3.0
+
+
+def test_silent_audio_returns_no_segments(service):
+    service.mock_merge.return_value = []
+    assert service.transcribe(np.zeros(SAMPLE_RATE, dtype=np.float32)) == []
+    service.mock_pipeline.return_value.transcribe.assert_not_called()
+
+
+def test_partial_batch_runs_after_wait(service):
+    service.mock_merge.return_value = [{"start": 0, "end": SAMPLE_RATE}]
+    segments = service.transcribe(np.zeros(SAMPLE_RATE, dtype=np.float32))
+    assert len(segments) == 1
+    assert service.stats()["mean_batch_fill"] == 0.25
+
+
+def test_transcribe_clips_keeps_segments_per_clip(service):
+    audio = np.zeros(4 * SAMPLE_RATE, dtype=np.float32)
+    overlapping = [{"start": 0, "end": 3 * SAMPLE_RATE}, {"start": SAMPLE_RATE, "end": 2 * SAMPLE_RATE}]
+
+    clip_segments = service.transcribe_clips(audio, None, overlapping)
+
+    assert [[(s["start"], s["end"]) for s in segments] for segments in clip_segments] == [[(0.0, 3.0)], [(1.0, 2.0)]]
+
+
+def test_segments_of_touching_clips_go_to_their_own_clip(service):
+    # The second clip's segment starts exactly where the first clip ends
+    audio = np.zeros(2 * SAMPLE_RATE, dtype=np.float32)
+    touching = [{"start": 0, "end": SAMPLE_RATE}, {"start": SAMPLE_RATE, "end": 2 * SAMPLE_RATE}]
+
+    clip_segments = service.transcribe_clips(audio, None, touching)
+
+    assert [[(s["start"], s["end"]) for s in segments] for segments in clip_segments] == [[(0.0, 1.0)], [(1.0, 2.0)]]
+
+
+def test_requests_without_word_timestamps_are_batched_apart(service):
+    audio = np.zeros(SAMPLE_RATE, dtype=np.float32)
+    clips = [{"start": 0, "end": SAMPLE_RATE}]
+    results = {}
+
+    def run(word_timestamps):
+        results[word_timestamps] = service.transcribe_clips(audio, None, clips, word_timestamps)
+
+    threads = [threading.Thread(target=run, args=(flag,)) for flag in (True, False)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    calls = service.mock_pipeline.return_value.transcribe.call_args_list
+    assert sorted(call.kwargs["word_timestamps"] for call in calls) == [False, True]
+    assert results[True][0][0]["words"] and results[False][0][0]["words"] == []
+
+
+def test_get_inference_stats_before_use():
+    with patch.object(inference_service, "_service", None):
+        assert inference_service.get_inference_stats() is None
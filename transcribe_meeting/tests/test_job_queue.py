@@ -0,0 +1,117 @@
+"""Tests for the job_queue module."""
+
+import sys
+import asyncio
+from pathlib import Path
+import pytest
+from unittest.mock import patch
+
+# Add the src directory to path so we can import the package
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from transcribe_meeting.job_queue import JobScheduler
+
+
+async def _noop() -> None:
+    return None
+
+
+def _queue(scheduler, job_id, duration, submitted_at):
+    """Insert a queued entry without starting the workers."""
+    scheduler._queued[job_id] = {
+        "job_id": job_id,
+        "duration": duration,
+        "expected_seconds": scheduler.expected_seconds(duration),
+        "submitted_at": submitted_at,
+        "runner": _noop,
+    }
+
+
+def test_shortest_expected_job_first():
+    scheduler = JobScheduler(max_concurrent=1, seconds_per_audio_second=0.5, aging_factor=0.0)
+    with patch("transcribe_meeting.job_queue.time.time", return_value=1000.0):
+        _queue(scheduler, "vod", 6 * 3600, 900.0)
+        _queue(scheduler, "standup", 15 * 60, 990.0)
+        assert scheduler._next_job()["job_id"] == "standup"
+        assert scheduler._next_job()["job_id"] == "vod"
+        assert scheduler._next_job() is None
+
+
+def test_aging_prevents_starvation():
+    scheduler = JobScheduler(max_concurrent=1, seconds_per_audio_second=0.5, aging_factor=1.0)
+    # The VOD (10800 s of expected work) has waited long enough to overtake
+    with patch("transcribe_meeting.job_queue.time.time", return_value=20000.0):
+        _queue(scheduler, "vod", 6 * 3600, 0.0)
+        _queue(scheduler, "standup", 15 * 60, 19990.0)
+        assert scheduler._next_job()["job_id"] == "vod"
+
+
+def test_unknown_duration_uses_default():
+    scheduler = JobScheduler(seconds_per_audio_second=0.5, unknown_duration=3600)
+    assert scheduler.expected_seconds(None) == 1800
+
+
+def test_queue_info_reports_position_and_start_time():
+    scheduler = JobScheduler(max_concurrent=1, seconds_per_audio_second=1.0, aging_factor=0.0)
+    with patch("transcribe_meeting.job_queue.time.time", return_value=1000.0):
+        scheduler._running["current"] = {
+            "job_id": "current", "duration": 100, "expected_seconds": 100.0,
+            "submitted_at": 900.0, "started_at": 950.0,
+        }
+        _queue(scheduler, "long", 300, 960.0)
+        _queue(scheduler, "short", 60, 970.0)
+
+        short_info = scheduler.queue_info("short")
+        long_info = scheduler.queue_info("long")
+
+    assert short_info == {"queue_position": 1, "expected_start_time": 1050.0}
+    assert long_info == {"queue_position": 2, "expected_start_time": 1110.0}
+    assert scheduler.queue_info("missing") is None
+
+
+def test_remove_queued_job():
+    scheduler = JobScheduler()
+    _queue(scheduler, "job", 60, 0.0)
+    assert scheduler.remove("job") is True
+    assert scheduler.remove("job") is False
+
+
+@pytest.mark.asyncio
+async def test_worker_runs_jobs_and_refines_rate():
+    scheduler = JobScheduler(max_concurrent=1, seconds_per_audio_second=0.5)
+    finished = asyncio.Event()
+    order = []
+
+    async def make_runner(name):
+        order.append(name)
+        if name == "second":
+            finished.set()
+        return True
+
+    scheduler.submit("first", 60, lambda: make_runner("first"))
+    scheduler.submit("second", 60, lambda: make_runner("second"))
+    await asyncio.wait_for(finished.wait(), timeout=5)
+
+    assert order == ["first", "second"]
+    # Jobs finished almost instantly, so the estimate moves towards zero
+    assert scheduler.seconds_per_audio_second < 0.5
+
+
+@pytest.mark.asyncio
+async def test_failed_and_cached_jobs_do_not_refine_rate():
+    scheduler = JobScheduler(max_concurrent=1, seconds_per_audio_second=0.5)
+    finished = asyncio.Event()
+
+    async def cache_hit():
+        return False
+
+    async def failing():
+        finished.set()
+        raise RuntimeError("boom")
+
+    scheduler.submit("cached", 60, cache_hit)
+    scheduler.submit("failed", 60, failing)
+    await asyncio.wait_for(finished.wait(), timeout=5)
+    await asyncio.sleep(0)
+
+    assert scheduler.seconds_per_audio_second == 0.5
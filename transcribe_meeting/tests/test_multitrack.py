@@ -0,0 +1,93 @@
+"""Tests for the multitrack module."""
+
+import json
+import sys
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+import numpy as np
+import pytest
+
+# Add the src directory to path so we can import the package
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from transcribe_meeting.multitrack import (
+    detect_track_sources, track_activity, tracks_are_separated, activity_to_turns
+)
+
+SR = 16000
+
+
+def _tone(seconds, amplitude=0.3):
+    t = np.arange(int(seconds * SR)) / SR
+    return (amplitude * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+
+
+def _silence(seconds):
+    return np.zeros(int(seconds * SR), dtype=np.float32)
+
+
+def _ffprobe_result(streams):
+    return MagicMock(stdout=json.dumps({"streams": streams}))
+
+
+@patch("transcribe_meeting.multitrack.subprocess.run")
+def test_separate_streams_become_sources(mock_run):
+    mock_run.return_value = _ffprobe_result([
+        {"channels": 1, "tags": {"title": "Alice"}},
+        {"channels": 1},
+    ])
+    sources = detect_track_sources("meeting.mkv")
+    assert [source["label"] for source in sources] == ["Alice", "SPEAKER_01"]
+    assert [source["stream_index"] for source in sources] == [0, 1]
+    assert all(source["channel"] is None for source in sources)
+
+
+@patch("transcribe_meeting.multitrack.subprocess.run")
+def test_single_stream_channels_and_surround(mock_run):
+    mock_run.return_value = _ffprobe_result([{"channels": 2}])
+    sources = detect_track_sources("zoom.m4a")
+    assert [source["channel"] for source in sources] == [0, 1]
+
+    mock_run.return_value = _ffprobe_result([{"channels": 1}])
+    assert detect_track_sources("mono.mp4") == []
+
+    mock_run.return_value = _ffprobe_result([{"channels": 6}])
+    assert detect_track_sources("movie.mkv", max_tracks=4) == []
+
+
+def test_bleed_does_not_create_turns():
+    alice = np.concatenate([_tone(3), _silence(3)])
+    # Bob's microphone picks up Alice 30 dB quieter, then Bob speaks
+    bob = np.concatenate([_tone(3, amplitude=0.01), _tone(3)])
+    activity = track_activity([alice, bob])
+    assert tracks_are_separated(activity)
+
+    turns = activity_to_turns(activity, ["Alice", "Bob"], 6.0, padding_seconds=0.0)
+    assert [(turn["speaker"], turn["track"]) for turn in turns] == [("Alice", 0), ("Bob", 1)]
+    assert turns[0]["end"] == pytest.approx(3.0, abs=0.05)
+    assert turns[1]["start"] == pytest.approx(3.0, abs=0.05)
+
+
+def test_identical_tracks_are_not_separated():
+    mix = np.concatenate([_tone(2), _silence(1), _tone(2)])
+    activity = track_activity([mix, mix.copy()])
+    assert not tracks_are_separated(activity)
+    assert not tracks_are_separated(track_activity([_silence(2), _silence(2)]))
+
+
+@patch("transcribe_meeting.core._embed_job_speakers")
+def test_track_speakers_are_embedded_from_their_own_track(mock_embed):
+    from transcribe_meeting.core import _embed_track_speakers
+    mock_embed.side_effect = lambda waveform, turns, device: {turns[0]["speaker"]: [float(waveform[0])]}
+    tracks = {
+        "waveforms": [np.zeros(SR, dtype=np.float32), np.ones(SR, dtype=np.float32)],
+        "speaker_turns": [
+            {"start": 0.0, "end": 0.5, "speaker": "track 1", "track": 0},
+            {"start": 0.5, "end": 1.0, "speaker": "track 2", "track": 1},
+        ],
+    }
+
+    assert _embed_track_speakers(tracks, "cpu") == {"track 1": [0.0], "track 2": [1.0]}
+    assert [call[0][1] for call in mock_embed.call_args_list] == [
+        [tracks["speaker_turns"][0]], [tracks["speaker_turns"][1]]
+    ]
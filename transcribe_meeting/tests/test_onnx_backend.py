@@ -0,0 +1,84 @@
+"""Tests for the onnx_backend module."""
+
+import sys
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+import numpy as np
+import torch
+
+# Add the src directory to path so we can import the package
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from transcribe_meeting.onnx_backend import model_path, session_forward, use_onnx_runtime, weights_fingerprint
+
+
+def test_model_path_names_part_and_quantization(tmp_path):
+    assert model_path(tmp_path, "pyannote/speaker-diarization@2.1", "segmentation", "0123abcd") == \
+        tmp_path / "pyannote_speaker-diarization_2.1-segmentation-0123abcd.onnx"
+    assert model_path(tmp_path, "pyannote/speaker-diarization@2.1", "embedding", "0123abcd", quantize=True).name == \
+        "pyannote_speaker-diarization_2.1-embedding-0123abcd-int8.onnx"
+
+
+def test_weights_fingerprint_changes_with_weights_and_settings():
+    torch.manual_seed(0)
+    module = torch.nn.Linear(4, 2)
+    fingerprint = weights_fingerprint(module, 5.0)
+
+    assert fingerprint == weights_fingerprint(module, 5.0)
+    assert fingerprint != weights_fingerprint(module, 10.0)
+    with torch.no_grad():
+        module.weight[0, 0] += 1.0
+    assert fingerprint != weights_fingerprint(module, 5.0)
+
+
+def test_session_forward_feeds_numpy_and_fills_missing_weights():
+    session = MagicMock()
+    session.run.return_value = [np.ones((2, 4), dtype=np.float32)]
+    forward = session_forward(session, ["waveforms", "weights"])
+
+    output = forward(torch.zeros(2, 1, 160))
+
+    assert isinstance(output, torch.Tensor) and tuple(output.shape) == (2, 4)
+    feeds = session.run.call_args[0][1]
+    assert feeds["waveforms"].shape == (2, 1, 160)
+    assert feeds["weights"].shape == (2, 1) and (feeds["weights"] == 1).all()
+
+    forward(torch.zeros(2, 1, 160), weights=torch.zeros(2, 50))
+    assert session.run.call_args[0][1]["weights"].shape == (2, 50)
+
+
+def test_pipeline_stays_on_pytorch_without_onnxruntime(tmp_path):
+    pipeline = MagicMock()
+    with patch.dict(sys.modules, {"onnxruntime": None}):
+        assert use_onnx_runtime(pipeline, "pipeline", tmp_path, threads=2) is False
+    assert list(tmp_path.iterdir()) == []
+
+
+@patch("transcribe_meeting.onnx_backend.create_session")
+@patch("transcribe_meeting.onnx_backend.export_module")
+def test_segmentation_and_embedding_forwards_are_replaced(mock_export, mock_session, tmp_path):
+    mock_export.side_effect = lambda module, path, *args: path.touch() or True
+    pipeline = MagicMock()
+    pipeline._segmentation.model = torch.nn.Linear(1, 1)
+    pipeline._segmentation.duration = 1.0
+    pipeline._embedding.model_ = torch.nn.Linear(1, 1)
+
+    with patch.dict(sys.modules, {"onnxruntime": MagicMock()}):
+        assert use_onnx_runtime(pipeline, "pipeline", tmp_path, threads=3)
+
+        assert mock_export.call_count == 2
+        fingerprint = weights_fingerprint(pipeline._segmentation.model, 1.0)
+        assert mock_session.call_args_list[0][0] == (tmp_path / f"pipeline-segmentation-{fingerprint}.onnx", 3)
+        assert "forward" in vars(pipeline._segmentation.model)
+        assert "forward" in vars(pipeline._embedding.model_)
+
+        # Exported models are reused
+        mock_export.reset_mock()
+        use_onnx_runtime(pipeline, "pipeline", tmp_path, threads=3)
+        mock_export.assert_not_called()
+
+        # New weights are exported again
+        with torch.no_grad():
+            pipeline._segmentation.model.weight.add_(1.0)
+        use_onnx_runtime(pipeline, "pipeline", tmp_path, threads=3)
+        assert mock_export.call_count == 1
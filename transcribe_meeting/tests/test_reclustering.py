@@ -0,0 +1,136 @@
+"""Tests for the reclustering module."""
+
+import json
+import sys
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+import numpy as np
+import pytest
+
+# Add the src directory to path so we can import the package
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from pyannote.core import Annotation, Segment, SlidingWindow, SlidingWindowFeature
+
+from transcribe_meeting.reclustering import (
+    load_segments, load_state, recluster, save_segments, save_state
+)
+
+
+class FakeClustering:
+    """Stands in for pyannote's clustering step, recording its threshold."""
+    calls = []
+
+    def __init__(self):
+        self.threshold = 0.7
+
+    def __call__(self, embeddings, segmentations, num_clusters=None, **kwargs):
+        FakeClustering.calls.append((self.threshold, num_clusters))
+        return np.zeros(embeddings.shape[:2], dtype=np.int8), None
+
+
+def _artifacts():
+    window = SlidingWindow(start=0.0, duration=5.0, step=0.5)
+    frames = SlidingWindow(start=0.0, duration=0.017, step=0.017)
+    segmentation = np.zeros((4, 10, 3), dtype=np.float32)
+    segmentation[:, :, 0] = 1.0
+    return {
+        "segmentation": SlidingWindowFeature(segmentation, window),
+        "speaker_counting": SlidingWindowFeature(np.ones((20, 1), dtype=np.uint8), frames),
+        "embeddings": np.random.default_rng(0).normal(size=(4, 3, 8)).astype(np.float32),
+    }
+
+
+def test_state_round_trips(tmp_path):
+    artifacts = _artifacts()
+    assert save_state(tmp_path, artifacts)
+    state = load_state(tmp_path)
+    np.testing.assert_array_equal(state["segmentation"].data, artifacts["segmentation"].data)
+    assert state["segmentation"].sliding_window.step == 0.5
+    np.testing.assert_array_equal(state["embeddings"], artifacts["embeddings"])
+
+    segments = [{"start": 0.0, "end": 1.0, "text": "hi", "words": []}]
+    assert save_segments(tmp_path, segments)
+    assert load_segments(tmp_path) == segments
+
+
+def test_missing_state(tmp_path):
+    assert not save_state(tmp_path, {"segmentation": _artifacts()["segmentation"]})
+    assert load_state(tmp_path) is None
+    assert load_segments(tmp_path) is None
+
+
+def test_recluster_uses_new_threshold_without_touching_the_pipeline(tmp_path):
+    save_state(tmp_path, _artifacts())
+    state = load_state(tmp_path)
+
+    pipeline = MagicMock()
+    del pipeline.set_num_speakers
+    pipeline._segmentation.model.specifications.powerset = False
+    pipeline.segmentation.threshold = 0.5
+    pipeline.segmentation.min_duration_off = 0.0
+    pipeline.clustering = FakeClustering()
+    annotation = Annotation()
+    annotation[Segment(2.0, 3.0)] = "B"
+    annotation[Segment(0.0, 1.5)] = "A"
+    pipeline.to_annotation.return_value = annotation
+
+    turns = recluster(pipeline, state, {"num_speakers": 2}, threshold=0.3)
+
+    assert turns == [
+        {"start": 0.0, "end": 1.5, "speaker": "SPEAKER_00"},
+        {"start": 2.0, "end": 3.0, "speaker": "SPEAKER_01"},
+    ]
+    assert pipeline.clustering.threshold == 0.7
+    assert FakeClustering.calls == [(0.3, 2)]
+    hard_clusters = pipeline.reconstruct.call_args[0][1]
+    # Local speakers 1 and 2 never speak, so they belong to no cluster
+    assert (hard_clusters[:, 1:] == -2).all()
+
+
+@patch("transcribe_meeting.core.align_and_save")
+@patch("transcribe_meeting.core.diarizer.resident_diarization_pipeline")
+@patch("transcribe_meeting.core.reclustering")
+def test_recluster_transcript_refreshes_job_result(mock_reclustering, mock_pipeline, mock_align, tmp_path):
+    from transcribe_meeting.core import recluster_transcript
+    turns = [{"start": 0.0, "end": 1.0, "speaker": "SPEAKER_01"}]
+    words = [{"text": "hi", "start": 0.2, "end": 0.4, "speaker": "SPEAKER_01"}]
+    mock_reclustering.recluster.return_value = turns
+    mock_align.return_value = words
+    (tmp_path / "result.json").write_text(json.dumps({"speaker_embeddings": {"SPEAKER_00": [1.0]}}))
+
+    assert recluster_transcript(tmp_path, tmp_path / "transcript.txt", {"num_speakers": 2}, device="cpu") == words
+
+    result = json.loads((tmp_path / "result.json").read_text())
+    assert result == {"speaker_turns": turns, "words": words, "speaker_embeddings": None}
+
+
+def test_recluster_powerset_pipeline_caps_speakers_per_frame(tmp_path):
+    artifacts = _artifacts()
+    artifacts["speaker_counting"] = SlidingWindowFeature(
+        np.full((20, 1), 3, dtype=np.uint8), artifacts["speaker_counting"].sliding_window
+    )
+    save_state(tmp_path, artifacts)
+    state = load_state(tmp_path)
+
+    pipeline = MagicMock()
+    del pipeline.set_num_speakers
+    pipeline._segmentation.model.specifications.powerset = True
+    # Powerset pipelines have no segmentation threshold
+    pipeline.segmentation = MagicMock(spec=["min_duration_off"])
+    pipeline.segmentation.min_duration_off = 0.0
+    pipeline.clustering = FakeClustering()
+    pipeline.to_annotation.return_value = Annotation()
+
+    assert recluster(pipeline, state, {"max_speakers": 2}) == []
+
+    segmentations, hard_clusters, count = pipeline.reconstruct.call_args[0]
+    assert segmentations is state["segmentation"]
+    assert count.data.max() == 2
+    assert (hard_clusters[:, 1:] == -2).all()
+
+
+def test_recluster_rejects_incompatible_pipeline():
+    pipeline = MagicMock(spec=["clustering", "segmentation"])
+    with pytest.raises(RuntimeError, match="_frames, reconstruct, to_annotation"):
+        recluster(pipeline, {})
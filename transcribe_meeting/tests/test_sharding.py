@@ -0,0 +1,133 @@
+"""Tests for the sharding module."""
+
+import json
+import re
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest.mock import patch
+
+# Add the src directory to path so we can import the package
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from transcribe_meeting.sharding import merge_shards, plan_shards, run_sharded
+
+ALICE, BOB = [1.0, 0.0], [0.0, 1.0]
+
+# 100 s recording in two 60 s shards overlapping at 40-60 s, cut at 50 s.
+# Alice talks until 45 s, Bob after; the second shard labels them the other way round.
+SHARDS = [(0.0, 60.0), (40.0, 100.0)]
+
+
+def _words(speaker, offset, *times):
+    return [{"text": f"w{offset + t}", "start": float(t), "end": t + 0.5, "speaker": speaker} for t in times]
+
+
+RESULTS = [
+    {
+        "speaker_turns": [
+            {"start": 0.0, "end": 45.0, "speaker": "SPEAKER_00"},
+            {"start": 45.0, "end": 60.0, "speaker": "SPEAKER_01"},
+        ],
+        "words": _words("SPEAKER_00", 0, 5, 15, 25, 35) + _words("SPEAKER_01", 0, 47, 55),
+        "speaker_embeddings": {"SPEAKER_00": ALICE, "SPEAKER_01": BOB},
+    },
+    {
+        "speaker_turns": [
+            {"start": 0.0, "end": 5.0, "speaker": "SPEAKER_01"},
+            {"start": 5.0, "end": 60.0, "speaker": "SPEAKER_00"},
+        ],
+        "words": _words("SPEAKER_01", 40, 2) + _words("SPEAKER_00", 40, 7, 15, 35, 55),
+        "speaker_embeddings": {"SPEAKER_00": BOB, "SPEAKER_01": ALICE},
+    },
+]
+
+EXPECTED_TRANSCRIPT = "[SPEAKER_00]: w5 w15 w25 w35\n[SPEAKER_01]: w47 w55 w75 w95\n"
+
+
+def test_plan_shards_overlap_and_cover_the_recording():
+    assert plan_shards(100.0, 40.0, 10.0) == [(0.0, 40.0), (30.0, 70.0), (60.0, 100.0)]
+    assert plan_shards(20.0, 40.0, 10.0) == [(0.0, 20.0)]
+
+
+def test_merge_shards_reconciles_speakers_and_cuts_in_the_overlap():
+    turns, words = merge_shards(RESULTS, SHARDS)
+
+    assert turns == [
+        {"start": 0.0, "end": 45.0, "speaker": "SPEAKER_00"},
+        {"start": 45.0, "end": 100.0, "speaker": "SPEAKER_01"},
+    ]
+    # Words in the overlap come from the shard on their side of the cut, once
+    assert [(word["text"], word["start"], word["speaker"]) for word in words] == [
+        ("w5", 5.0, "SPEAKER_00"), ("w15", 15.0, "SPEAKER_00"), ("w25", 25.0, "SPEAKER_00"),
+        ("w35", 35.0, "SPEAKER_00"), ("w47", 47.0, "SPEAKER_01"), ("w55", 55.0, "SPEAKER_01"),
+        ("w75", 75.0, "SPEAKER_01"), ("w95", 95.0, "SPEAKER_01"),
+    ]
+
+
+def test_merge_shards_gives_speakers_without_embedding_the_closest_turn():
+    second = dict(RESULTS[1], words=RESULTS[1]["words"] + _words("SPEAKER_02", 40, 58))
+    second["speaker_turns"] = second["speaker_turns"] + [{"start": 57.0, "end": 60.0, "speaker": "SPEAKER_02"}]
+
+    turns, words = merge_shards([RESULTS[0], second], SHARDS)
+
+    assert {turn["speaker"] for turn in turns} == {"SPEAKER_00", "SPEAKER_01"}
+    assert words[-1]["text"] == "w98" and words[-1]["speaker"] == "SPEAKER_01"
+
+
+class _FakeWorker(BaseHTTPRequestHandler):
+    """Just enough of the API for one shard job at a time."""
+
+    def _reply(self, body):
+        data = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        shard = int(re.search(r"shard_(\d+)", self.path).group(1))
+        self.server.jobs.append(shard)
+        self._reply({"job_id": str(shard), "status": "queued"})
+
+    def do_GET(self):
+        job_id = self.path.split("/")[2]
+        if self.path.endswith("/result"):
+            self._reply(RESULTS[int(job_id)])
+        else:
+            self._reply({"job_id": job_id, "status": "failed" if self.server.broken else "completed"})
+
+    def do_DELETE(self):
+        self._reply({"message": "deleted"})
+
+    def log_message(self, *args):
+        pass
+
+
+def _start_worker(broken=False):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _FakeWorker)
+    server.jobs, server.broken = [], broken
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+@patch("transcribe_meeting.sharding.extract_shard", side_effect=lambda media, path, *args: path.write_bytes(b"fLaC") or True)
+@patch("transcribe_meeting.sharding.audio_utils.probe_duration", return_value=100.0)
+def test_run_sharded_on_local_workers_retries_failed_shards(mock_probe, mock_extract, tmp_path):
+    workers = [_start_worker(), _start_worker(broken=True)]
+    try:
+        summary = run_sharded(
+            "meeting.mp4", [f"http://127.0.0.1:{worker.server_port}" for worker in workers],
+            tmp_path / "meeting.txt", shard_seconds=60, overlap_seconds=20, poll_seconds=0.01
+        )
+    finally:
+        for worker in workers:
+            worker.shutdown()
+
+    assert summary["shards"] == 2 and summary["speakers"] == 2 and summary["words"] == 8
+    assert sorted(workers[0].jobs) == [0, 1]
+    assert (tmp_path / "meeting.txt").read_text() == EXPECTED_TRANSCRIPT
+    assert mock_extract.call_args_list[1][0][2:] == (40.0, 60.0)
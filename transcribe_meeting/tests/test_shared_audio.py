@@ -0,0 +1,44 @@
+"""Tests for the shared_audio module."""
+
+import sys
+import subprocess
+from pathlib import Path
+import numpy as np
+from unittest.mock import patch
+
+# Add the src directory to path so we can import the package
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from transcribe_meeting import shared_audio
+
+
+def _chunks():
+    yield np.linspace(-1.0, 1.0, 16000, dtype=np.float32)
+    yield np.full(8000, 0.25, dtype=np.float32)
+
+
+@patch("transcribe_meeting.shared_audio.audio_utils.iter_pcm_chunks")
+def test_write_and_attach_shared_waveform(mock_chunks, tmp_path):
+    mock_chunks.return_value = _chunks()
+
+    shared_path = shared_audio.write_shared_waveform("meeting.mp4", tmp_path)
+
+    assert shared_path == tmp_path / shared_audio.SHARED_AUDIO_FILENAME
+    waveform = shared_audio.attach_waveform(shared_path)
+    assert isinstance(waveform, np.memmap)
+    assert waveform.dtype == np.float32
+    assert not waveform.flags.writeable
+    np.testing.assert_array_equal(waveform, np.concatenate(list(_chunks())))
+
+
+def test_header_has_fixed_size():
+    assert len(shared_audio._npy_header(0)) == shared_audio.NPY_HEADER_BYTES
+    assert len(shared_audio._npy_header(10 ** 12)) == shared_audio.NPY_HEADER_BYTES
+
+
+@patch("transcribe_meeting.shared_audio.audio_utils.iter_pcm_chunks")
+def test_write_shared_waveform_failure_leaves_no_file(mock_chunks, tmp_path):
+    mock_chunks.side_effect = subprocess.CalledProcessError(1, ["ffmpeg"], stderr="boom")
+
+    assert shared_audio.write_shared_waveform("meeting.mp4", tmp_path) is None
+    assert list(tmp_path.iterdir()) == []
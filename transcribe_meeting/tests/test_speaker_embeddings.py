@@ -0,0 +1,70 @@
+"""Tests for the speaker_embeddings module."""
+
+import sys
+from pathlib import Path
+from unittest.mock import MagicMock
+import numpy as np
+import pytest
+
+# Add the src directory to path so we can import the package
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from transcribe_meeting.speaker_embeddings import (
+    SpeakerStitcher, embed_speakers, normalize, relabel_turns
+)
+
+SR = 16000
+
+
+def _voice(*components):
+    return normalize(np.array(components, dtype=np.float32))
+
+
+def test_stitcher_keeps_identities_across_pieces():
+    stitcher = SpeakerStitcher(threshold=0.8)
+    first = stitcher.assign({"SPEAKER_00": _voice(1, 0, 0), "SPEAKER_01": _voice(0, 1, 0)})
+    assert first == {"SPEAKER_00": "SPEAKER_00", "SPEAKER_01": "SPEAKER_01"}
+
+    # Local labels are swapped in the next piece and a new voice appears
+    second = stitcher.assign({
+        "SPEAKER_00": _voice(0.1, 1, 0),
+        "SPEAKER_01": _voice(1, 0.1, 0),
+        "SPEAKER_02": _voice(0, 0, 1),
+    })
+    assert second == {"SPEAKER_00": "SPEAKER_01", "SPEAKER_01": "SPEAKER_00", "SPEAKER_02": "SPEAKER_02"}
+
+
+def test_stitcher_never_merges_speakers_of_one_piece():
+    stitcher = SpeakerStitcher(threshold=0.5)
+    stitcher.assign({"SPEAKER_00": _voice(1, 0)})
+    mapping = stitcher.assign({"SPEAKER_00": _voice(1, 0.1), "SPEAKER_01": _voice(1, 0.2)})
+    assert sorted(mapping.values()) == ["SPEAKER_00", "SPEAKER_01"]
+
+
+def test_stitcher_state_round_trips():
+    stitcher = SpeakerStitcher(threshold=0.7)
+    stitcher.assign({"A": _voice(1, 0)}, {"A": 12.0})
+    restored = SpeakerStitcher.from_dict(stitcher.to_dict())
+    assert restored.labels == ["SPEAKER_00"]
+    assert restored.assign({"B": _voice(0.9, 0.1)}) == {"B": "SPEAKER_00"}
+
+
+def test_embed_speakers_skips_short_speakers():
+    pipeline = MagicMock()
+    pipeline._embedding.side_effect = lambda batch: np.full((1, 4), float(batch.shape[-1]))
+    waveform = np.zeros(10 * SR, dtype=np.float32)
+    turns = [
+        {"start": 0.0, "end": 4.0, "speaker": "SPEAKER_00"},
+        {"start": 4.0, "end": 4.2, "speaker": "SPEAKER_01"},
+    ]
+
+    embeddings = embed_speakers(pipeline, waveform, turns, max_seconds=2.0)
+
+    assert list(embeddings) == ["SPEAKER_00"]
+    assert pipeline._embedding.call_args[0][0].shape == (1, 1, 2 * SR)
+    assert np.linalg.norm(embeddings["SPEAKER_00"]) == pytest.approx(1.0)
+
+
+def test_relabel_turns_drops_unmapped_speakers():
+    turns = [{"start": 0, "end": 1, "speaker": "A"}, {"start": 1, "end": 2, "speaker": "B"}]
+    assert relabel_turns(turns, {"A": "SPEAKER_03"}) == [{"start": 0, "end": 1, "speaker": "SPEAKER_03"}]
@@ -0,0 +1,100 @@
+"""Tests for the speaker_registry module."""
+
+import sys
+import threading
+from pathlib import Path
+import numpy as np
+import pytest
+
+# Add the src directory to path so we can import the package
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from transcribe_meeting.speaker_embeddings import normalize
+from transcribe_meeting.speaker_registry import SpeakerRegistry, identify_speakers, rename_speakers
+
+
+def _voice(*components):
+    return normalize(np.array(components, dtype=np.float32))
+
+
+def test_registry_round_trips_through_disk(tmp_path):
+    registry = SpeakerRegistry(tmp_path / "registry")
+    registry.enroll("Alice", _voice(1, 0, 0), 30.0)
+    registry.enroll("Bob", _voice(0, 1, 0), 10.0)
+    assert registry.save()
+
+    restored = SpeakerRegistry(tmp_path / "registry")
+    assert restored.names == ["Alice", "Bob"]
+    assert restored.weights == [30.0, 10.0]
+    np.testing.assert_allclose(restored.matrix, registry.matrix)
+
+
+def test_match_is_one_to_one_with_confidence(tmp_path):
+    registry = SpeakerRegistry(tmp_path)
+    registry.enroll("Alice", _voice(1, 0, 0))
+    registry.enroll("Bob", _voice(0, 1, 0))
+
+    matches = registry.match({
+        "SPEAKER_00": _voice(0.1, 1, 0),
+        "SPEAKER_01": _voice(1, 0.2, 0),
+        "SPEAKER_02": _voice(0.9, 0.3, 0),  # Closer to Alice than Bob, but Alice is taken
+        "SPEAKER_03": _voice(0, 0, 1),
+    }, threshold=0.6)
+
+    assert {label: match["name"] for label, match in matches.items()} == {
+        "SPEAKER_00": "Bob", "SPEAKER_01": "Alice"
+    }
+    assert matches["SPEAKER_01"]["confidence"] == pytest.approx(float(_voice(1, 0.2, 0)[0]))
+
+
+def test_enroll_refines_known_voices(tmp_path):
+    registry = SpeakerRegistry(tmp_path)
+    registry.enroll("Alice", _voice(1, 0), 10.0)
+    registry.enroll("Alice", _voice(0, 1), 10.0)
+    assert len(registry) == 1
+    np.testing.assert_allclose(registry.matrix[0], _voice(1, 1), rtol=1e-5)
+
+
+def test_identify_enrolls_unknown_voices(tmp_path):
+    registry = SpeakerRegistry(tmp_path)
+    registry.enroll("Alice", _voice(1, 0))
+    embeddings = {"SPEAKER_00": _voice(0, 1), "SPEAKER_01": _voice(1, 0.1)}
+
+    identities = identify_speakers(registry, embeddings, {"SPEAKER_00": 5.0}, threshold=0.6)
+    assert identities["SPEAKER_00"] == {"name": "SPEAKER_00", "confidence": 0.0, "known": False}
+    assert identities["SPEAKER_01"]["name"] == "Alice"
+    assert len(registry) == 1
+
+    identities = identify_speakers(registry, embeddings, {}, threshold=0.6, enroll=True)
+    assert identities["SPEAKER_00"]["name"] == "VOICE_0002"
+    assert SpeakerRegistry(tmp_path).names == ["Alice", "VOICE_0002"]
+
+
+def test_concurrent_jobs_enroll_distinct_voices(tmp_path):
+    registry = SpeakerRegistry(tmp_path)
+    voices = np.eye(8, dtype=np.float32)
+
+    def identify(index):
+        identify_speakers(registry, {"SPEAKER_00": voices[index]}, {}, threshold=0.6, enroll=True)
+
+    threads = [threading.Thread(target=identify, args=(index,)) for index in range(len(voices))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert sorted(registry.names) == [f"VOICE_{index:04d}" for index in range(1, 9)]
+    assert registry.enroll_new(voices[0]) == "VOICE_0009"
+
+
+def test_rename_and_relabel(tmp_path):
+    registry = SpeakerRegistry(tmp_path)
+    registry.enroll("VOICE_0001", _voice(1, 0))
+    registry.enroll("Bob", _voice(0, 1))
+    assert registry.rename("VOICE_0001", "Alice")
+    assert not registry.rename("Alice", "Bob")
+    assert registry.remove("Bob") and registry.names == ["Alice"]
+
+    turns = [{"start": 0, "end": 1, "speaker": "SPEAKER_00"}, {"start": 1, "end": 2, "speaker": "SPEAKER_01"}]
+    renamed = rename_speakers(turns, {"SPEAKER_00": {"name": "Alice"}})
+    assert [turn["speaker"] for turn in renamed] == ["Alice", "SPEAKER_01"]
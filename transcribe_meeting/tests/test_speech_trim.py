@@ -0,0 +1,66 @@
+"""Tests for the speech_trim module."""
+
+import sys
+from pathlib import Path
+import numpy as np
+import pytest
+
+# Add the src directory to path so we can import the package
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from transcribe_meeting.speech_trim import (
+    OffsetMap, detect_speech_spans, trim_silence, remap_speaker_turns, remap_segments
+)
+
+SR = 16000
+
+
+def _tone(seconds):
+    t = np.arange(int(seconds * SR)) / SR
+    return (0.3 * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+
+
+def _silence(seconds):
+    return np.zeros(int(seconds * SR), dtype=np.float32)
+
+
+def test_long_silences_are_cut_short_ones_kept():
+    waveform = np.concatenate([_silence(10), _tone(3), _silence(1), _tone(2), _silence(20)])
+    spans = detect_speech_spans(waveform, padding_seconds=0.0)
+    assert len(spans) == 1
+    assert spans[0][0] == pytest.approx(10.0, abs=0.05)
+    assert spans[0][1] == pytest.approx(16.0, abs=0.05)
+
+
+def test_trim_reports_removed_fraction():
+    waveform = np.concatenate([_silence(30), _tone(10), _silence(60)])
+    trimmed, offset_map = trim_silence(waveform, padding_seconds=0.0)
+    assert trimmed.shape[0] / SR == pytest.approx(10.0, abs=0.05)
+    assert offset_map.removed_fraction == pytest.approx(0.9, abs=0.01)
+
+
+def test_offset_map_translates_points_and_splits_intervals():
+    offset_map = OffsetMap([(10.0, 20.0), (50.0, 55.0)], original_duration=60.0)
+    assert offset_map.to_original(0.0) == 10.0
+    assert offset_map.to_original(12.0) == 52.0
+    # A cut belongs to the next span for starts and the previous one for ends
+    assert offset_map.to_original(10.0) == 50.0
+    assert offset_map.to_original(10.0, is_end=True) == 20.0
+    assert offset_map.map_interval(8.0, 12.0) == [(18.0, 20.0), (50.0, 52.0)]
+    assert offset_map.map_interval(1.0, 2.0) == [(11.0, 12.0)]
+
+
+def test_remap_turns_and_words():
+    offset_map = OffsetMap([(10.0, 20.0), (50.0, 55.0)], original_duration=60.0)
+    turns = remap_speaker_turns([{"start": 8.0, "end": 12.0, "speaker": "A"}], offset_map)
+    assert turns == [
+        {"start": 18.0, "end": 20.0, "speaker": "A"},
+        {"start": 50.0, "end": 52.0, "speaker": "A"},
+    ]
+
+    segments = remap_segments([{
+        "start": 9.0, "end": 11.0, "text": "hi there",
+        "words": [{"text": "hi", "start": 9.0, "end": 9.5}, {"text": "there", "start": 10.5, "end": 11.0}],
+    }], offset_map)
+    assert segments[0]["start"] == 19.0 and segments[0]["end"] == 51.0
+    assert [(w["start"], w["end"]) for w in segments[0]["words"]] == [(19.0, 19.5), (50.5, 51.0)]
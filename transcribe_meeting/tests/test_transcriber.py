@@ -34,4 +34,25 @@ def test_run_transcription_success(mock_pipeline):
 def test_run_transcription_failure(mock_pipeline):
     mock_pipeline.return_value.transcribe.side_effect = Exception("Transcription failed")
     result = run_transcription(mock_pipeline, "test_audio.wav")
-    assert result == (None, None)
\ No newline at end of file
+    assert result == (None, None)
+
+
+@patch("transcribe_meeting.transcriber.BatchedInferencePipeline")
+def test_run_transcription_with_shared_vad_clips(mock_pipeline):
+    mock_pipeline.return_value.transcribe.return_value = ("segments", None)
+    clips = [{"start": 0, "end": 16000}]
+    run_transcription(mock_pipeline, "test_audio.wav", clip_timestamps=clips)
+    kwargs = mock_pipeline.return_value.transcribe.call_args.kwargs
+    assert kwargs["vad_filter"] is False
+    assert kwargs["clip_timestamps"] == clips
+
+def test_segments_by_clip_follows_the_seek_frame():
+    from types import SimpleNamespace
+    from transcribe_meeting.transcriber import segments_by_clip
+    # The second clip overlaps the first one; its segment starts inside the first
+    clips = [{"start": 0, "end": 160000}, {"start": 32000, "end": 64000}]
+    segments = [
+        SimpleNamespace(seek=0, start=1.0, end=3.0, text="a", words=None),
+        SimpleNamespace(seek=200, start=2.5, end=3.5, text="b", words=None),
+    ]
+    assert [(index, segment["text"]) for index, segment in segments_by_clip(segments, clips, 100)] == [(0, "a"), (1, "b")]
@@ -0,0 +1,101 @@
+"""Tests for the turn_transcription module."""
+
+import sys
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+import numpy as np
+
+# Add the src directory to path so we can import the package
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from transcribe_meeting.turn_transcription import group_turns, segments_to_words, transcribe_turns
+
+SR = 16000
+
+
+def test_group_turns_merges_and_splits():
+    turns = [
+        {"start": 0.0, "end": 4.0, "speaker": "A"},
+        {"start": 5.0, "end": 9.0, "speaker": "A"},
+        {"start": 9.0, "end": 10.0, "speaker": "B"},
+        {"start": 10.0, "end": 80.0, "speaker": "A"},
+    ]
+    clips = group_turns(turns, max_seconds=30, max_gap_seconds=2)
+    assert [(c["start"], c["end"], c["speaker"]) for c in clips[:2]] == [(0.0, 9.0, "A"), (9.0, 10.0, "B")]
+    # 70 s turn in three equal pieces
+    long_pieces = clips[2:]
+    assert len(long_pieces) == 3
+    assert all(c["end"] - c["start"] <= 30 for c in long_pieces)
+    assert long_pieces[-1]["end"] == 80.0
+
+
+def test_group_turns_keeps_far_apart_turns_separate():
+    turns = [{"start": 0.0, "end": 2.0, "speaker": "A"}, {"start": 10.0, "end": 12.0, "speaker": "A"}]
+    assert len(group_turns(turns, max_gap_seconds=2)) == 2
+
+
+def test_transcribe_turns_tags_segments_with_speakers():
+    turns = [{"start": 0.0, "end": 3.0, "speaker": "A"}, {"start": 3.0, "end": 5.0, "speaker": "B"}]
+    requested = []
+
+    def transcribe(clips):
+        requested.extend(clips)
+        return [[{"start": c["start"] / SR, "end": c["end"] / SR, "text": "hi", "words": []}] for c in clips]
+
+    segments = transcribe_turns(transcribe, turns)
+
+    assert requested == [{"start": 0, "end": 3 * SR}, {"start": 3 * SR, "end": 5 * SR}]
+    assert [s["speaker"] for s in segments] == ["A", "B"]
+    assert transcribe_turns(transcribe, []) == []
+
+
+def test_transcribe_turns_keeps_overlapping_clips_apart_and_in_the_audio():
+    # B talks over the middle of A's turn; the last turn runs past the audio
+    turns = [
+        {"start": 0.0, "end": 10.0, "speaker": "A"},
+        {"start": 4.0, "end": 6.0, "speaker": "B"},
+        {"start": 12.0, "end": 20.0, "speaker": "A"},
+    ]
+    requested = []
+
+    def transcribe(clips):
+        requested.extend(clips)
+        # A segment of A's clip in the middle of it, i.e. inside B's clip too
+        return [[{"start": 4.5, "end": 5.5, "text": "mine"}], [{"start": 4.5, "end": 5.5, "text": "yours"}], []]
+
+    segments = transcribe_turns(transcribe, turns, max_seconds=30, total_samples=15 * SR)
+
+    assert [(s["text"], s["speaker"]) for s in segments] == [("mine", "A"), ("yours", "B")]
+    assert requested[-1] == {"start": 12 * SR, "end": 15 * SR}
+
+
+def test_segments_to_words_falls_back_to_segments():
+    segments = [
+        {"start": 2.0, "end": 3.0, "text": "no words", "words": [], "speaker": "B"},
+        {"start": 0.0, "end": 1.0, "text": "hi there", "speaker": "A", "words": [
+            {"text": "hi", "start": 0.0, "end": 0.4, "confidence": 0.9},
+            {"text": "there", "start": 0.5, "end": 1.0, "confidence": 0.8},
+        ]},
+    ]
+    entries = segments_to_words(segments)
+    assert [(e["text"], e["speaker"]) for e in entries] == [("hi", "A"), ("there", "A"), ("no words", "B")]
+
+
+@patch("transcribe_meeting.core.transcribe_clips")
+@patch("transcribe_meeting.core.diarize_audio")
+@patch("transcribe_meeting.core.config")
+def test_audio_file_path_honours_turns_mode(mock_config, mock_diarize, mock_transcribe_clips, tmp_path):
+    from transcribe_meeting.core import transcribe_audio_file
+    mock_config.PIPELINE_MODE = "turns"
+    mock_config.SHARED_VAD_ENABLED = False
+    mock_config.TURN_CLIP_MAX_S = 30.0
+    mock_config.TURN_WORD_TIMESTAMPS = False
+    mock_diarize.return_value = [{"start": 0.0, "end": 2.0, "speaker": "A"}]
+    mock_transcribe_clips.return_value = [[{"start": 0.5, "end": 1.5, "text": "hello", "words": []}]]
+    waveform = np.zeros(2 * SR, dtype=np.float32)
+
+    with patch("transcribe_meeting.core.audio_utils.audio_samples", return_value=waveform.shape[0]):
+        words = transcribe_audio_file(tmp_path / "audio.wav", tmp_path / "out.txt", MagicMock(), MagicMock())
+
+    assert [(word["text"], word["speaker"]) for word in words] == [("hello", "A")]
+    assert mock_transcribe_clips.call_args[0][4] is False
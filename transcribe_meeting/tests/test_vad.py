@@ -0,0 +1,40 @@
+"""Tests for the vad module."""
+
+import json
+import sys
+from pathlib import Path
+from unittest.mock import patch
+import numpy as np
+
+# Add the src directory to path so we can import the package
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from transcribe_meeting.vad import VAD_FILENAME, load_or_detect, speech_spans, whisper_clips
+
+SR = 16000
+
+
+@patch("transcribe_meeting.vad.get_speech_timestamps")
+def test_speech_regions_are_stored_and_reused(mock_vad, tmp_path):
+    mock_vad.return_value = [{"start": SR, "end": 3 * SR}]
+    waveform = np.zeros(10 * SR, dtype=np.float32)
+
+    assert load_or_detect(waveform, tmp_path) == [{"start": SR, "end": 3 * SR}]
+    assert load_or_detect(waveform, tmp_path) == [{"start": SR, "end": 3 * SR}]
+    mock_vad.assert_called_once()
+    stored = json.loads((tmp_path / VAD_FILENAME).read_text())
+    assert stored["samples"] == 10 * SR
+
+
+@patch("transcribe_meeting.vad.get_speech_timestamps")
+def test_stored_regions_of_other_audio_are_ignored(mock_vad, tmp_path):
+    (tmp_path / VAD_FILENAME).write_text(json.dumps({"samples": 5, "speech": []}))
+    mock_vad.return_value = []
+    assert load_or_detect(np.zeros(SR, dtype=np.float32), tmp_path) == []
+    mock_vad.assert_called_once()
+
+
+def test_speech_spans_are_seconds_and_merged():
+    speech = [{"start": 2 * SR, "end": 3 * SR}, {"start": 0, "end": SR}, {"start": SR // 2, "end": SR + 10}]
+    assert speech_spans(speech) == [(0.0, (SR + 10) / SR), (2.0, 3.0)]
+    assert whisper_clips([]) == []
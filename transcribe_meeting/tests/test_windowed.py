@@ -0,0 +1,112 @@
+"""Tests for the windowed module."""
+
+import sys
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+import numpy as np
+import pytest
+
+# Add the src directory to path so we can import the package
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from transcribe_meeting.windowed import iter_windows, keep_words_between, transcribe_windowed
+
+SR = 16000
+
+
+def _chunks(seconds, chunk_seconds=1.0):
+    """Decode chunks of a ramp, so every sample encodes its own time."""
+    samples = np.arange(int(seconds * SR), dtype=np.float32) / SR
+    step = int(chunk_seconds * SR)
+    return [samples[i:i + step] for i in range(0, samples.shape[0], step)]
+
+
+@patch("transcribe_meeting.windowed.audio_utils.iter_pcm_chunks")
+def test_windows_overlap_and_mark_the_last(mock_chunks):
+    mock_chunks.return_value = iter(_chunks(25))
+    windows = list(iter_windows("long.wav", window_seconds=10, overlap_seconds=2))
+    assert [(offset, is_last) for offset, _, is_last in windows] == [
+        (0.0, False), (8.0, False), (16.0, True)
+    ]
+    offset, waveform, _ = windows[1]
+    assert waveform[0] == pytest.approx(8.0)
+    assert waveform.shape[0] == 10 * SR
+    assert windows[-1][1].shape[0] == 9 * SR
+
+
+@patch("transcribe_meeting.windowed.audio_utils.iter_pcm_chunks")
+def test_covered_tail_is_not_a_window(mock_chunks):
+    mock_chunks.return_value = iter(_chunks(10))
+    windows = list(iter_windows("exact.wav", window_seconds=10, overlap_seconds=2))
+    assert [(offset, is_last) for offset, _, is_last in windows] == [(0.0, True)]
+
+    with pytest.raises(ValueError):
+        list(iter_windows("bad.wav", window_seconds=5, overlap_seconds=5))
+
+
+def test_keep_words_between_uses_midpoints():
+    segments = [{"start": 0, "end": 3, "words": [
+        {"text": "a", "start": 0.0, "end": 1.0},
+        {"text": "b", "start": 1.8, "end": 2.4},
+    ]}]
+    assert [w["text"] for w in keep_words_between(segments, 0, 2)[0]["words"]] == ["a"]
+    assert keep_words_between(segments, 2.5, 10) == []
+
+
+@patch("transcribe_meeting.windowed.audio_utils.iter_pcm_chunks")
+def test_overlap_words_are_written_once(mock_chunks, tmp_path):
+    mock_chunks.return_value = iter(_chunks(25))
+
+    def transcribe(waveform):
+        # One word per second of audio, named after its recording time
+        offset = round(float(waveform[0]))
+        return [{"start": 0.0, "end": waveform.shape[0] / SR, "words": [
+            {"text": f"w{offset + i}", "start": float(i), "end": i + 0.5}
+            for i in range(int(waveform.shape[0] / SR))
+        ]}]
+
+    output = tmp_path / "transcript.txt"
+    turns = [{"start": 0.0, "end": 25.0, "speaker": "SPEAKER_00"}]
+    written = transcribe_windowed("long.wav", transcribe, turns, str(output),
+                                  window_seconds=10, overlap_seconds=2)
+    assert written == 25
+    assert output.read_text() == "[SPEAKER_00]: " + " ".join(f"w{i}" for i in range(25)) + "\n"
+
+
+@patch("transcribe_meeting.windowed.speaker_embeddings.embed_speakers")
+@patch("transcribe_meeting.windowed.diarizer")
+def test_diarize_windowed_stitches_speakers(mock_diarizer, mock_embed):
+    from transcribe_meeting.windowed import diarize_windowed
+    alice, bob = np.array([1.0, 0.0]), np.array([0.0, 1.0])
+    # Window 0 (0-10s) hears Alice as SPEAKER_00; window 1 (8-16s) labels Bob
+    # SPEAKER_00 and Alice SPEAKER_01
+    local = [
+        [{"start": 0.0, "end": 10.0, "speaker": "SPEAKER_00"}],
+        [{"start": 0.0, "end": 3.0, "speaker": "SPEAKER_01"},
+         {"start": 3.0, "end": 8.0, "speaker": "SPEAKER_00"}],
+    ]
+    mock_diarizer.extract_speaker_turns.side_effect = local
+    mock_embed.side_effect = [{"SPEAKER_00": alice}, {"SPEAKER_00": bob, "SPEAKER_01": alice}]
+
+    turns = diarize_windowed(MagicMock(), np.zeros(16 * SR, dtype=np.float32),
+                             window_seconds=10, overlap_seconds=2)
+
+    assert turns == [
+        {"start": 0.0, "end": 11.0, "speaker": "SPEAKER_00"},
+        {"start": 11.0, "end": 16.0, "speaker": "SPEAKER_01"},
+    ]
+
+
+@patch("transcribe_meeting.core.windowed.diarize_windowed", return_value=[])
+@patch("transcribe_meeting.core.diarizer.run_diarization")
+def test_windowed_mode_diarizes_in_windows(mock_run, mock_windowed):
+    from transcribe_meeting import core
+    with patch.object(core.config, "PIPELINE_MODE", "windowed"), \
+            patch.object(core.config, "DIARIZATION_WINDOW_SECONDS", 0), \
+            patch.object(core.config, "WINDOW_SECONDS", 600.0), \
+            patch.object(core.config, "WINDOW_OVERLAP_S", 10.0):
+        assert core.diarization_window() == (600.0, 10.0)
+        core.diarize_audio(MagicMock(), "long.wav")
+        assert core.diarization_settings()["window"]["seconds"] == 600.0
+    mock_run.assert_not_called()
+    assert mock_windowed.call_args[0][2:4] == (600.0, 10.0)